@@ -0,0 +1,273 @@
+import threading
+
+import pandas as pd
+
+from almacenamiento import HOJA_CONSUMOS, HOJA_HISTORIAL, HOJA_PAGOS, hoja_particion, particiones
+from sucursales import SUCURSAL_ORIGINAL
+
+
+def _mes_de(fechas):
+    fechas_dt = pd.to_datetime(fechas, format="%d/%m/%Y", errors="coerce")
+    return fechas_dt.dt.strftime("%m/%Y")
+
+
+def _clave_orden(mes):
+    mm, aaaa = mes.split("/")
+    return aaaa, mm
+
+
+def leer_con_particiones(cache_local, hoja):
+    # {nombre: DataFrame} de la hoja original y todas sus particiones, pedidas en paralelo
+    nombres = [hoja, *particiones(cache_local.hojas(), hoja).values()]
+    tablas = {}
+    for nombre, futuro in cache_local.precargar(nombres).items():
+        try:
+            tablas[nombre] = futuro.result()
+        except Exception:
+            tablas[nombre] = pd.DataFrame()
+    return tablas
+
+
+def filas_nuevas(tablas, procesadas, versiones=None):
+    # Filas de cada hoja que todavia no se procesaron; deja `procesadas` ({hoja: (version, filas)})
+    # al dia. Si el cache volvio a bajar una hoja completa (cambio su version en `versiones`) o la
+    # hoja tiene menos filas que las ya procesadas, se devuelven todas las tablas completas y
+    # reiniciar=True para reconstruir desde cero.
+    versiones = versiones or {}
+
+    def vigente(hoja, tabla):
+        version, filas = procesadas.get(hoja, (versiones.get(hoja, 0), 0))
+        return version == versiones.get(hoja, 0) and filas <= len(tabla)
+
+    reiniciar = not all(vigente(hoja, tabla) for hoja, tabla in tablas.items())
+    if reiniciar:
+        procesadas.clear()
+    nuevas = {hoja: tabla.iloc[procesadas.get(hoja, (0, 0))[1]:] for hoja, tabla in tablas.items()}
+    procesadas.update({hoja: (versiones.get(hoja, 0), len(tabla)) for hoja, tabla in tablas.items()})
+    return nuevas, reiniciar
+
+
+# --- TOTALES MENSUALES PRECALCULADOS ---
+# Se alimentan solo con las filas que el cache local todavia no habia procesado,
+# asi cambiar de mes en el sidebar es una busqueda en un diccionario.
+class AgregadosMensuales:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._procesadas = {}
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self.meses = {}
+        self.consumos = {}
+        self.filas_historial = 0
+        self.hay_consumos = False
+
+    def agregar_historial(self, df):
+        self.filas_historial += len(df)
+        if df.empty or "Fecha" not in df.columns:
+            return
+        totales = pd.DataFrame({
+            "Mes": _mes_de(df["Fecha"]),
+            "Efectivo": pd.to_numeric(df["Efectivo"], errors="coerce").fillna(0),
+            "Digital": pd.to_numeric(df["Digital"], errors="coerce").fillna(0),
+        }).dropna(subset=["Mes"])
+        por_mes = totales.groupby("Mes").agg(Efectivo=("Efectivo", "sum"), Digital=("Digital", "sum"), Cierres=("Mes", "size"))
+        for mes, fila in por_mes.iterrows():
+            acumulado = self.meses.setdefault(mes, {"Efectivo": 0.0, "Digital": 0.0, "Cierres": 0})
+            acumulado["Efectivo"] += float(fila["Efectivo"])
+            acumulado["Digital"] += float(fila["Digital"])
+            acumulado["Cierres"] += int(fila["Cierres"])
+
+    def agregar_consumos(self, df):
+        if df.empty or "Fecha" not in df.columns:
+            return
+        self.hay_consumos = True
+        montos = pd.DataFrame({
+            "Mes": _mes_de(df["Fecha"]),
+            "Empleado": df["Empleado"],
+            "Monto": pd.to_numeric(df["Monto"], errors="coerce").fillna(0),
+        }).dropna(subset=["Mes"])
+        for (mes, empleado), monto in montos.groupby(["Mes", "Empleado"])["Monto"].sum().items():
+            por_empleado = self.consumos.setdefault(mes, {})
+            por_empleado[empleado] = por_empleado.get(empleado, 0.0) + float(monto)
+
+    def actualizar(self, cache_local, hoja_historial=HOJA_HISTORIAL, hoja_consumos=HOJA_CONSUMOS):
+        with self._lock:
+            historial = cache_local.leer(hoja_historial)
+            try:
+                consumos = cache_local.leer(hoja_consumos)
+            except Exception:
+                consumos = pd.DataFrame()
+            nuevas, reiniciar = filas_nuevas({hoja_historial: historial, hoja_consumos: consumos}, self._procesadas,
+                                             cache_local.versiones([hoja_historial, hoja_consumos]))
+            if reiniciar:
+                self._reiniciar()
+            self.agregar_historial(nuevas[hoja_historial])
+            self.agregar_consumos(nuevas[hoja_consumos])
+
+    def meses_disponibles(self):
+        return sorted(self.meses, key=_clave_orden, reverse=True)
+
+    def resumen(self, mes):
+        return self.meses.get(mes, {"Efectivo": 0.0, "Digital": 0.0, "Cierres": 0})
+
+    def consumo_por_empleado(self, mes):
+        consumo = [(empleado, monto) for empleado, monto in self.consumos.get(mes, {}).items() if monto > 0]
+        return sorted(consumo, key=lambda item: item[1], reverse=True)
+
+
+# --- VISTA POR SUCURSAL Y CONSOLIDADA ---
+# Un AgregadosMensuales por particion (sucursal, mes) mas uno para las hojas originales,
+# que pertenecen a la sucursal original. Ver un mes solo lee las particiones de ese mes
+# y la vista consolidada suma los totales de cada particion, sin juntar hojas completas.
+def _mes_de_particion(mes):
+    aaaa, mm = mes.split("-")
+    return f"{mm}/{aaaa}"
+
+
+class AgregadosSucursales:
+    def __init__(self):
+        self.particiones = {}
+        self._meses_particionados = {}
+
+    def _agregados(self, clave):
+        return self.particiones.setdefault(clave, AgregadosMensuales())
+
+    def _originales(self):
+        return self._agregados((SUCURSAL_ORIGINAL, None))
+
+    def actualizar_indice(self, cache_local):
+        # {(sucursal, "mm/aaaa"): hoja de Historial}, sale del listado de hojas sin leer ninguna
+        self._originales().actualizar(cache_local)
+        self._meses_particionados = {
+            (sucursal, _mes_de_particion(mes)): hoja
+            for (sucursal, mes), hoja in particiones(cache_local.hojas(), HOJA_HISTORIAL).items()
+        }
+
+    def meses_disponibles(self, sucursal=None):
+        meses = {mes for (s, mes) in self._meses_particionados if sucursal in (None, s)}
+        if sucursal in (None, SUCURSAL_ORIGINAL):
+            meses.update(self._originales().meses)
+        return sorted(meses, key=_clave_orden, reverse=True)
+
+    def actualizar(self, cache_local, mes, sucursal=None):
+        for (s, m), hoja in self._meses_particionados.items():
+            if m == mes and sucursal in (None, s):
+                mm, aaaa = mes.split("/")
+                self._agregados((s, m)).actualizar(cache_local, hoja, hoja_particion(HOJA_CONSUMOS, s, f"{aaaa}-{mm}"))
+
+    def _seleccion(self, mes, sucursal):
+        seleccion = [ag for (s, m), ag in self.particiones.items() if m == mes and sucursal in (None, s)]
+        if sucursal in (None, SUCURSAL_ORIGINAL):
+            seleccion.append(self._originales())
+        return seleccion
+
+    def resumen(self, mes, sucursal=None):
+        total = {"Efectivo": 0.0, "Digital": 0.0, "Cierres": 0}
+        for agregados in self._seleccion(mes, sucursal):
+            for campo, valor in agregados.resumen(mes).items():
+                total[campo] += valor
+        return total
+
+    def hay_consumos(self, mes, sucursal=None):
+        return any(ag.hay_consumos for ag in self._seleccion(mes, sucursal))
+
+    def consumo_por_empleado(self, mes, sucursal=None):
+        consumo = {}
+        for agregados in self._seleccion(mes, sucursal):
+            for empleado, monto in agregados.consumo_por_empleado(mes):
+                consumo[empleado] = consumo.get(empleado, 0.0) + monto
+        return sorted(consumo.items(), key=lambda item: item[1], reverse=True)
+
+
+# --- PAGOS A PROVEEDORES ---
+# Dos indices sobre Pagos_Proveedores (hoja original y particiones): totales por
+# (Proveedor, mes) separados por forma de pago, y los pagos de cada Nro Factura.
+# Como los agregados mensuales, cada actualizacion procesa solo las filas nuevas.
+FORMAS_PAGO = ["Efectivo", "Digital / Banco"]
+
+
+def _normalizar_factura(numero):
+    return str(numero).strip().upper().replace(" ", "")
+
+
+class IndicePagos:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._procesadas = {}
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self.por_proveedor_mes = {}
+        self.proveedores_por_mes = {}
+        self.facturas = {}
+        self.duplicadas = set()
+
+    def agregar_pagos(self, df):
+        if df.empty or "Proveedor" not in df.columns:
+            return
+        pagos = pd.DataFrame({
+            "Proveedor": df["Proveedor"].astype(str),
+            "Mes": _mes_de(df["Fecha"]),
+            "Forma Pago": df["Forma Pago"].where(df["Forma Pago"].isin(FORMAS_PAGO), "Digital / Banco"),
+            "Monto": pd.to_numeric(df["Monto"], errors="coerce").fillna(0),
+        }).dropna(subset=["Mes"])
+        for (proveedor, mes, forma), grupo in pagos.groupby(["Proveedor", "Mes", "Forma Pago"])["Monto"].agg(["sum", "size"]).iterrows():
+            totales = self.por_proveedor_mes.setdefault((proveedor, mes), {**dict.fromkeys(FORMAS_PAGO, 0.0), "Pagos": 0})
+            totales[forma] += float(grupo["sum"])
+            totales["Pagos"] += int(grupo["size"])
+            self.proveedores_por_mes.setdefault(mes, set()).add(proveedor)
+
+        if "Nro Factura" not in df.columns:
+            return
+        columnas = [c for c in ["Proveedor", "Nro Factura", "Fecha", "Cajero", "Sucursal", "Forma Pago", "Monto"] if c in df.columns]
+        for pago in df[columnas].to_dict("records"):
+            numero = _normalizar_factura(pago["Nro Factura"])
+            if not numero:
+                continue
+            pago["Monto"] = pd.to_numeric(pago["Monto"], errors="coerce")
+            anteriores = self.facturas.setdefault(numero, [])
+            # La misma factura del mismo proveedor cargada dos veces; otro proveedor puede usar el mismo numero
+            if any(p["Proveedor"] == pago["Proveedor"] for p in anteriores):
+                self.duplicadas.add((pago["Proveedor"], numero))
+            anteriores.append(pago)
+
+    def actualizar(self, cache_local):
+        with self._lock:
+            tablas = leer_con_particiones(cache_local, HOJA_PAGOS)
+            nuevas, reiniciar = filas_nuevas(tablas, self._procesadas, cache_local.versiones(tablas))
+            if reiniciar:
+                self._reiniciar()
+            for tabla in nuevas.values():
+                self.agregar_pagos(tabla)
+
+    def filas_procesadas(self):
+        # Pagos indexados entre la hoja original y sus particiones
+        return sum(filas for _, filas in self._procesadas.values())
+
+    def meses_disponibles(self):
+        return sorted(self.proveedores_por_mes, key=_clave_orden, reverse=True)
+
+    def gasto_del_mes(self, mes):
+        # Una fila por proveedor, de mayor a menor gasto
+        filas = [{"Proveedor": proveedor, **self.por_proveedor_mes[(proveedor, mes)]}
+                 for proveedor in self.proveedores_por_mes.get(mes, ())]
+        gasto = pd.DataFrame(filas, columns=["Proveedor"] + FORMAS_PAGO + ["Pagos"])
+        gasto["Total"] = gasto[FORMAS_PAGO].sum(axis=1)
+        return gasto.sort_values("Total", ascending=False, ignore_index=True)
+
+    def gasto_mensual(self, proveedor):
+        meses = [mes for mes, proveedores in self.proveedores_por_mes.items() if proveedor in proveedores]
+        filas = [{"Mes": mes, **self.por_proveedor_mes[(proveedor, mes)]} for mes in sorted(meses, key=_clave_orden)]
+        gasto = pd.DataFrame(filas, columns=["Mes"] + FORMAS_PAGO + ["Pagos"])
+        gasto["Total"] = gasto[FORMAS_PAGO].sum(axis=1)
+        return gasto
+
+    def buscar_factura(self, numero):
+        return pd.DataFrame(self.facturas.get(_normalizar_factura(numero), []))
+
+    def facturas_duplicadas(self):
+        # Solo los pagos del proveedor que repitio el numero, no los de otros con el mismo numero
+        filas = [{"Factura": numero, **pago} for proveedor, numero in sorted(self.duplicadas)
+                 for pago in self.facturas[numero] if pago["Proveedor"] == proveedor]
+        return pd.DataFrame(filas)
@@ -0,0 +1,433 @@
+import csv
+import os
+import re
+import time
+
+import pandas as pd
+
+# --- 1. ESQUEMA DE LAS HOJAS ---
+HOJA_HISTORIAL = "Historial"
+HOJA_PAGOS = "Pagos_Proveedores"
+HOJA_CONSUMOS = "Consumo_Empleados"
+HOJA_DIRECTORIO = "Directorio"
+
+# Clave de idempotencia de un cierre (Fecha + Cajero), se guarda en todas las filas que genera
+COLUMNA_ID = "ID Cierre"
+COLUMNAS_CLAVE = ["Fecha", "Sucursal", "Caja", "Cajero", COLUMNA_ID]
+
+# Por defecto la API devuelve los numeros con el formato regional de la planilla ("850000,5",
+# "$ 1.234,50"); se piden crudos. Las fechas si se quieren como texto (dd/mm/aaaa).
+OPCIONES_LECTURA = {"valueRenderOption": "UNFORMATTED_VALUE", "dateTimeRenderOption": "FORMATTED_STRING"}
+
+
+# Con sucursales, cada hoja de cierres se parte por sucursal y mes: "Historial_ESF_2025-03".
+# Las hojas sin sufijo quedan con los cierres anteriores a las sucursales (solo lectura).
+def mes_particion(fecha):
+    dia, mes, anio = fecha.split("/")
+    return f"{anio}-{mes}"
+
+
+def hoja_particion(hoja, sucursal=None, mes=None):
+    return f"{hoja}_{sucursal}_{mes}" if sucursal else hoja
+
+
+def particiones(hojas, hoja):
+    # {(sucursal, "aaaa-mm"): nombre} de las particiones de `hoja` que existen
+    patron = re.compile(rf"{re.escape(hoja)}_(.+)_(\d{{4}}-\d{{2}})")
+    encontradas = {}
+    for nombre in hojas:
+        coincidencia = patron.fullmatch(nombre)
+        if coincidencia:
+            encontradas[coincidencia.groups()] = nombre
+    return encontradas
+
+
+def _valor_celda(valor):
+    if pd.isna(valor):
+        return ""
+    if hasattr(valor, "item"):
+        return valor.item()
+    return valor
+
+
+def _filas_alineadas(df, encabezado):
+    df_alineado = df.reindex(columns=encabezado)
+    return [[_valor_celda(v) for v in fila] for fila in df_alineado.itertuples(index=False, name=None)]
+
+
+def _letra_columna(indice):
+    # 0 -> "A", 26 -> "AA"
+    letra = ""
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        letra = chr(ord("A") + resto) + letra
+    return letra
+
+
+def _celda_api(valor):
+    if isinstance(valor, bool):
+        return {"userEnteredValue": {"boolValue": valor}}
+    if isinstance(valor, (int, float)):
+        return {"userEnteredValue": {"numberValue": valor}}
+    return {"userEnteredValue": {"stringValue": str(valor)}}
+
+
+# --- 2. BACKENDS DE ESCRITURA ---
+# Cada backend solo sabe leer una hoja completa y agregar filas al final.
+# Guardar un cierre nunca reescribe el historial existente.
+class BackendHojas:
+    def leer(self, hoja):
+        raise NotImplementedError
+
+    def agregar_filas(self, hoja, df):
+        raise NotImplementedError
+
+    def leer_desde(self, hoja, desde):
+        return self.leer(hoja).iloc[desde:].reset_index(drop=True)
+
+    def agregar_lote(self, lote):
+        for hoja, df in lote.items():
+            self.agregar_filas(hoja, df)
+
+    def claves_guardadas(self, hoja):
+        df = self.leer(hoja)
+        if df.empty:
+            return set()
+        return set(claves_de_filas(df))
+
+    def listar_hojas(self):
+        raise NotImplementedError
+
+    def encabezados(self, hojas):
+        return {hoja: list(self.leer(hoja).columns) for hoja in hojas}
+
+    def leer_bloques(self, hoja, tamanio):
+        # Sin lectura por rangos se baja la hoja una vez y se entrega de a bloques
+        df = self.leer(hoja)
+        for inicio in range(0, len(df), tamanio):
+            yield df.iloc[inicio:inicio + tamanio]
+
+
+class BackendGSheets(BackendHojas):
+    def __init__(self, conn, ttl=600):
+        self.conn = conn
+        self.ttl = ttl
+        self._planilla = None
+        self._hojas = {}
+        self._encabezados = {}
+        self._columnas = {}
+
+    def _abrir_planilla(self):
+        if self._planilla is None:
+            self._planilla = self.conn.client._open_spreadsheet()
+            self._refrescar_hojas()
+        return self._planilla
+
+    def _hoja(self, hoja):
+        self._abrir_planilla()
+        return self._hojas[hoja]
+
+    def _refrescar_hojas(self):
+        self._hojas = {ws.title: ws for ws in self._planilla.worksheets()}
+        self._columnas = {titulo: ws.col_count for titulo, ws in self._hojas.items()}
+
+    def _crear_hojas(self, lote):
+        # Las particiones nuevas (primer cierre del mes de una sucursal) se crean en un solo pedido.
+        # Sin gridProperties la hoja nace con 1000x26 celdas vacias que cuentan para el limite de
+        # la planilla; se crea con una fila (el encabezado) y appendCells la agranda al agregar.
+        faltantes = [h for h in lote if h not in self._hojas]
+        if not faltantes:
+            return
+        self._planilla.batch_update({"requests": [{"addSheet": {"properties": {
+            "title": h, "gridProperties": {"rowCount": 1, "columnCount": len(lote[h].columns)},
+        }}} for h in faltantes]})
+        self._refrescar_hojas()
+        for hoja in faltantes:
+            self._encabezados[hoja] = []
+
+    def listar_hojas(self):
+        if not hasattr(self.conn.client, "_open_spreadsheet"):
+            return []
+        if self._planilla is None:
+            self._abrir_planilla()
+        else:
+            self._refrescar_hojas()
+        return list(self._hojas)
+
+    def _cargar_encabezados(self, hojas):
+        faltantes = [h for h in hojas if h not in self._encabezados]
+        if not faltantes:
+            return
+        respuesta = self._abrir_planilla().values_batch_get([f"'{h}'!1:1" for h in faltantes], params=OPCIONES_LECTURA)
+        for hoja, rango in zip(faltantes, respuesta.get("valueRanges", [])):
+            valores = rango.get("values", [])
+            self._encabezados[hoja] = valores[0] if valores else []
+
+    def leer(self, hoja):
+        return self.conn.read(worksheet=hoja, ttl=self.ttl)
+
+    def _leer_rango(self, hoja, desde, cantidad=None):
+        self._abrir_planilla()
+        if hoja not in self._hojas:
+            # Puede haberla creado otra sesion; si sigue sin existir es una particion todavia vacia
+            self._refrescar_hojas()
+            if hoja not in self._hojas:
+                return pd.DataFrame()
+        # Encabezado y filas posteriores a `desde` (hasta `cantidad`) en un solo pedido
+        hasta = f"{desde + 1 + cantidad}" if cantidad else ""
+        respuesta = self._abrir_planilla().values_batch_get([f"'{hoja}'!1:1", f"'{hoja}'!A{desde + 2}:ZZ{hasta}"], params=OPCIONES_LECTURA)
+        rangos = respuesta.get("valueRanges", [])
+        encabezado = rangos[0].get("values", [[]])[0]
+        self._encabezados[hoja] = encabezado
+        # Como el backend CSV, todo vuelve como texto ("850000.5", no 850000.5)
+        filas = [[str(v) for v in fila] + [""] * (len(encabezado) - len(fila)) for fila in rangos[1].get("values", [])]
+        return pd.DataFrame([fila[:len(encabezado)] for fila in filas], columns=encabezado)
+
+    def leer_desde(self, hoja, desde):
+        if not hasattr(self.conn.client, "_open_spreadsheet"):
+            # Planilla publica (solo lectura): no hay API de rangos, se baja la hoja y se recorta
+            return super().leer_desde(hoja, desde)
+        return self._leer_rango(hoja, desde)
+
+    def leer_bloques(self, hoja, tamanio):
+        if not hasattr(self.conn.client, "_open_spreadsheet"):
+            yield from super().leer_bloques(hoja, tamanio)
+            return
+        desde = 0
+        while True:
+            bloque = self._leer_rango(hoja, desde, tamanio)
+            if not bloque.empty:
+                yield bloque
+            if len(bloque) < tamanio:
+                return
+            desde += tamanio
+
+    def encabezados(self, hojas):
+        self._abrir_planilla()
+        existentes = [h for h in hojas if h in self._hojas]
+        self._cargar_encabezados(existentes)
+        return {hoja: self._encabezados.get(hoja, []) for hoja in hojas}
+
+    def agregar_filas(self, hoja, df):
+        self.agregar_lote({hoja: df})
+
+    def agregar_lote(self, lote):
+        # Todas las hojas viajan en un unico batchUpdate: la API lo aplica completo o no aplica nada
+        lote = {h: df for h, df in lote.items() if not df.empty}
+        if not lote:
+            return
+        self._abrir_planilla()
+        self._crear_hojas(lote)
+        self._cargar_encabezados(list(lote))
+        pedidos = []
+        for hoja, df in lote.items():
+            id_hoja = self._hoja(hoja).id
+            encabezado = self._encabezados[hoja]
+            nuevas = [c for c in df.columns if c not in encabezado]
+            if nuevas:
+                encabezado = encabezado + nuevas
+                if len(encabezado) > self._columnas[hoja]:
+                    pedidos.append({"appendDimension": {
+                        "sheetId": id_hoja, "dimension": "COLUMNS", "length": len(encabezado) - self._columnas[hoja],
+                    }})
+                    self._columnas[hoja] = len(encabezado)
+                pedidos.append({"updateCells": {
+                    "start": {"sheetId": id_hoja, "rowIndex": 0, "columnIndex": 0},
+                    "rows": [{"values": [_celda_api(c) for c in encabezado]}],
+                    "fields": "userEnteredValue",
+                }})
+            pedidos.append({"appendCells": {
+                "sheetId": id_hoja,
+                "rows": [{"values": [_celda_api(v) for v in fila]} for fila in _filas_alineadas(df, encabezado)],
+                "fields": "userEnteredValue",
+            }})
+        self._planilla.batch_update({"requests": pedidos})
+        for hoja, df in lote.items():
+            self._encabezados[hoja] = self._encabezados[hoja] + [c for c in df.columns if c not in self._encabezados[hoja]]
+
+    def claves_guardadas(self, hoja):
+        self._abrir_planilla()
+        if hoja not in self._hojas:
+            return set()
+        self._cargar_encabezados([hoja])
+        encabezado = self._encabezados[hoja]
+        # Ademas de "ID Cierre", las columnas con las que se arma la clave de las filas anteriores
+        # a esa columna; todas en un solo pedido
+        columnas = [c for c in COLUMNAS_CLAVE if c in encabezado]
+        if not columnas:
+            return set()
+        letras = [_letra_columna(encabezado.index(c)) for c in columnas]
+        respuesta = self._planilla.values_batch_get([f"'{hoja}'!{letra}2:{letra}" for letra in letras], params=OPCIONES_LECTURA)
+        valores = [[str(fila[0]) if fila else "" for fila in rango.get("values", [])] for rango in respuesta.get("valueRanges", [])]
+        filas = max(map(len, valores), default=0)
+        df = pd.DataFrame({c: v + [""] * (filas - len(v)) for c, v in zip(columnas, valores)})
+        return set(claves_de_filas(df))
+
+
+class BackendCSV(BackendHojas):
+    # Reemplazo local de Google Sheets: un archivo CSV por hoja.
+    def __init__(self, directorio):
+        self.directorio = directorio
+        self._claves = {}
+        os.makedirs(directorio, exist_ok=True)
+
+    def _ruta(self, hoja):
+        return os.path.join(self.directorio, f"{hoja}.csv")
+
+    def _existe(self, ruta):
+        # Un archivo de 0 bytes (hoja exportada sin columnas) cuenta como hoja vacia
+        return os.path.exists(ruta) and os.path.getsize(ruta) > 0
+
+    def _encabezado(self, ruta):
+        with open(ruta, newline="", encoding="utf-8") as f:
+            return next(csv.reader(f), [])
+
+    def listar_hojas(self):
+        return sorted(nombre[:-4] for nombre in os.listdir(self.directorio) if nombre.endswith(".csv"))
+
+    def leer(self, hoja):
+        ruta = self._ruta(hoja)
+        if not self._existe(ruta):
+            return pd.DataFrame()
+        return pd.read_csv(ruta, dtype=str, keep_default_na=False)
+
+    def leer_desde(self, hoja, desde):
+        ruta = self._ruta(hoja)
+        if not self._existe(ruta):
+            return pd.DataFrame()
+        return pd.read_csv(ruta, dtype=str, keep_default_na=False, skiprows=range(1, desde + 1))
+
+    def leer_bloques(self, hoja, tamanio):
+        ruta = self._ruta(hoja)
+        if self._existe(ruta):
+            yield from pd.read_csv(ruta, dtype=str, keep_default_na=False, chunksize=tamanio)
+
+    def encabezados(self, hojas):
+        return {hoja: self._encabezado(self._ruta(hoja)) if os.path.exists(self._ruta(hoja)) else [] for hoja in hojas}
+
+    def agregar_filas(self, hoja, df):
+        if df.empty:
+            return
+        ruta = self._ruta(hoja)
+        if not os.path.exists(ruta):
+            df.to_csv(ruta, index=False)
+        else:
+            encabezado = self._encabezado(ruta)
+            nuevas = [c for c in df.columns if c not in encabezado]
+            if nuevas:
+                # Cambio de esquema (poco frecuente): se reescribe una sola vez con las columnas nuevas
+                df_actual = self.leer(hoja)
+                pd.concat([df_actual, df], ignore_index=True).fillna("").to_csv(ruta, index=False)
+            else:
+                with open(ruta, "a", newline="", encoding="utf-8") as f:
+                    csv.writer(f).writerows(_filas_alineadas(df, encabezado))
+        if hoja in self._claves:
+            self._claves[hoja].update(claves_de_filas(df))
+
+    def agregar_lote(self, lote):
+        # Si falla alguna hoja se truncan los archivos a su tamanio previo (rollback)
+        respaldo = {}
+        for hoja in lote:
+            ruta = self._ruta(hoja)
+            respaldo[ruta] = os.path.getsize(ruta) if os.path.exists(ruta) else None
+        try:
+            super().agregar_lote(lote)
+        except Exception:
+            for ruta, tamanio in respaldo.items():
+                if tamanio is None:
+                    if os.path.exists(ruta):
+                        os.remove(ruta)
+                elif os.path.getsize(ruta) != tamanio:
+                    with open(ruta, "r+b") as f:
+                        f.truncate(tamanio)
+            self._claves.clear()
+            raise
+
+    def claves_guardadas(self, hoja):
+        if hoja not in self._claves:
+            self._claves[hoja] = super().claves_guardadas(hoja)
+        return self._claves[hoja]
+
+
+# --- 3. ARMADO DE FILAS DE UN CIERRE ---
+def clave_cierre(datos_cierre):
+    if datos_cierre.get("Sucursal"):
+        return f"{datos_cierre['Sucursal']}|{datos_cierre['Caja']}|{datos_cierre['Fecha']}|{datos_cierre['Cajero']}"
+    return f"{datos_cierre['Fecha']}|{datos_cierre['Cajero']}"
+
+
+def _texto(df, columna):
+    if columna not in df.columns:
+        return pd.Series("", index=df.index)
+    return df[columna].fillna("").astype(str).str.strip()
+
+
+def claves_de_filas(df):
+    # clave_cierre para todas las filas a la vez; respeta un "ID Cierre" ya cargado. Las filas
+    # anteriores a esa columna quedan con Fecha|Cajero, la misma clave que les da la importacion
+    fecha, cajero, sucursal = _texto(df, "Fecha"), _texto(df, "Cajero"), _texto(df, "Sucursal")
+    clave = (sucursal + "|" + _texto(df, "Caja") + "|" + fecha + "|" + cajero).where(sucursal != "", fecha + "|" + cajero)
+    id_cierre = _texto(df, COLUMNA_ID)
+    return id_cierre.where(id_cierre != "", clave)
+
+
+def hojas_del_cierre(datos_cierre):
+    # Las tres hojas (o particiones) donde se guarda un cierre
+    sucursal = datos_cierre.get("Sucursal")
+    mes = mes_particion(datos_cierre["Fecha"]) if sucursal else None
+    return {hoja: hoja_particion(hoja, sucursal, mes) for hoja in (HOJA_HISTORIAL, HOJA_PAGOS, HOJA_CONSUMOS)}
+
+
+def filas_historial(datos_cierre):
+    return pd.DataFrame([datos_cierre])
+
+
+def filas_pagos(datos_cierre, df_provs):
+    pagos_reales = df_provs[df_provs["Monto"] > 0].copy()
+    pagos_reales["Fecha"] = datos_cierre["Fecha"]
+    pagos_reales["Cajero"] = datos_cierre["Cajero"]
+    if datos_cierre.get("Sucursal"):
+        pagos_reales["Sucursal"] = datos_cierre["Sucursal"]
+        pagos_reales["Caja"] = datos_cierre["Caja"]
+    return pagos_reales
+
+
+def filas_consumos(datos_cierre, df_empls):
+    consumos_empl = df_empls[df_empls["Monto"] > 0].copy()
+    consumos_empl["Fecha"] = datos_cierre["Fecha"]
+    if datos_cierre.get("Sucursal"):
+        consumos_empl["Sucursal"] = datos_cierre["Sucursal"]
+        return consumos_empl[["Fecha", "Sucursal", "Empleado", "Monto"]]
+    return consumos_empl[["Fecha", "Empleado", "Monto"]]
+
+
+def armar_lote(datos_cierre, df_provs, df_empls):
+    hojas = hojas_del_cierre(datos_cierre)
+    lote = {
+        hojas[HOJA_HISTORIAL]: filas_historial(datos_cierre),
+        hojas[HOJA_PAGOS]: filas_pagos(datos_cierre, df_provs),
+        hojas[HOJA_CONSUMOS]: filas_consumos(datos_cierre, df_empls),
+    }
+    for df in lote.values():
+        df[COLUMNA_ID] = clave_cierre(datos_cierre)
+    return lote
+
+
+# --- 4. CONFIRMACIÓN TRANSACCIONAL DEL CIERRE ---
+def confirmar_cierre(backend, datos_cierre, df_provs, df_empls, intentos=3, espera=0.5):
+    # Devuelve True si el cierre quedo guardado en esta llamada y False si ya existia
+    # (doble click o segundo guardado del mismo cajero en la misma fecha).
+    clave = clave_cierre(datos_cierre)
+    lote = armar_lote(datos_cierre, df_provs, df_empls)
+    for intento in range(intentos):
+        try:
+            if clave in backend.claves_guardadas(hojas_del_cierre(datos_cierre)[HOJA_HISTORIAL]):
+                # En un reintento significa que el envio anterior llego a aplicarse
+                return intento > 0
+            backend.agregar_lote(lote)
+            return True
+        except Exception:
+            if intento == intentos - 1:
+                raise
+            time.sleep(espera * 2 ** intento)
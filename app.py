@@ -1,11 +1,25 @@
 import streamlit as st 
 import pandas as pd 
+import numpy as np 
 from datetime import datetime 
-from fpdf import FPDF 
-import os 
+import time 
 from streamlit_gsheets import GSheetsConnection 
 import streamlit.components.v1 as components 
-import plotly.express as px  
+import json 
+from almacenamiento import HOJA_CONSUMOS, HOJA_DIRECTORIO, HOJA_HISTORIAL, HOJA_PAGOS, BackendGSheets, hojas_del_cierre, particiones 
+from cache_local import CacheLocal 
+from cola_envios import ColaCierres 
+from agregados import AgregadosSucursales, IndicePagos 
+from estado_caja import PLANTILLAS, EstadoCaja 
+from sucursales import PROVEEDORES_POR_DEFECTO, cargar_sucursales, columna_medio 
+import calculos 
+import tendencias 
+from reporte_pdf import generar_pdf_profesional 
+from importacion import importar_cierres, leer_montos_csv, parsear_montos, validar_cierres 
+from exportacion import FORMATOS, exportar_archivo 
+from reportes_lote import leer_origen 
+import instrumentacion 
+from instrumentacion import BackendMedido, RegistroTiempos 
 
 # --- 1. CONFIGURACIÓN Y LOGIN --- 
 st.set_page_config(page_title="Cierre de Caja - Estancia San Francisco", layout="centered", initial_sidebar_state="collapsed") 
@@ -51,400 +65,572 @@ def check_password():
 if not check_password(): 
     st.stop() 
 
+# --- TIEMPOS DE EJECUCIÓN POR BLOQUE --- 
+inicio_corrida = time.perf_counter() 
+modo_diagnostico = st.query_params.get("diagnostico") == "1" 
+if "tiempos" not in st.session_state: 
+    st.session_state.tiempos = RegistroTiempos() 
+tiempos = st.session_state.tiempos 
+tiempos.diagnostico = modo_diagnostico 
+
 # --- CONEXIÓN GOOGLE SHEETS --- 
+@st.cache_resource 
+def crear_cache_local(_conn): 
+    return CacheLocal(BackendMedido(BackendGSheets(_conn))) 
+
+@st.cache_resource 
+def crear_agregados(): 
+    return AgregadosSucursales() 
+
+@st.cache_resource 
+def crear_indice_pagos(): 
+    return IndicePagos() 
+
+@st.cache_resource 
+def crear_tendencias(): 
+    return tendencias.TendenciasHistorial() 
+
+@st.cache_resource 
+def crear_cola(): 
+    return ColaCierres() 
+
+# La cola existe aunque no haya conexion: los cierres se guardan localmente y se envian despues 
+cola = crear_cola() 
+
 try: 
     conn = st.connection("gsheets", type=GSheetsConnection) 
+    cache_local = crear_cache_local(conn) 
+    backend = cache_local.backend 
+    agregados = crear_agregados() 
+    indice_pagos = crear_indice_pagos() 
+    series_historial = crear_tendencias() 
+
+    def hojas_desactualizadas(datos_cierre): 
+        for hoja in hojas_del_cierre(datos_cierre).values(): 
+            cache_local.marcar_desactualizada(hoja) 
+
+    cola.iniciar(backend, al_enviar=hojas_desactualizadas) 
 except: 
     st.error("Error de conexion con Google Sheets") 
 
 # --- 2. CARGA DE DATOS MAESTROS --- 
-lista_proveedores = ["Pan Rustico", "Pan Fresh", "Dharma", "ValMaira", "Aprea", "CocaCola", "Grenn&Co", "Basile Walter", "Otro"] 
-lista_cajeros = ["Leandro", "Natalia", "Santiago"] 
-lista_empleados = ["Leandro", "Natalia", "Santiago", "Julieta", "Mariela", "Fernanda", "Brian", "Erika", "Oriana"] 
+# Cajeros, empleados, cajas y medios digitales salen de la sucursal elegida en el Bloque 1 
+sucursales = cargar_sucursales(st.secrets.get("sucursales")) 
 
-df_directorio = pd.DataFrame() 
+# Las tres hojas se piden a la vez y el formulario se dibuja sin esperarlas: 
+# solo el bloque de proveedores y el sidebar (que va al final) esperan su resultado 
+precarga = {} 
 if 'conn' in globals(): 
+    precarga = cache_local.precargar([HOJA_DIRECTORIO, HOJA_HISTORIAL, HOJA_CONSUMOS], completas=[HOJA_DIRECTORIO]) 
+
+def leer_directorio(espera=None): 
     try: 
-        df_directorio = conn.read(worksheet="Directorio", ttl=600) 
-        if not df_directorio.empty and "Proveedor" in df_directorio.columns: 
-            lista_proveedores = df_directorio["Proveedor"].dropna().unique().tolist() 
-            if "Otro" not in lista_proveedores: lista_proveedores.append("Otro") 
-    except: 
-        pass 
+        return precarga[HOJA_DIRECTORIO].result(timeout=espera) 
+    except Exception: 
+        return pd.DataFrame() 
+
+def lista_de_proveedores(espera=None): 
+    df_directorio = leer_directorio(espera) 
+    if df_directorio.empty or "Proveedor" not in df_directorio.columns: 
+        return PROVEEDORES_POR_DEFECTO 
+    lista_proveedores = df_directorio["Proveedor"].dropna().unique().tolist() 
+    if "Otro" not in lista_proveedores: lista_proveedores.append("Otro") 
+    return lista_proveedores 
 
 # --- SIDEBAR DE ANÁLISIS MENSUAL Y GLOSARIO ---
-with st.sidebar:
-    st.title("Analisis de Cierres")
+# Fragmento propio: cambiar de mes o abrir el glosario no vuelve a correr el formulario
+@st.fragment
+def sidebar_analisis():
+    with tiempos.medir("Sidebar - Analisis mensual"):
+        st.title("Analisis de Cierres")
     
-    if 'conn' in globals():
-        try:
-            df_historial = conn.read(worksheet="Historial", ttl=600)
-            
+        if 'conn' in globals():
             try:
-                df_empleados_bd = conn.read(worksheet="Consumo_Empleados", ttl=600)
-            except:
-                df_empleados_bd = pd.DataFrame() 
-
-            if not df_historial.empty and "Fecha" in df_historial.columns:
-                df_historial["Fecha_dt"] = pd.to_datetime(df_historial["Fecha"], format="%d/%m/%Y", errors="coerce")
-                df_historial["Mes_Año"] = df_historial["Fecha_dt"].dt.strftime("%m/%Y")
-                df_historial = df_historial.dropna(subset=["Fecha_dt"])
-                
-                meses_disponibles = df_historial["Mes_Año"].unique().tolist()
-                meses_disponibles.sort(reverse=True)
-                
+                agregados.actualizar_indice(cache_local)
+                vista = None
+                if len(sucursales) > 1:
+                    vista = st.selectbox("Sucursal", [None] + list(sucursales), key="vista_sucursal",
+                                         format_func=lambda s: "Todas las sucursales" if s is None else sucursales[s]["nombre"])
+                meses_disponibles = agregados.meses_disponibles(vista)
+
                 if meses_disponibles:
                     mes_seleccionado = st.selectbox("Seleccionar Mes", meses_disponibles)
-                    
-                    df_mes = df_historial[df_historial["Mes_Año"] == mes_seleccionado].copy()
-                    
-                    df_mes["Digital"] = pd.to_numeric(df_mes["Digital"], errors="coerce").fillna(0)
-                    df_mes["Efectivo"] = pd.to_numeric(df_mes["Efectivo"], errors="coerce").fillna(0)
-                    
-                    tot_digital = df_mes["Digital"].sum()
-                    tot_efectivo = df_mes["Efectivo"].sum()
-                    
+
+                    # Solo se leen las particiones del mes elegido (de una sucursal o de todas)
+                    with tiempos.medir("Sidebar - Agregados") as medida:
+                        agregados.actualizar(cache_local, mes_seleccionado, vista)
+                        medida["filas"] = sum(ag.filas_historial for ag in agregados.particiones.values())
+
+                    resumen_mes = agregados.resumen(mes_seleccionado, vista)
+                    tot_digital = resumen_mes["Digital"]
+                    tot_efectivo = resumen_mes["Efectivo"]
+                
                     st.markdown("---")
                     st.subheader(f"Resumen {mes_seleccionado}")
-                    
+                
                     st.markdown("**Proporcion: Efectivo vs Digital**")
                     if tot_digital > 0 or tot_efectivo > 0:
-                        df_pie = pd.DataFrame({
-                            "Metodo": ["Efectivo", "Digital"],
-                            "Monto": [tot_efectivo, tot_digital]
-                        })
-                        fig = px.pie(df_pie, values='Monto', names='Metodo', hole=0.3)
-                        fig.update_traces(textinfo='percent', textposition='inside', hoverinfo='label+percent')
-                        fig.update_layout(showlegend=True, margin=dict(t=10, b=10, l=10, r=10), height=300, 
-                                          legend=dict(orientation="h", yanchor="bottom", y=-0.2, xanchor="center", x=0.5))
-                        st.plotly_chart(fig, use_container_width=True)
+                        # El JSON de la torta se cachea por totales: cambiar de mes y volver no la rearma
+                        st.plotly_chart(json.loads(tendencias.torta_medios(tot_efectivo, tot_digital)), use_container_width=True)
                     else:
                         st.info("No hay ingresos registrados este mes.")
-                    
+                
                     st.markdown("---")
-                    
+                
                     st.markdown("**Mercaderia por Empleado**")
-                    if not df_empleados_bd.empty and "Fecha" in df_empleados_bd.columns:
-                        df_empleados_bd["Fecha_dt"] = pd.to_datetime(df_empleados_bd["Fecha"], format="%d/%m/%Y", errors="coerce")
-                        df_empleados_bd["Mes_Año"] = df_empleados_bd["Fecha_dt"].dt.strftime("%m/%Y")
-                        
-                        df_emp_mes = df_empleados_bd[df_empleados_bd["Mes_Año"] == mes_seleccionado].copy()
-                        
-                        if not df_emp_mes.empty:
-                            df_emp_mes["Monto"] = pd.to_numeric(df_emp_mes["Monto"], errors="coerce").fillna(0)
-                            consumo_agrupado = df_emp_mes.groupby("Empleado")["Monto"].sum().reset_index()
-                            consumo_agrupado = consumo_agrupado[consumo_agrupado["Monto"] > 0].sort_values(by="Monto", ascending=False)
-                            
-                            if not consumo_agrupado.empty:
-                                for _, row in consumo_agrupado.iterrows():
-                                    st.write(f"**{row['Empleado']}**: ${row['Monto']:,.2f}")
-                            else:
-                                st.caption("Nadie retiro mercaderia este mes.")
+                    if agregados.hay_consumos(mes_seleccionado, vista):
+                        consumo_agrupado = agregados.consumo_por_empleado(mes_seleccionado, vista)
+                        if consumo_agrupado:
+                            for empleado, monto in consumo_agrupado:
+                                st.write(f"**{empleado}**: ${monto:,.2f}")
                         else:
-                            st.caption("No hay registros de mercaderia en este mes.")
+                            st.caption("Nadie retiro mercaderia este mes.")
                     else:
-                        st.caption("No se encontro la tabla de Consumo_Empleados en Drive.")
+                        st.caption("No hay registros de mercaderia en este mes.")
 
                     st.markdown("---")
-                    st.caption(f"Basado en {len(df_mes)} cierres de caja.")
-                    
+                    st.caption(f"Basado en {resumen_mes['Cierres']} cierres de caja.")
                 else:
-                    st.info("No hay fechas registradas con el formato correcto.")
-            else:
-                st.info("El historial esta vacio.")
-        except Exception as e:
-            st.error(f"Error cargando el analisis: {e}")
-
-    # --- 3. GLOSARIO DE PROVEEDORES EN POPOVER ---
-    st.markdown("---")
-    with st.popover("Ver Glosario de Proveedores"):
-        if not df_directorio.empty:
-            columnas_deseadas = ["Proveedor", "Razon Social", "CUIT", "Alias/CBU", "Telefono"]
-            columnas_disponibles = [col for col in columnas_deseadas if col in df_directorio.columns]
+                    st.info("El historial esta vacio.")
+            except Exception as e:
+                st.error(f"Error cargando el analisis: {e}")
+
+        # --- 3. GLOSARIO DE PROVEEDORES EN POPOVER ---
+        st.markdown("---")
+        with st.popover("Ver Glosario de Proveedores"):
+            df_directorio = leer_directorio()
+            if not df_directorio.empty:
+                columnas_deseadas = ["Proveedor", "Razon Social", "CUIT", "Alias/CBU", "Telefono"]
+                columnas_disponibles = [col for col in columnas_deseadas if col in df_directorio.columns]
             
-            if columnas_disponibles:
-                st.dataframe(df_directorio[columnas_disponibles], hide_index=True, use_container_width=True)
+                if columnas_disponibles:
+                    st.dataframe(df_directorio[columnas_disponibles], hide_index=True, use_container_width=True)
+                else:
+                    st.dataframe(df_directorio, hide_index=True, use_container_width=True)
             else:
-                st.dataframe(df_directorio, hide_index=True, use_container_width=True)
-        else:
-            st.caption("No se encontraron datos de proveedores.")
+                st.caption("No se encontraron datos de proveedores.")
+
+        # --- 4. PAGOS A PROVEEDORES ---
+        # Lee el indice por (Proveedor, mes) y por Nro Factura; solo se procesan los pagos nuevos
+        with st.popover("Ver Pagos a Proveedores"):
+            if 'conn' in globals():
+                try:
+                    with tiempos.medir("Sidebar - Pagos a proveedores") as medida:
+                        indice_pagos.actualizar(cache_local)
+                        medida["filas"] = indice_pagos.filas_procesadas()
+                    meses_pagos = indice_pagos.meses_disponibles()
+                    if meses_pagos:
+                        mes_pagos = st.selectbox("Mes", meses_pagos, key="mes_pagos")
+                        gasto = indice_pagos.gasto_del_mes(mes_pagos)
+                        c_pag1, c_pag2 = st.columns(2)
+                        c_pag1.metric("Efectivo", f"${gasto['Efectivo'].sum():,.2f}")
+                        c_pag2.metric("Digital / Banco", f"${gasto['Digital / Banco'].sum():,.2f}")
+                        st.dataframe(gasto, hide_index=True, use_container_width=True)
+
+                        proveedor = st.selectbox("Evolucion de un proveedor", gasto["Proveedor"], key="proveedor_pagos")
+                        st.bar_chart(indice_pagos.gasto_mensual(proveedor), x="Mes", y=["Efectivo", "Digital / Banco"])
+
+                        factura = st.text_input("Buscar Nro Factura", key="buscar_factura")
+                        if factura:
+                            encontrada = indice_pagos.buscar_factura(factura)
+                            if encontrada.empty:
+                                st.caption("No hay pagos con esa factura.")
+                            else:
+                                st.dataframe(encontrada, hide_index=True, use_container_width=True)
+
+                        duplicadas = indice_pagos.facturas_duplicadas()
+                        if not duplicadas.empty:
+                            st.warning(f"{len(duplicadas[['Proveedor', 'Factura']].drop_duplicates())} facturas pagadas mas de una vez al mismo proveedor")
+                            st.dataframe(duplicadas, hide_index=True, use_container_width=True)
+                    else:
+                        st.caption("Todavia no hay pagos a proveedores registrados.")
+                except Exception as e:
+                    st.error(f"Error cargando los pagos: {e}")
+
+        # --- 5. EXPORTAR E IMPORTAR CIERRES ---
+        # La exportacion lee y escribe de a bloques (exportacion.py); la importacion valida con
+        # las reglas de la app y escribe muchos cierres por pedido (importacion.py)
+        with st.popover("Exportar / Importar Cierres"):
+            if 'conn' in globals():
+                st.markdown("**Exportar**")
+                c_exp1, c_exp2 = st.columns(2)
+                exp_desde = c_exp1.date_input("Desde", None, format="DD/MM/YYYY", key="exportar_desde")
+                exp_hasta = c_exp2.date_input("Hasta", None, format="DD/MM/YYYY", key="exportar_hasta")
+                formato = st.selectbox("Formato", FORMATOS, key="exportar_formato")
+                if st.button("Preparar archivo", use_container_width=True):
+                    try:
+                        with tiempos.medir("Exportar cierres") as medida:
+                            desde = pd.Timestamp(exp_desde) if exp_desde else None
+                            hasta = pd.Timestamp(exp_hasta) if exp_hasta else None
+                            st.session_state.exportacion = exportar_archivo(backend, formato, desde, hasta)
+                            medida["filas"] = sum(st.session_state.exportacion[2].values())
+                    except Exception as e:
+                        st.error(f"Error exportando: {e}")
+                if "exportacion" in st.session_state:
+                    nombre, contenido, filas = st.session_state.exportacion
+                    st.caption(", ".join(f"{hoja}: {cantidad} filas" for hoja, cantidad in filas.items()))
+                    st.download_button("Descargar", contenido, nombre, use_container_width=True)
+
+                st.markdown("---")
+                st.markdown("**Importar**")
+                archivo = st.file_uploader("Planilla .xlsx con Historial, Pagos_Proveedores y Consumo_Empleados", type=["xlsx"], key="importar_archivo")
+                if archivo is not None:
+                    # La validacion se hace una vez por archivo subido
+                    if st.session_state.get("importacion", (None,))[0] != archivo.file_id:
+                        with tiempos.medir("Validar importacion"):
+                            st.session_state.importacion = (archivo.file_id, *validar_cierres(leer_origen(archivo), lista_de_proveedores()))
+                    _, validas, errores = st.session_state.importacion
+                    st.caption(f"{len(validas[HOJA_HISTORIAL])} cierres validos, {len(errores)} filas con errores")
+                    if not errores.empty:
+                        st.dataframe(errores, hide_index=True, use_container_width=True)
+                    if len(validas[HOJA_HISTORIAL]) and st.button("Importar cierres validos", use_container_width=True):
+                        try:
+                            barra = st.progress(0.0)
+                            with tiempos.medir("Importar cierres") as medida:
+                                resultado = importar_cierres(backend, validas, progreso=lambda hechos, total: barra.progress(hechos / total))
+                                medida["filas"] = resultado["importados"]
+                            for hoja in resultado["hojas"]:
+                                cache_local.marcar_desactualizada(hoja)
+                            st.success(f"{resultado['importados']} cierres importados ({resultado['existentes']} ya estaban guardados)")
+                        except Exception as e:
+                            st.error(f"Error importando: {e}")
         
-    st.markdown("---")
-    if st.button("Actualizar Datos"):
-        st.cache_data.clear()
-        st.rerun()
+        st.markdown("---")
+        if st.button("Actualizar Datos") and 'conn' in globals():
+            # Descarta las copias locales y baja todo de nuevo: toma tambien las filas editadas a mano
+            # en la planilla (las borradas ya se detectan solas al sincronizar)
+            hojas = cache_local.hojas()
+            for hoja in [HOJA_DIRECTORIO, HOJA_HISTORIAL, HOJA_CONSUMOS, HOJA_PAGOS, *particiones(hojas, HOJA_HISTORIAL).values(), *particiones(hojas, HOJA_CONSUMOS).values(), *particiones(hojas, HOJA_PAGOS).values()]:
+                cache_local.invalidar(hoja)
+            st.rerun()
 
 # --- 3. VARIABLES DE SESIÓN --- 
-session_keys = { 
-    'df_salidas': ["Descripción", "Monto"], 
-    'df_transferencias': ["Monto"], 
-    'df_vales': ["Descripción", "Monto"], 
-    'df_errores': ["Monto"], 
-    'df_descuentos': ["Monto"], 
-    'df_proveedores': ["Proveedor", "Forma Pago", "Nro Factura", "Monto"], 
-    'df_empleados': ["Empleado", "Ticket", "Monto"]
-} 
-
-for key, cols in session_keys.items(): 
-    if key not in st.session_state: 
-        st.session_state[key] = pd.DataFrame(columns=cols) 
+# Las tablas del cierre viven en EstadoCaja como columnas compactas (estado_caja.py); 
+# los editores arrancan de una plantilla vacia compartida 
+if "invalidos_descuento" not in st.session_state: 
+    st.session_state.invalidos_descuento = [] 
+    st.session_state.csv_importados = set() 
+
+if "estado_caja" not in st.session_state: 
+    st.session_state.estado_caja = EstadoCaja() 
+estado = st.session_state.estado_caja 
 
 # --- 4. FUNCIONES DE GUARDADO --- 
 def guardar_todo_en_nube(datos_cierre, df_provs, df_empls): 
+    # Solo escribe en la cola local; el envio a Drive corre en segundo plano (cola_envios.py) 
     try: 
-        df_historial = conn.read(worksheet="Historial") 
-        fila_cierre = pd.DataFrame([datos_cierre]) 
-        df_historial_upd = pd.concat([df_historial, fila_cierre], ignore_index=True).fillna("") 
-        conn.update(worksheet="Historial", data=df_historial_upd) 
-         
-        pagos_reales = df_provs[df_provs["Monto"] > 0].copy() 
-        if not pagos_reales.empty: 
-            pagos_reales["Fecha"] = datos_cierre["Fecha"] 
-            pagos_reales["Cajero"] = datos_cierre["Cajero"] 
-            df_pagos_ant = conn.read(worksheet="Pagos_Proveedores") 
-            df_pagos_upd = pd.concat([df_pagos_ant, pagos_reales], ignore_index=True).fillna("") 
-            conn.update(worksheet="Pagos_Proveedores", data=df_pagos_upd) 
-
-        consumos_empl = df_empls[df_empls["Monto"] > 0].copy() 
-        if not consumos_empl.empty: 
-            consumos_empl["Fecha"] = datos_cierre["Fecha"] 
-            consumos_empl = consumos_empl[["Fecha", "Empleado", "Monto"]] 
-            df_empl_ant = conn.read(worksheet="Consumo_Empleados") 
-            df_empl_upd = pd.concat([df_empl_ant, consumos_empl], ignore_index=True).fillna("") 
-            conn.update(worksheet="Consumo_Empleados", data=df_empl_upd) 
-             
-        st.cache_data.clear()
+        if not cola.encolar(datos_cierre, df_provs, df_empls): 
+            st.warning(f"El cierre del {datos_cierre['Fecha']} de {datos_cierre['Cajero']} ya estaba guardado") 
+            return False 
         return True 
     except Exception as e: 
-        st.error(f"Error guardando en nube: {e}") 
+        st.error(f"Error guardando el cierre: {e}") 
         return False 
 
-# --- 5. FUNCIÓN PDF --- 
-def generar_pdf_profesional(fecha, cajero, balanza, registradora, total_digital, efectivo_neto,  
-                            df_salidas, df_transferencias, df_errores, df_vales, df_descuentos,  
-                            df_proveedores, df_empleados, diferencia, desglose_digital): 
-    pdf = FPDF() 
-    pdf.add_page() 
-    pdf.set_margins(15, 15, 15) 
-     
-    if os.path.exists("logo.png"): 
-        try: pdf.image("logo.png", 15, 10, 30) 
-        except: pass  
-
-    dias_semana = ["Lunes", "Martes", "Miercoles", "Jueves", "Viernes", "Sabado", "Domingo"] 
-    fecha_texto = f"{dias_semana[fecha.weekday()]} {fecha.strftime('%d/%m/%Y')}" 
-
-    pdf.set_xy(50, 12); pdf.set_font("Arial", 'B', 18); pdf.cell(0, 10, "ESTANCIA SAN FRANCISCO", ln=1) 
-    pdf.set_xy(50, 20); pdf.set_font("Arial", '', 12); pdf.cell(0, 8, "Reporte de Cierre de Caja", ln=1) 
-    pdf.set_xy(130, 12); pdf.set_font("Arial", 'B', 10); pdf.cell(60, 6, f"FECHA: {fecha_texto}", ln=1, align='R') 
-    pdf.set_x(130); pdf.cell(60, 6, f"CAJERO: {cajero}", ln=1, align='R') 
-    pdf.ln(15); pdf.line(15, pdf.get_y(), 195, pdf.get_y()); pdf.ln(3) 
-
-    def dibujar_kpi(titulo, monto): 
-        pdf.set_fill_color(240, 240, 240); pdf.set_font("Arial", 'B', 12) 
-        pdf.cell(0, 10, f"{titulo}: $ {monto:,.2f}", ln=1, align='C', fill=True, border=1) 
-        pdf.ln(2)  
-
-    dibujar_kpi("1. BALANZA", balanza) 
-    dibujar_kpi("2. EFECTIVO", efectivo_neto) 
-    dibujar_kpi("3. DIGITAL", total_digital) 
-    
-    # --- PROPORCION VS DIGITAL Y EFECTIVO (Ahora arriba) ---
-    total_ingresos = efectivo_neto + total_digital
-    if total_ingresos > 0:
-        pct_efec = (efectivo_neto / total_ingresos) * 100
-        pct_dig = (total_digital / total_ingresos) * 100
-        pdf.set_font("Arial", 'B', 10)
-        pdf.set_text_color(100, 100, 100) # Gris oscuro
-        pdf.cell(0, 6, f"PROPORCION: Efectivo {pct_efec:.1f}% vs Digital {pct_dig:.1f}%", ln=1, align='C')
-        pdf.set_text_color(0, 0, 0) # Volver al color negro normal
-        pdf.ln(2)
-
-    # --- DESGLOSE DIGITAL (Ahora abajo) ---
-    if desglose_digital:
-        pdf.set_font("Arial", '', 9)
-        for pos_nombre, pos_monto in desglose_digital.items():
-            if pos_monto > 0:
-                pdf.cell(130, 5, f"      - {pos_nombre}"); pdf.cell(40, 5, f"$ {pos_monto:,.2f}", align='R', ln=1)
-        pdf.ln(2)
-     
-    pdf.ln(2); pdf.set_font("Arial", '', 10) 
-    pdf.cell(0, 6, f"Ticket Fiscal (Z): $ {registradora:,.2f}", border=0, align='C', ln=1) 
-    pdf.ln(5) 
-
-    def dibujar_tabla(titulo, df, label_fijo=None): 
-        if df.empty or df['Monto'].sum() == 0: return 
-        pdf.set_font("Arial", 'B', 10); pdf.set_fill_color(240, 240, 240) 
-        pdf.cell(180, 6, f"  {titulo} (Total: $ {df['Monto'].sum():,.2f})", ln=1, fill=True); pdf.set_font("Arial", '', 9) 
-        for _, row in df.iterrows(): 
-            if row['Monto'] > 0: 
-                if 'Proveedor' in df.columns:
-                    txt = f"{row['Proveedor']} ({row['Forma Pago']})"
-                else:
-                    txt = str(row.get('Descripción', row.get('Empleado', label_fijo))) 
-                
-                pdf.cell(130, 5, f"      - {txt}"); pdf.cell(40, 5, f"$ {row['Monto']:,.2f}", align='R', ln=1) 
-        pdf.ln(2) 
-
-    dibujar_tabla("PAGO A PROVEEDORES", df_proveedores) 
-    dibujar_tabla("MERCADERIA EMPLEADOS", df_empleados) 
-    
-    if not df_transferencias.empty and df_transferencias['Monto'].sum() > 0:
-        total_transf_acumulado = df_transferencias['Monto'].sum()
-        df_transf_resumida = pd.DataFrame([{"Descripción": "Total transferencias entrantes", "Monto": total_transf_acumulado}])
-        dibujar_tabla("TRANSFERENCIAS", df_transf_resumida)
-        
-    dibujar_tabla("SALIDA DE CAJA", df_salidas) 
-    dibujar_tabla("VALES", df_vales) 
-    
-    if not df_errores.empty and df_errores['Monto'].sum() > 0:
-        total_err_acumulado = df_errores['Monto'].sum()
-        df_err_resumido = pd.DataFrame([{"Descripción": "Total errores registrados", "Monto": total_err_acumulado}])
-        dibujar_tabla("ERRORES", df_err_resumido) 
-        
-    if not df_descuentos.empty and df_descuentos['Monto'].sum() > 0:
-        total_desc = df_descuentos['Monto'].sum()
-        df_desc_resumido = pd.DataFrame([{"Descripción": "Total Somos Avellaneda", "Monto": total_desc}])
-        dibujar_tabla("SOMOS AVELLANEDA", df_desc_resumido)
-     
-    pdf.ln(5) 
-    estado, color_texto = ("FALTANTE", (200, 0, 0)) if diferencia > 0 else ("SOBRANTE", (0, 100, 0)) 
-    if diferencia == 0: estado, color_texto = ("OK", (0, 0, 0)) 
-    pdf.set_font("Arial", 'B', 16); pdf.set_text_color(*color_texto) 
-    pdf.cell(0, 14, f"CAJA REAL: $ {diferencia:,.2f} ({estado})", ln=1, align='C', border=1) 
-     
-    return pdf.output(dest="S").encode("latin-1") 
+@st.fragment(run_every=5) 
+def estado_envios(): 
+    envios = cola.estado() 
+    fallidos = envios["fallidos"] 
+    if not fallidos.empty: 
+        st.warning(f"{len(fallidos)} cierre(s) no se pudieron enviar a Drive despues de varios intentos") 
+        st.dataframe(fallidos, hide_index=True, use_container_width=True) 
+        st.button("Reintentar envio", key="reintentar_fallidos", on_click=cola.reintentar_fallidos) 
+    if envios["pendientes"] == 0: 
+        st.caption(f"Sincronizado con Drive ({envios['enviados']} cierres enviados)") 
+        return 
+    detalle = "sin conexion con Google Sheets" if not envios["conectado"] else envios["error"] or "enviando" 
+    st.caption(f"{envios['pendientes']} cierre(s) pendientes de enviar a Drive: {detalle}") 
 
 # --- 6. INTERFAZ UI --- 
-def input_tabla(titulo, key, solo_monto=False): 
+def refrescar(bloque): 
+    # Solo se vuelven a correr el bloque editado y la Caja Real, no la app completa 
+    fragmentos = [bloque, "caja_real"] 
+    if modo_diagnostico: fragmentos.append("diagnostico") 
+    st.rerun(fragmentos) 
+
+def al_editar(key, bloque): 
+    # El total de la tabla se recalcula una sola vez, a partir de las ediciones del editor 
+    estado.cargar_tabla(key, st.session_state[f"ed_{key}"]) 
+    refrescar(bloque) 
+
+def input_tabla(titulo, key, bloque, solo_monto=False): 
     st.markdown(f"**{titulo}**") 
     cfg = {"Monto": st.column_config.NumberColumn("($)", format="$%.2f", min_value=0.0, step=0.01)} 
     if not solo_monto: cfg["Descripción"] = st.column_config.TextColumn("Detalle", required=True) 
 
-    df = st.data_editor(st.session_state[key], column_config=cfg, num_rows="dynamic", use_container_width=True, key=f"ed_{key}", hide_index=True) 
-    
-    return df, (df["Monto"].sum() if not df.empty else 0.0) 
+    with tiempos.medir(f"Editor {key}") as medida: 
+        st.data_editor(PLANTILLAS[key], column_config=cfg, num_rows="dynamic", use_container_width=True, key=f"ed_{key}", hide_index=True, 
+                       on_change=al_editar, args=(key, bloque)) 
+        medida["filas"] = len(estado.tablas[key]) 
 
 separador_grueso = "<hr style='border: none; height: 4px; background-color: #555555; margin-top: 2rem; margin-bottom: 2rem;'/>"
 
 st.title("Estancia San Francisco") 
 
-# --- BLOQUE 1: FECHA Y CAJERO ---
+# --- BLOQUE 1: SUCURSAL, CAJA, FECHA Y CAJERO ---
+# Con una sola sucursal (o una sola caja) el selector no se muestra 
+col_suc1, col_suc2 = st.columns(2) 
+with col_suc1: 
+    id_sucursal = st.selectbox("Sucursal", list(sucursales), format_func=lambda s: sucursales[s]["nombre"]) if len(sucursales) > 1 else next(iter(sucursales)) 
+sucursal = sucursales[id_sucursal] 
+with col_suc2: 
+    caja = st.selectbox("Caja", sucursal["cajas"]) if len(sucursal["cajas"]) > 1 else sucursal["cajas"][0] 
+
 col_enc1, col_enc2 = st.columns(2) 
 with col_enc1: fecha_input = st.date_input("Fecha", datetime.today()) 
-with col_enc2: cajero = st.selectbox("Cajero de Turno", lista_cajeros) 
+with col_enc2: cajero = st.selectbox("Cajero de Turno", sucursal["cajeros"]) 
+estado.sucursal, estado.caja, estado.fecha, estado.cajero = id_sucursal, caja, fecha_input, cajero 
 
 st.markdown(separador_grueso, unsafe_allow_html=True) 
 
 # --- BLOQUE 2: SOMOS AVELLANEDA ---
-df_descuentos, total_descuentos = input_tabla("Somos Avellaneda", "df_descuentos", solo_monto=True) 
+def importar_descuentos(): 
+    # Los tickets pegados o del CSV quedan en un array aparte: el editor sigue liviano aunque sean miles 
+    montos, invalidos = parsear_montos(st.session_state.get("pegado_descuentos", "")) 
+    archivo = st.session_state.get("csv_descuentos") 
+    if archivo is not None and archivo.file_id not in st.session_state.csv_importados: 
+        montos_csv, invalidos_csv = leer_montos_csv(archivo) 
+        montos, invalidos = np.concatenate([montos, montos_csv]), invalidos + invalidos_csv 
+        st.session_state.csv_importados.add(archivo.file_id) 
+    estado.agregar_tickets(montos) 
+    st.session_state.invalidos_descuento = invalidos 
+    st.session_state.pegado_descuentos = "" 
+    refrescar("bloque_descuentos") 
+
+def quitar_importados(): 
+    estado.quitar_tickets() 
+    st.session_state.invalidos_descuento = [] 
+    refrescar("bloque_descuentos") 
+
+@st.fragment(key="bloque_descuentos") 
+def bloque_descuentos(): 
+    with tiempos.medir("Bloque 2 - Somos Avellaneda"): 
+        input_tabla("Somos Avellaneda", "df_descuentos", "bloque_descuentos", solo_monto=True) 
+
+        importados = estado.tickets_descuento 
+        with st.expander(f"Carga masiva de tickets ({importados.size} importados)", expanded=False): 
+            st.text_area("Pegar montos (uno por linea)", key="pegado_descuentos", height=120) 
+            st.file_uploader("o subir un CSV", type=["csv", "txt"], key="csv_descuentos") 
+            c_imp1, c_imp2 = st.columns(2) 
+            c_imp1.button("Agregar tickets", on_click=importar_descuentos, use_container_width=True) 
+            c_imp2.button("Quitar importados", on_click=quitar_importados, use_container_width=True, disabled=importados.size == 0) 
+            if st.session_state.invalidos_descuento: 
+                st.warning(f"Se ignoraron {len(st.session_state.invalidos_descuento)} valores: {', '.join(st.session_state.invalidos_descuento[:10])}") 
+        if importados.size: 
+            st.caption(f"{importados.size} tickets importados: ${importados.sum():,.2f}") 
+
+bloque_descuentos() 
 
 st.markdown(separador_grueso, unsafe_allow_html=True) 
 
 # --- BLOQUE 3: VALES ---
-df_vales, total_vales = input_tabla("Vales", "df_vales") 
+@st.fragment(key="bloque_vales") 
+def bloque_vales(): 
+    with tiempos.medir("Bloque 3 - Vales"): 
+        input_tabla("Vales", "df_vales", "bloque_vales") 
+
+bloque_vales() 
 
 st.markdown(separador_grueso, unsafe_allow_html=True) 
 
 # --- BLOQUE 4: TRANSFERENCIAS ---
-df_transferencias, total_transf_in = input_tabla("Transferencias", "df_transferencias", solo_monto=True) 
+@st.fragment(key="bloque_transferencias") 
+def bloque_transferencias(): 
+    with tiempos.medir("Bloque 4 - Transferencias"): 
+        input_tabla("Transferencias", "df_transferencias", "bloque_transferencias", solo_monto=True) 
+
+bloque_transferencias() 
 
 st.markdown(separador_grueso, unsafe_allow_html=True) 
 
 # --- BLOQUE 5: REGISTRADORA, BALANZA Y EFECTIVO ---
-registradora_total = st.number_input("Registradora (Z)", 0.0, step=100.0, format="%.2f") 
-balanza_total = st.number_input("Balanza", 0.0, step=100.0, format="%.2f") 
+@st.fragment(key="bloque_efectivo") 
+def bloque_efectivo(): 
+    with tiempos.medir("Bloque 5 - Registradora, Balanza y Efectivo"): 
+        al_cambiar = dict(on_change=refrescar, args=("bloque_efectivo",)) 
+        registradora_total = st.number_input("Registradora (Z)", 0.0, step=100.0, format="%.2f", **al_cambiar) 
+        balanza_total = st.number_input("Balanza", 0.0, step=100.0, format="%.2f", **al_cambiar) 
+
+        with st.expander("Calculadora de Billetes", expanded=False): 
+            b20k = st.number_input("$20k", 0, **al_cambiar); b10k = st.number_input("$10k", 0, **al_cambiar) 
+            b2k = st.number_input("$2k", 0, **al_cambiar); b1k = st.number_input("$1k", 0, **al_cambiar) 
+            total_fisico = (b20k*20000)+(b10k*10000)+(b2k*2000)+(b1k*1000) 
 
-with st.expander("Calculadora de Billetes", expanded=False): 
-    b20k = st.number_input("$20k", 0); b10k = st.number_input("$10k", 0) 
-    b2k = st.number_input("$2k", 0); b1k = st.number_input("$1k", 0) 
-    total_fisico = (b20k*20000)+(b10k*10000)+(b2k*2000)+(b1k*1000) 
+        efectivo_neto = st.number_input("Efectivo", value=float(total_fisico), format="%.2f", **al_cambiar) 
 
-efectivo_neto = st.number_input("Efectivo", value=float(total_fisico), format="%.2f") 
+        estado.fijar("registradora", registradora_total) 
+        estado.fijar("balanza", balanza_total) 
+        estado.fijar("efectivo", efectivo_neto) 
+
+bloque_efectivo() 
 
 st.markdown(separador_grueso, unsafe_allow_html=True) 
 
 # --- BLOQUE 6: COBROS DIGITALES Y TOTAL ---
-mp = st.number_input("Mercado Pago", 0.0, format="%.2f")
-nave = st.number_input("Nave", 0.0, format="%.2f")
-clover = st.number_input("Clover", 0.0, format="%.2f")
-bbva = st.number_input("BBVA", 0.0, format="%.2f")
+@st.fragment(key="bloque_digital") 
+def bloque_digital(): 
+    with tiempos.medir("Bloque 6 - Cobros Digitales"): 
+        al_cambiar = dict(on_change=refrescar, args=("bloque_digital",)) 
+        desglose = {medio: st.number_input(medio, 0.0, format="%.2f", **al_cambiar) for medio in sucursal["medios_digitales"]} 
+
+        total_digital = sum(desglose.values()) 
+        st.info(f"**Total Digital: ${total_digital:,.2f}**")
+
+        estado.desglose_digital = desglose 
+        estado.fijar("digital", total_digital) 
 
-total_digital = mp + nave + clover + bbva 
-st.info(f"**Total Digital: ${total_digital:,.2f}**")
+bloque_digital() 
 
 st.markdown(separador_grueso, unsafe_allow_html=True) 
 
 # --- BLOQUE 7: ERRORES Y SALIDAS ---
-df_errores, total_errores = input_tabla("Errores", "df_errores", solo_monto=True) 
-df_salidas, total_salidas = input_tabla("Salida de Caja", "df_salidas") 
+@st.fragment(key="bloque_errores_salidas") 
+def bloque_errores_salidas(): 
+    with tiempos.medir("Bloque 7 - Errores y Salidas"): 
+        input_tabla("Errores", "df_errores", "bloque_errores_salidas", solo_monto=True) 
+        input_tabla("Salida de Caja", "df_salidas", "bloque_errores_salidas") 
+
+bloque_errores_salidas() 
 
 st.markdown(separador_grueso, unsafe_allow_html=True) 
 
-# --- BLOQUE 8: MERCADERÍA, PROVEEDORES Y CAJA REAL ---
-st.markdown("**Mercaderia de Empleados**") 
-cfg_emp = { 
-    "Empleado": st.column_config.SelectboxColumn("Empleado", options=lista_empleados, required=True), 
-    "Ticket": st.column_config.SelectboxColumn("Tipo", options=["Con Ticket", "Sin Ticket"], required=True),
-    "Monto": st.column_config.NumberColumn("Monto ($)", format="$%.2f", min_value=0.0, step=0.01) 
-} 
-df_empleados = st.data_editor(st.session_state.df_empleados, column_config=cfg_emp, num_rows="dynamic", use_container_width=True, key="ed_emp", hide_index=True) 
-
-if not df_empleados.empty and "Ticket" in df_empleados.columns:
-    total_empleados = df_empleados[df_empleados["Ticket"] == "Con Ticket"]["Monto"].sum()
-else:
-    total_empleados = df_empleados["Monto"].sum() if not df_empleados.empty else 0.0
-
-st.markdown("**Pago a Proveedores**") 
-cfg_prov = { 
-    "Proveedor": st.column_config.SelectboxColumn("Proveedor", options=lista_proveedores, required=True), 
-    "Forma Pago": st.column_config.SelectboxColumn("Metodo", options=["Efectivo", "Digital / Banco"], required=True), 
-    "Monto": st.column_config.NumberColumn("Monto ($)", format="$%.2f", min_value=0.0, step=0.01) 
-} 
-df_proveedores = st.data_editor(st.session_state.df_proveedores, column_config=cfg_prov, num_rows="dynamic", use_container_width=True, key="ed_prov", hide_index=True) 
-total_prov_efectivo = df_proveedores[df_proveedores["Forma Pago"] == "Efectivo"]["Monto"].sum() 
+# --- BLOQUE 8: MERCADERÍA Y PROVEEDORES ---
+@st.fragment(key="bloque_mercaderia_proveedores") 
+def bloque_mercaderia_proveedores(): 
+    with tiempos.medir("Bloque 8 - Mercaderia y Proveedores"): 
+        bloque = "bloque_mercaderia_proveedores" 
+        st.markdown("**Mercaderia de Empleados**") 
+        cfg_emp = { 
+            "Empleado": st.column_config.SelectboxColumn("Empleado", options=sucursal["empleados"], required=True), 
+            "Ticket": st.column_config.SelectboxColumn("Tipo", options=["Con Ticket", "Sin Ticket"], required=True),
+            "Monto": st.column_config.NumberColumn("Monto ($)", format="$%.2f", min_value=0.0, step=0.01) 
+        } 
+        st.data_editor(PLANTILLAS["df_empleados"], column_config=cfg_emp, num_rows="dynamic", use_container_width=True, key="ed_df_empleados", hide_index=True, 
+                       on_change=al_editar, args=("df_empleados", bloque)) 
+
+        st.markdown("**Pago a Proveedores**") 
+        cfg_prov = { 
+            "Proveedor": st.column_config.SelectboxColumn("Proveedor", options=lista_de_proveedores(espera=2), required=True), 
+            "Forma Pago": st.column_config.SelectboxColumn("Metodo", options=["Efectivo", "Digital / Banco"], required=True), 
+            "Monto": st.column_config.NumberColumn("Monto ($)", format="$%.2f", min_value=0.0, step=0.01) 
+        } 
+        st.data_editor(PLANTILLAS["df_proveedores"], column_config=cfg_prov, num_rows="dynamic", use_container_width=True, key="ed_df_proveedores", hide_index=True, 
+                       on_change=al_editar, args=("df_proveedores", bloque)) 
+
+bloque_mercaderia_proveedores() 
 
 # --- RESULTADO FINAL (CAJA REAL) --- 
-st.markdown("### Caja Real") 
-
-total_justificado = total_digital + efectivo_neto + total_transf_in + total_salidas + total_prov_efectivo + total_vales + total_empleados + total_errores + total_descuentos
-diferencia = balanza_total - total_justificado 
-
-c1, c2, c3 = st.columns(3) 
-c1.metric("Diferencia", f"${diferencia:,.2f}", delta_color="inverse" if diferencia > 0 else "normal") 
-
-if c2.button("Guardar en Drive", use_container_width=True): 
-    if diferencia == 0:
-        estado_caja = "OK"
-    elif diferencia > 0:
-        estado_caja = "FALTANTE"
-    else:
-        estado_caja = "SOBRANTE"
-
-    datos = { 
-        "Fecha": fecha_input.strftime("%d/%m/%Y"), 
-        "Cajero": cajero, 
-        "Balanza": balanza_total, 
-        "Digital": total_digital, 
-        "Efectivo": efectivo_neto, 
-        "Transferencias": total_transf_in,
-        "Salidas": total_salidas,
-        "Vales": total_vales,
-        "Errores": total_errores,
-        "Descuentos": total_descuentos, 
-        "Proveedores": total_prov_efectivo,
-        "Diferencia": diferencia,
-        "Estado": estado_caja
-    } 
-     
-    if guardar_todo_en_nube(datos, df_proveedores, df_empleados): 
-        st.toast("Cierre guardado correctamente")
-        st.success("Guardado exitoso") 
-
-if c3.button("Generar PDF", use_container_width=True): 
-    desglose = {"Mercado Pago": mp, "Nave": nave, "Clover": clover, "BBVA": bbva} 
-    pdf_bytes = generar_pdf_profesional(fecha_input, cajero, balanza_total, registradora_total,  
-                                        total_digital, efectivo_neto, df_salidas, df_transferencias,  
-                                        df_errores, df_vales, df_descuentos, df_proveedores,  
-                                        df_empleados, diferencia, desglose) 
-    st.download_button("Descargar PDF", pdf_bytes, f"Cierre_{fecha_input}.pdf", "application/pdf")
+@st.fragment(key="caja_real") 
+def caja_real(): 
+    with tiempos.medir("Caja Real"): 
+        st.markdown("### Caja Real") 
+
+        totales = estado.totales 
+        diferencia = estado.diferencia() 
+
+        c1, c2, c3 = st.columns(3) 
+        c1.metric("Diferencia", f"${diferencia:,.2f}", delta_color="inverse" if diferencia > 0 else "normal") 
+
+        if c2.button("Guardar en Drive", use_container_width=True): 
+            estado_caja = calculos.estado_caja(diferencia) 
+
+            datos = { 
+                "Fecha": estado.fecha.strftime("%d/%m/%Y"), 
+                "Sucursal": estado.sucursal, 
+                "Caja": estado.caja, 
+                "Cajero": estado.cajero, 
+                "Balanza": totales["balanza"], 
+                "Digital": totales["digital"], 
+                "Efectivo": totales["efectivo"], 
+                "Transferencias": totales["transferencias"],
+                "Salidas": totales["salidas"],
+                "Vales": totales["vales"],
+                "Errores": totales["errores"],
+                "Descuentos": totales["descuentos"], 
+                "Proveedores": totales["proveedores"],
+                "Empleados": totales["empleados"],
+                "Diferencia": diferencia,
+                "Estado": estado_caja,
+                **{columna_medio(medio): monto for medio, monto in estado.desglose_digital.items()},
+            } 
+             
+            with tiempos.medir("Guardar cierre"): 
+                guardado = guardar_todo_en_nube(datos, estado.tablas["df_proveedores"].a_dataframe(), estado.tablas["df_empleados"].a_dataframe()) 
+            if guardado: 
+                st.toast("Cierre guardado correctamente")
+                st.success("Guardado. Se envia a Drive en segundo plano") 
+
+        if c3.button("Generar PDF", use_container_width=True): 
+            tablas = estado.tablas 
+            with tiempos.medir("Generar PDF") as medida: 
+                pdf_bytes = generar_pdf_profesional(estado.fecha, estado.cajero, totales["balanza"], totales["registradora"],  
+                                                    totales["digital"], totales["efectivo"], tablas["df_salidas"], tablas["df_transferencias"],  
+                                                    tablas["df_errores"], tablas["df_vales"], estado.descuentos(), tablas["df_proveedores"],  
+                                                    tablas["df_empleados"], diferencia, estado.desglose_digital) 
+                medida["bytes"] = len(pdf_bytes) 
+            st.download_button("Descargar PDF", pdf_bytes, f"Cierre_{estado.sucursal}_{estado.caja}_{estado.fecha}.pdf", "application/pdf")
+
+caja_real() 
+estado_envios() 
+
+# El sidebar se dibuja al final para que el formulario no espere al Historial ni a los Consumos 
+with st.sidebar: 
+    sidebar_analisis() 
+
+# --- TENDENCIAS DE LARGO PLAZO --- 
+# Solo se calculan con el interruptor activado; los graficos salen de series diarias 
+# precalculadas y su JSON queda cacheado por rango, granularidad y sucursal (tendencias.py) 
+@st.fragment 
+def panel_tendencias(): 
+    if not st.toggle("Ver tendencias de largo plazo", key="ver_tendencias") or 'conn' not in globals(): 
+        return 
+    try: 
+        with tiempos.medir("Tendencias - Series") as medida: 
+            series_historial.actualizar(cache_local) 
+            medida["filas"] = len(series_historial.dias) 
+        if not series_historial.dias: 
+            st.info("El historial esta vacio.") 
+            return 
+
+        c_ten1, c_ten2, c_ten3 = st.columns(3) 
+        rango = c_ten1.selectbox("Rango", list(tendencias.RANGOS), index=2, key="rango_tendencias") 
+        vista = None 
+        if len(sucursales) > 1: 
+            vista = c_ten2.selectbox("Sucursal", [None] + list(sucursales), key="sucursal_tendencias", 
+                                     format_func=lambda s: "Todas las sucursales" if s is None else sucursales[s]["nombre"]) 
+        granularidad = c_ten3.selectbox("Granularidad", series_historial.granularidades(rango, vista), key="granularidad_tendencias") 
+
+        with tiempos.medir("Tendencias - Graficos"): 
+            titulos = { 
+                "diferencia": "Diferencia (positivo = faltante)", 
+                "mix": "Mix Efectivo vs Digital", 
+                "cajeros": "Faltantes y sobrantes por cajero", 
+                "medios": "Cobros digitales por medio", 
+            } 
+            columnas = st.columns(2) + st.columns(2) 
+            for columna, (grafico, titulo) in zip(columnas, titulos.items()): 
+                with columna: 
+                    st.markdown(f"**{titulo}**") 
+                    st.plotly_chart(series_historial.figura(grafico, rango, granularidad, vista), use_container_width=True) 
+    except Exception as e: 
+        st.error(f"Error cargando las tendencias: {e}") 
+
+st.markdown(separador_grueso, unsafe_allow_html=True) 
+panel_tendencias() 
+
+# --- PANEL DE DIAGNÓSTICO (?diagnostico=1) --- 
+tiempos.registrar("Corrida completa", time.perf_counter() - inicio_corrida) 
+
+if modo_diagnostico: 
+    @st.fragment(key="diagnostico") 
+    def panel_diagnostico(): 
+        with st.expander("Diagnostico de tiempos", expanded=True): 
+            st.markdown("**Esta sesion**") 
+            st.dataframe(tiempos.resumen(), hide_index=True, use_container_width=True) 
+            st.markdown("**Lecturas y escrituras a Google Sheets (todas las sesiones)**") 
+            st.dataframe(instrumentacion.eventos_sheets(), hide_index=True, use_container_width=True) 
+            st.markdown("**p50 / p95 de las ultimas sesiones**") 
+            st.dataframe(instrumentacion.percentiles(), hide_index=True, use_container_width=True) 
+            st.download_button("Exportar sesion (JSONL)", tiempos.exportar_jsonl(), f"diagnostico_{tiempos.sesion}.jsonl", "application/json") 
+
+    panel_diagnostico() 
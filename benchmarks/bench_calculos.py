@@ -0,0 +1,43 @@
+# Recalculo vectorizado de N cierres contra la formula aplicada cierre por cierre.
+# Uso: python -m benchmarks.bench_calculos
+import time
+
+import numpy as np
+import pandas as pd
+
+from calculos import COLUMNAS_JUSTIFICADAS, calcular_cierres
+
+TAMANIOS = [365, 3_650, 36_500]
+
+
+def historial_aleatorio(n, semilla=0):
+    rng = np.random.default_rng(semilla)
+    df = pd.DataFrame({col: rng.uniform(0, 50_000, n).round(2) for col in COLUMNAS_JUSTIFICADAS})
+    df["Balanza"] = df[COLUMNAS_JUSTIFICADAS].sum(axis=1) + rng.normal(0, 500, n).round(2)
+    return df
+
+
+def calcular_fila_por_fila(df):
+    diferencias = []
+    for _, fila in df.iterrows():
+        diferencias.append(fila["Balanza"] - sum(fila[col] for col in COLUMNAS_JUSTIFICADAS))
+    return diferencias
+
+
+def medir(funcion, df):
+    inicio = time.perf_counter()
+    funcion(df)
+    return (time.perf_counter() - inicio) * 1000
+
+
+def main():
+    print(f"{'cierres':>8} | {'vectorizado (ms)':>16} | {'fila por fila (ms)':>18}")
+    for n in TAMANIOS:
+        df = historial_aleatorio(n)
+        t_vector = medir(calcular_cierres, df)
+        t_filas = medir(calcular_fila_por_fila, df)
+        print(f"{n:>8} | {t_vector:>16.2f} | {t_filas:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
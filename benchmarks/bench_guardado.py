@@ -0,0 +1,67 @@
+# Tiempo de guardado de un cierre a medida que crece el historial.
+# Uso: python -m benchmarks.bench_guardado
+import itertools
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from almacenamiento import COLUMNA_ID, HOJA_HISTORIAL, BackendCSV, confirmar_cierre, filas_historial
+
+TAMANIOS = [100, 1_000, 10_000, 100_000]
+REPETICIONES = 20
+
+DATOS_CIERRE = {
+    "Fecha": "15/03/2025", "Cajero": "Natalia", "Balanza": 850000.0, "Digital": 410000.0,
+    "Efectivo": 380000.0, "Transferencias": 15000.0, "Salidas": 5000.0, "Vales": 0.0,
+    "Errores": 0.0, "Descuentos": 12000.0, "Proveedores": 28000.0, "Diferencia": 0.0, "Estado": "OK",
+}
+DF_PROVS = pd.DataFrame([{"Proveedor": "Dharma", "Forma Pago": "Efectivo", "Nro Factura": "A-0001", "Monto": 28000.0}])
+DF_EMPLS = pd.DataFrame([{"Empleado": "Brian", "Ticket": "Con Ticket", "Monto": 4500.0}])
+
+
+def sembrar_historial(backend, n):
+    df = pd.concat([filas_historial(DATOS_CIERRE)] * n, ignore_index=True)
+    df[COLUMNA_ID] = [f"historico|{i}" for i in range(n)]
+    df.to_csv(backend._ruta(HOJA_HISTORIAL), index=False)
+
+
+def guardar_reescribiendo(backend, datos_cierre):
+    # Estrategia anterior: leer la hoja completa, concatenar y volver a escribirla
+    df_historial = backend.leer(HOJA_HISTORIAL)
+    df_upd = pd.concat([df_historial, filas_historial(datos_cierre)], ignore_index=True).fillna("")
+    df_upd.to_csv(backend._ruta(HOJA_HISTORIAL), index=False)
+
+
+def guardar_nuevo(backend, contador):
+    # Cada guardado usa una clave distinta para que no lo frene la idempotencia
+    datos = dict(DATOS_CIERRE, Cajero=f"Cajero {next(contador)}")
+    confirmar_cierre(backend, datos, DF_PROVS, DF_EMPLS)
+
+
+def medir(funcion):
+    inicio = time.perf_counter()
+    for _ in range(REPETICIONES):
+        funcion()
+    return (time.perf_counter() - inicio) / REPETICIONES * 1000
+
+
+def main():
+    print(f"{'filas':>8} | {'append (ms)':>12} | {'reescritura (ms)':>16}")
+    for n in TAMANIOS:
+        with tempfile.TemporaryDirectory() as tmp:
+            backend = BackendCSV(os.path.join(tmp, "append"))
+            sembrar_historial(backend, n)
+            backend.claves_guardadas(HOJA_HISTORIAL)
+            contador = itertools.count()
+            t_append = medir(lambda: guardar_nuevo(backend, contador))
+
+            backend_viejo = BackendCSV(os.path.join(tmp, "reescritura"))
+            sembrar_historial(backend_viejo, n)
+            t_reescritura = medir(lambda: guardar_reescribiendo(backend_viejo, DATOS_CIERRE))
+        print(f"{n:>8} | {t_append:>12.2f} | {t_reescritura:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# Generacion del PDF con tablas de descuentos/proveedores/empleados de 1.000 filas.
+# Uso: python -m benchmarks.bench_pdf
+import datetime
+import time
+
+import numpy as np
+import pandas as pd
+
+from reporte_pdf import generar_pdf_profesional
+
+FILAS = 1_000
+REPETICIONES = 10
+
+
+def argumentos(semilla):
+    rng = np.random.default_rng(semilla)
+    montos = lambda: rng.uniform(100, 20_000, FILAS).round(2)
+    df_proveedores = pd.DataFrame({"Proveedor": rng.choice(["Dharma", "Aprea", "CocaCola"], FILAS),
+                                   "Forma Pago": "Efectivo", "Nro Factura": "", "Monto": montos()})
+    df_empleados = pd.DataFrame({"Empleado": rng.choice(["Brian", "Erika"], FILAS), "Ticket": "Con Ticket", "Monto": montos()})
+    df_salidas = pd.DataFrame({"Descripción": "Hielo", "Monto": montos()})
+    df_montos = pd.DataFrame({"Monto": montos()})
+    return (datetime.date(2025, 3, 15), "Natalia", 9e6, 9e6, 4e6, 4e6, df_salidas, df_montos, df_montos,
+            df_salidas, df_montos, df_proveedores, df_empleados, 0.0, {"Mercado Pago": 4e6})
+
+
+def medir(funcion):
+    inicio = time.perf_counter()
+    funcion()
+    return (time.perf_counter() - inicio) * 1000
+
+
+def main():
+    variantes = [argumentos(semilla) for semilla in range(REPETICIONES + 1)]
+
+    t_primera = medir(lambda: generar_pdf_profesional(*variantes[0]))
+    t_logo_cacheado = sum(medir(lambda: generar_pdf_profesional(*args)) for args in variantes[1:]) / REPETICIONES
+    t_cache = sum(medir(lambda: generar_pdf_profesional(*variantes[0])) for _ in range(REPETICIONES)) / REPETICIONES
+
+    print(f"primera generacion (logo sin decodificar): {t_primera:8.2f} ms")
+    print(f"datos nuevos con el logo ya decodificado:  {t_logo_cacheado:8.2f} ms")
+    print(f"mismo cierre (bytes cacheados):             {t_cache:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+# Throughput del modo por lotes (reportes por segundo) con 1 proceso y con uno por CPU.
+# Uso: python -m benchmarks.bench_reportes
+import os
+import time
+
+from benchmarks.datos_sinteticos import generar_hojas
+from reportes_lote import armar_trabajos, renderizar_todos
+
+CIERRES = 300
+
+
+def main():
+    trabajos, _ = armar_trabajos(generar_hojas(CIERRES))
+    for procesos in sorted({1, os.cpu_count() or 1}):
+        inicio = time.perf_counter()
+        total_bytes = sum(len(pdf) for _, pdf in renderizar_todos(trabajos, procesos))
+        duracion = time.perf_counter() - inicio
+        print(f"procesos={procesos:>2} | {len(trabajos) / duracion:7.1f} reportes/s | {total_bytes / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
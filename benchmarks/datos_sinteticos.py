@@ -0,0 +1,85 @@
+# Generador de anios de Historial / Pagos_Proveedores / Consumo_Empleados con forma realista:
+# ventas con estacionalidad (fines de semana, diciembre) e inflacion, varios cajeros por dia,
+# pagos a proveedores con numero de factura y mercaderia retirada por empleados.
+import numpy as np
+import pandas as pd
+
+import calculos
+from almacenamiento import COLUMNA_ID, HOJA_CONSUMOS, HOJA_HISTORIAL, HOJA_PAGOS
+from sucursales import MEDIOS_DIGITALES, columna_medio
+
+CAJEROS = ["Leandro", "Natalia", "Santiago"]
+EMPLEADOS = ["Leandro", "Natalia", "Santiago", "Julieta", "Mariela", "Fernanda", "Brian", "Erika", "Oriana"]
+PROVEEDORES = ["Pan Rustico", "Pan Fresh", "Dharma", "ValMaira", "Aprea", "CocaCola", "Grenn&Co", "Basile Walter"]
+
+
+def _repartir(rng, cierres, promedio):
+    # Cuantas filas genera cada cierre y a que cierre pertenece cada fila
+    cantidades = rng.poisson(promedio, cierres)
+    return np.repeat(np.arange(cierres), cantidades)
+
+
+def generar_hojas(cierres, semilla=0, desde="2015-01-01", cierres_por_dia=2):
+    rng = np.random.default_rng(semilla)
+    indice = np.arange(cierres)
+    fechas_dt = pd.Timestamp(desde) + pd.to_timedelta(indice // cierres_por_dia, unit="D")
+    fechas = fechas_dt.strftime("%d/%m/%Y").to_numpy()
+    cajeros = np.array(CAJEROS)[indice % cierres_por_dia]
+    id_cierre = fechas.astype(object) + "|" + cajeros.astype(object)
+
+    anios = (fechas_dt - fechas_dt[0]).days.to_numpy() / 365
+    estacionalidad = (1 + 0.3 * (fechas_dt.dayofweek.to_numpy() >= 4)) * (1 + 0.4 * (fechas_dt.month.to_numpy() == 12))
+    balanza = (600_000 * estacionalidad * 1.4 ** anios * rng.lognormal(0, 0.15, cierres)).round(2)
+
+    # Pagos a proveedores (~1.5 por cierre, 70% en efectivo)
+    de_pago = _repartir(rng, cierres, 1.5)
+    pagos = pd.DataFrame({
+        "Proveedor": rng.choice(PROVEEDORES, len(de_pago)),
+        "Forma Pago": np.where(rng.random(len(de_pago)) < 0.7, "Efectivo", "Digital / Banco"),
+        "Nro Factura": [f"A-{n:08d}" for n in range(1, len(de_pago) + 1)],
+        "Monto": (rng.uniform(5_000, 120_000, len(de_pago)) * 1.4 ** anios[de_pago]).round(2),
+        "Fecha": fechas[de_pago],
+        "Cajero": cajeros[de_pago],
+        COLUMNA_ID: id_cierre[de_pago],
+    })
+    en_efectivo = (pagos["Forma Pago"] == "Efectivo").to_numpy()
+    proveedores = np.bincount(de_pago[en_efectivo], pagos["Monto"].to_numpy()[en_efectivo], minlength=cierres)
+
+    # Mercaderia retirada por empleados (~0.6 por cierre, 80% con ticket)
+    de_consumo = _repartir(rng, cierres, 0.6)
+    con_ticket = rng.random(len(de_consumo)) < 0.8
+    consumos = pd.DataFrame({
+        "Fecha": fechas[de_consumo],
+        "Empleado": rng.choice(EMPLEADOS, len(de_consumo)),
+        "Monto": (rng.uniform(2_000, 20_000, len(de_consumo)) * 1.4 ** anios[de_consumo]).round(2),
+        COLUMNA_ID: id_cierre[de_consumo],
+    })
+    empleados = np.bincount(de_consumo[con_ticket], consumos["Monto"].to_numpy()[con_ticket], minlength=cierres)
+
+    historial = pd.DataFrame({
+        "Fecha": fechas,
+        "Cajero": cajeros,
+        "Balanza": balanza,
+        "Digital": (balanza * rng.uniform(0.45, 0.65, cierres)).round(2),
+        "Transferencias": (balanza * rng.uniform(0, 0.05, cierres)).round(2),
+        "Salidas": rng.uniform(0, 15_000, cierres).round(2),
+        "Vales": ((rng.random(cierres) < 0.1) * rng.uniform(1_000, 10_000, cierres)).round(2),
+        "Errores": ((rng.random(cierres) < 0.05) * rng.uniform(100, 5_000, cierres)).round(2),
+        "Descuentos": (balanza * rng.uniform(0, 0.03, cierres)).round(2),
+        "Proveedores": proveedores.round(2),
+        "Empleados": empleados.round(2),
+    })
+    # El efectivo cierra la cuenta salvo un pequenio descuadre
+    otros = historial[[c for c in calculos.COLUMNAS_JUSTIFICADAS if c in historial.columns]].sum(axis=1)
+    historial["Efectivo"] = (balanza - otros + rng.normal(0, 300, cierres)).clip(lower=0).round(2)
+    calculo = calculos.calcular_cierres(historial)
+    historial["Diferencia"] = calculo["Diferencia"]
+    historial["Estado"] = calculo["Estado"]
+    # Desglose del digital por medio, como lo guarda la app (el ultimo medio cierra la suma)
+    reparto = rng.dirichlet(np.ones(len(MEDIOS_DIGITALES)), cierres)
+    desglose = (historial["Digital"].to_numpy()[:, None] * reparto).round(2)
+    desglose[:, -1] = (historial["Digital"].to_numpy() - desglose[:, :-1].sum(axis=1)).round(2)
+    for i, medio in enumerate(MEDIOS_DIGITALES):
+        historial[columna_medio(medio)] = desglose[:, i]
+    historial[COLUMNA_ID] = id_cierre
+    return {HOJA_HISTORIAL: historial, HOJA_PAGOS: pagos, HOJA_CONSUMOS: consumos}
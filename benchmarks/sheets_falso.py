@@ -0,0 +1,170 @@
+# Reemplazo en memoria de la conexion "gsheets" con latencia configurable.
+# Implementa lo que usa la app: conn.read / conn.update (st-gsheets-connection) y, via
+# conn.client._open_spreadsheet(), la parte de gspread que usa BackendGSheets
+# (worksheets, values_batch_get con filas, rangos abiertos o acotados y columnas, y batch_update).
+# Las celdas guardan el valor crudo; como la API real, values_batch_get devuelve los numeros
+# formateados en es_AR ("850000,5") salvo que se pida valueRenderOption=UNFORMATTED_VALUE.
+# Cada llamada cuesta `latencia` segundos mas `latencia_por_fila` por cada fila enviada o recibida.
+import itertools
+import re
+import time
+
+import pandas as pd
+
+_RANGO = re.compile(r"'(?P<hoja>[^']+)'!(?:(?P<fila>\d+):\d+|A(?P<desde>\d+):ZZ(?P<hasta>\d*)|(?P<columna>[A-Z]+)(?P<desde_columna>\d+):(?P=columna))")
+
+
+def _crudo(valor):
+    if pd.isna(valor):
+        return ""
+    if hasattr(valor, "item"):
+        valor = valor.item()
+    if isinstance(valor, float) and valor.is_integer():
+        return int(valor)
+    return valor
+
+
+def _texto(valor):
+    # conn.read devuelve todo como texto
+    return str(valor)
+
+
+def _formateado(valor):
+    # Formato "Automatico" con configuracion regional es_AR: coma decimal
+    if isinstance(valor, bool):
+        return "VERDADERO" if valor else "FALSO"
+    if isinstance(valor, (int, float)):
+        return str(valor).replace(".", ",")
+    return valor
+
+
+def _indice_columna(letras):
+    indice = 0
+    for letra in letras:
+        indice = indice * 26 + ord(letra) - ord("A") + 1
+    return indice - 1
+
+
+def _valor_api(celda):
+    valor = celda.get("userEnteredValue", {})
+    return _crudo(next(iter(valor.values()), ""))
+
+
+class HojaFalsa:
+    def __init__(self, planilla, id_hoja, title, filas=None, columnas=26):
+        self.planilla = planilla
+        self.id = id_hoja
+        self.title = title
+        self.filas = filas or []
+        self.col_count = max(columnas, max((len(f) for f in self.filas), default=0))
+
+    def validar_ancho(self, fila):
+        # Como la API: escribir fuera de la grilla es un error (appendCells solo agrega filas)
+        if len(fila) > self.col_count:
+            raise ValueError(f"{self.title}: {len(fila)} columnas exceden la grilla de {self.col_count}")
+
+
+class PlanillaFalsa:
+    def __init__(self, latencia=0.0, latencia_por_fila=0.0):
+        self.latencia = latencia
+        self.latencia_por_fila = latencia_por_fila
+        self.hojas = {}
+        self.llamadas = 0
+        self._ids = itertools.count(1)
+
+    def esperar(self, filas=0):
+        self.llamadas += 1
+        demora = self.latencia + self.latencia_por_fila * filas
+        if demora:
+            time.sleep(demora)
+
+    def cargar(self, titulo, df):
+        encabezado = [str(c) for c in df.columns]
+        filas = [[_crudo(v) for v in fila] for fila in df.itertuples(index=False, name=None)]
+        self.hojas[titulo] = HojaFalsa(self, next(self._ids), titulo, [encabezado] + filas)
+
+    def _por_id(self, id_hoja):
+        return next(h for h in self.hojas.values() if h.id == id_hoja)
+
+    # --- API de gspread ---
+    def worksheets(self):
+        self.esperar()
+        return list(self.hojas.values())
+
+    def values_batch_get(self, rangos, params=None):
+        crudos = (params or {}).get("valueRenderOption") == "UNFORMATTED_VALUE"
+        respuestas, filas_enviadas = [], 0
+        for rango in rangos:
+            partes = _RANGO.fullmatch(rango)
+            hoja = self.hojas[partes["hoja"]]
+            if partes["fila"]:
+                inicio = int(partes["fila"]) - 1
+                valores = hoja.filas[inicio:inicio + 1]
+            elif partes["columna"]:
+                # Una columna: cada fila es [valor] o [] si la celda esta vacia; sin las vacias del final
+                indice = _indice_columna(partes["columna"])
+                valores = [[f[indice]] if len(f) > indice and f[indice] != "" else [] for f in hoja.filas[int(partes["desde_columna"]) - 1:]]
+                while valores and not valores[-1]:
+                    valores.pop()
+            else:
+                valores = hoja.filas[int(partes["desde"]) - 1:int(partes["hasta"] or len(hoja.filas))]
+            filas_enviadas += len(valores)
+            valores = [list(f) if crudos else [_formateado(v) for v in f] for f in valores]
+            respuestas.append({"range": rango, "values": valores} if valores else {"range": rango})
+        self.esperar(filas_enviadas)
+        return {"valueRanges": respuestas}
+
+    def batch_update(self, cuerpo):
+        filas = 0
+        for pedido in cuerpo["requests"]:
+            if "addSheet" in pedido:
+                propiedades = pedido["addSheet"]["properties"]
+                columnas = propiedades.get("gridProperties", {}).get("columnCount", 26)
+                self.hojas[propiedades["title"]] = HojaFalsa(self, next(self._ids), propiedades["title"], columnas=columnas)
+            elif "appendDimension" in pedido:
+                self._por_id(pedido["appendDimension"]["sheetId"]).col_count += pedido["appendDimension"]["length"]
+            elif "updateCells" in pedido:
+                datos = pedido["updateCells"]
+                hoja = self._por_id(datos["start"]["sheetId"])
+                for desplazamiento, fila in enumerate(datos["rows"]):
+                    hoja.validar_ancho(fila["values"])
+                    indice = datos["start"]["rowIndex"] + desplazamiento
+                    while len(hoja.filas) <= indice:
+                        hoja.filas.append([])
+                    hoja.filas[indice] = [_valor_api(c) for c in fila["values"]]
+            elif "appendCells" in pedido:
+                hoja = self._por_id(pedido["appendCells"]["sheetId"])
+                nuevas = [[_valor_api(c) for c in fila["values"]] for fila in pedido["appendCells"]["rows"]]
+                for fila in nuevas:
+                    hoja.validar_ancho(fila)
+                hoja.filas.extend(nuevas)
+                filas += len(nuevas)
+        self.esperar(filas)
+        return {"replies": []}
+
+
+class ConexionFalsa:
+    # Se pasa a BackendGSheets(conn) en lugar de st.connection("gsheets", ...)
+    def __init__(self, hojas=None, latencia=0.0, latencia_por_fila=0.0):
+        self.planilla = PlanillaFalsa(latencia, latencia_por_fila)
+        for titulo, df in (hojas or {}).items():
+            self.planilla.cargar(titulo, df)
+        self.client = self
+
+    def _open_spreadsheet(self):
+        self.planilla.esperar()
+        return self.planilla
+
+    def read(self, worksheet, ttl=None):
+        hoja = self.planilla.hojas.get(worksheet)
+        if hoja is None or not hoja.filas:
+            self.planilla.esperar()
+            return pd.DataFrame()
+        self.planilla.esperar(len(hoja.filas))
+        encabezado = hoja.filas[0]
+        filas = [[_texto(v) for v in f] + [""] * (len(encabezado) - len(f)) for f in hoja.filas[1:]]
+        return pd.DataFrame(filas, columns=encabezado)
+
+    def update(self, worksheet, data):
+        self.planilla.cargar(worksheet, data)
+        self.planilla.esperar(len(data))
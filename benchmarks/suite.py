@@ -0,0 +1,202 @@
+# Benchmark de punta a punta contra una planilla falsa con latencia (benchmarks/sheets_falso.py):
+# guardado, analisis del sidebar, tendencias, PDF y memoria con 1k / 10k / 100k cierres en el historial.
+# Uso: python -m benchmarks.suite [--tamanios 1000 10000] [--latencia 0.05] [--repeticiones 5]
+# Cada corrida se agrega a benchmarks/resultados/suite.csv y se compara con la anterior.
+import argparse
+import datetime
+import itertools
+import os
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+import reporte_pdf
+from agregados import AgregadosSucursales
+from almacenamiento import HOJA_CONSUMOS, HOJA_HISTORIAL, HOJA_PAGOS, BackendGSheets, confirmar_cierre
+from benchmarks.datos_sinteticos import generar_hojas
+from benchmarks.sheets_falso import ConexionFalsa
+from cache_local import CacheLocal
+from cola_envios import ColaCierres
+from tendencias import GRAFICOS, TendenciasHistorial
+
+TAMANIOS = [1_000, 10_000, 100_000]
+SALIDA = os.path.join(os.path.dirname(__file__), "resultados", "suite.csv")
+
+DF_PROVS = pd.DataFrame([{"Proveedor": "Dharma", "Forma Pago": "Efectivo", "Nro Factura": "A-0001", "Monto": 28000.0}])
+DF_EMPLS = pd.DataFrame([{"Empleado": "Brian", "Ticket": "Con Ticket", "Monto": 4500.0}])
+
+
+def _ms(funcion, repeticiones=1):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones * 1000
+
+
+def _pico_mb(funcion):
+    tracemalloc.start()
+    try:
+        funcion()
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def _datos_cierre(historial, contador, sucursal=None):
+    datos = historial.iloc[-1].drop("ID Cierre").to_dict()
+    datos.update(Fecha="15/03/2025", Cajero=f"Bench {next(contador)}")
+    if sucursal:
+        datos.update(Sucursal=sucursal, Caja="Caja 1")
+    return datos
+
+
+# --- 1. GUARDADO ---
+def medir_guardado(hojas, latencia, latencia_por_fila, repeticiones, tmp):
+    historial = hojas[HOJA_HISTORIAL]
+    contador = itertools.count()
+    cola = ColaCierres(os.path.join(tmp, "cola.sqlite"))
+    backend = BackendGSheets(ConexionFalsa(hojas, latencia, latencia_por_fila))
+    return {
+        # Lo que espera el cajero: escribir en la cola local
+        "guardar_cola_ms": _ms(lambda: cola.encolar(_datos_cierre(historial, contador), DF_PROVS, DF_EMPLS), repeticiones),
+        # Lo que hace el hilo de envio: particion del mes y hoja original (verifica claves de todo el historial)
+        "envio_particion_ms": _ms(lambda: confirmar_cierre(backend, _datos_cierre(historial, contador, "ESF"), DF_PROVS, DF_EMPLS), repeticiones),
+        "envio_hoja_original_ms": _ms(lambda: confirmar_cierre(backend, _datos_cierre(historial, contador), DF_PROVS, DF_EMPLS), repeticiones),
+    }
+
+
+# --- 2. ANÁLISIS DEL SIDEBAR ---
+def _sidebar(cache_local, agregados):
+    agregados.actualizar_indice(cache_local)
+    mes = agregados.meses_disponibles()[0]
+    agregados.actualizar(cache_local, mes)
+    agregados.resumen(mes)
+    agregados.consumo_por_empleado(mes)
+
+
+def medir_sidebar(hojas, latencia, latencia_por_fila, repeticiones, tmp):
+    conn = ConexionFalsa(hojas, latencia, latencia_por_fila)
+
+    def nuevo_cache():
+        return CacheLocal(BackendGSheets(conn), tempfile.mkdtemp(dir=tmp)), AgregadosSucursales()
+
+    cache_local, agregados = nuevo_cache()
+    frio = _ms(lambda: _sidebar(cache_local, agregados))
+
+    def tibio():
+        for hoja in (HOJA_HISTORIAL, HOJA_CONSUMOS):
+            cache_local.marcar_desactualizada(hoja)
+        _sidebar(cache_local, agregados)
+
+    cache_memoria = sum(df.memory_usage(deep=True).sum() for df in cache_local._tablas.values()) / 1e6
+    # Con la copia en Parquet ya en disco (reinicio de la app): solo se piden las filas nuevas
+    reinicio = CacheLocal(BackendGSheets(conn), cache_local.directorio)
+    return {
+        "sidebar_frio_ms": frio,
+        "sidebar_tibio_ms": _ms(tibio, repeticiones),
+        "sidebar_reinicio_ms": _ms(lambda: _sidebar(reinicio, AgregadosSucursales())),
+        "sidebar_pico_mb": _pico_mb(lambda: _sidebar(*nuevo_cache())),
+        "cache_memoria_mb": cache_memoria,
+    }
+
+
+# --- 3. TENDENCIAS ---
+def medir_tendencias(hojas, latencia, latencia_por_fila, tmp):
+    cache_local = CacheLocal(BackendGSheets(ConexionFalsa(hojas, latencia, latencia_por_fila)), tempfile.mkdtemp(dir=tmp))
+    series = TendenciasHistorial()
+
+    def graficos(rango):
+        granularidad = series.granularidades(rango)[0]
+        for grafico in GRAFICOS:
+            series.figura(grafico, rango, granularidad)
+
+    return {
+        "tendencias_series_ms": _ms(lambda: series.actualizar(cache_local)),
+        "tendencias_graficos_ms": _ms(lambda: graficos("Todo")),
+        "tendencias_cacheados_ms": _ms(lambda: graficos("Todo")),
+    }
+
+
+# --- 4. PDF ---
+def _argumentos_pdf(hojas, indice):
+    cierre = hojas[HOJA_HISTORIAL].iloc[indice]
+    pagos = hojas[HOJA_PAGOS][hojas[HOJA_PAGOS]["ID Cierre"] == cierre["ID Cierre"]]
+    consumos = hojas[HOJA_CONSUMOS][hojas[HOJA_CONSUMOS]["ID Cierre"] == cierre["ID Cierre"]]
+    resumen = lambda col: pd.DataFrame([{"Descripción": col, "Monto": cierre[col]}])
+    return (datetime.datetime.strptime(cierre["Fecha"], "%d/%m/%Y").date(), cierre["Cajero"], cierre["Balanza"], None,
+            cierre["Digital"], cierre["Efectivo"], resumen("Salidas"), resumen("Transferencias"), resumen("Errores"),
+            resumen("Vales"), resumen("Descuentos"), pagos, consumos.assign(Ticket="Con Ticket"), cierre["Diferencia"],
+            {"Mercado Pago": cierre["Digital"]})
+
+
+def medir_pdf(hojas, repeticiones):
+    # Cierres distintos en cada repeticion para no medir el cache de bytes
+    variantes = iter([_argumentos_pdf(hojas, -i) for i in range(1, repeticiones + 2)])
+    reporte_pdf.generar_pdf_profesional(*next(variantes))
+    return {
+        "pdf_ms": _ms(lambda: reporte_pdf.generar_pdf_profesional(*next(variantes)), repeticiones),
+        "pdf_pico_mb": _pico_mb(lambda: reporte_pdf.generar_pdf_profesional(*_argumentos_pdf(hojas, 0))),
+    }
+
+
+# --- 5. RESULTADOS ---
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return ""
+
+
+def comparar(anteriores, actuales):
+    if anteriores.empty:
+        return actuales.assign(Anterior=float("nan"), Cambio="")
+    ultima = anteriores[anteriores["corrida"] == anteriores["corrida"].iloc[-1]]
+    claves = ["tamanio", "latencia", "metrica"]
+    unidas = actuales.merge(ultima[claves + ["valor"]].rename(columns={"valor": "Anterior"}), on=claves, how="left")
+    unidas["Cambio"] = ((unidas["valor"] / unidas["Anterior"] - 1) * 100).map(lambda v: "" if pd.isna(v) else f"{v:+.0f}%")
+    return unidas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de guardado, sidebar, tendencias y PDF contra una planilla falsa.")
+    parser.add_argument("--tamanios", type=int, nargs="+", default=TAMANIOS, help="Cierres en el historial")
+    parser.add_argument("--latencia", type=float, default=0.05, help="Segundos por llamada a la API")
+    parser.add_argument("--latencia-por-fila", type=float, default=0.000002, help="Segundos por fila enviada o recibida")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--salida", default=SALIDA, help="CSV donde se acumulan las corridas")
+    args = parser.parse_args(argv)
+
+    corrida = datetime.datetime.now().isoformat(timespec="seconds")
+    filas = []
+    for tamanio in args.tamanios:
+        hojas = generar_hojas(tamanio)
+        with tempfile.TemporaryDirectory() as tmp:
+            metricas = {
+                **medir_guardado(hojas, args.latencia, args.latencia_por_fila, args.repeticiones, tmp),
+                **medir_sidebar(hojas, args.latencia, args.latencia_por_fila, args.repeticiones, tmp),
+                **medir_tendencias(hojas, args.latencia, args.latencia_por_fila, tmp),
+                **medir_pdf(hojas, args.repeticiones),
+            }
+        for metrica, valor in metricas.items():
+            filas.append({"corrida": corrida, "commit": _commit(), "tamanio": tamanio, "latencia": args.latencia,
+                          "metrica": metrica, "valor": round(float(valor), 3)})
+        print(f"{tamanio:>7} cierres listo", flush=True)
+
+    actuales = pd.DataFrame(filas)
+    anteriores = pd.read_csv(args.salida) if os.path.exists(args.salida) else pd.DataFrame()
+    tabla = comparar(anteriores, actuales)
+    print(tabla.pivot_table(index="metrica", columns="tamanio", values="valor", sort=False).round(2).to_string())
+    if tabla["Cambio"].ne("").any():
+        print("\nCambio contra la corrida anterior:")
+        print(tabla.pivot_table(index="metrica", columns="tamanio", values="Cambio", aggfunc="first", sort=False).to_string())
+
+    os.makedirs(os.path.dirname(args.salida) or ".", exist_ok=True)
+    pd.concat([anteriores, actuales], ignore_index=True).to_csv(args.salida, index=False)
+    print(f"\nResultados agregados a {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+# --- CACHE LOCAL EN PARQUET ---
+# Una copia en disco por hoja. Como las hojas de cierres solo crecen por el final (ver
+# almacenamiento.py), sincronizar es pedir las filas posteriores a la ultima que ya tenemos.
+# Si esa ultima fila ya no coincide (se borraron o editaron filas a mano) la hoja se baja completa.
+# Las que se editan a mano (Directorio) se leen con incremental=False y se bajan completas.
+class CacheLocal:
+    def __init__(self, backend, directorio=".cache_cierres", ttl=600):
+        self.backend = backend
+        self.directorio = directorio
+        self.ttl = ttl
+        self._tablas = {}
+        self._ultima_sincronizacion = {}
+        self._listado = None
+        # Un lock por hoja: se pueden sincronizar varias a la vez, pero nunca dos veces la misma
+        self._locks = {}
+        self._lock_meta = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-hojas")
+        os.makedirs(directorio, exist_ok=True)
+        self._meta = self._leer_meta()
+
+    def _ruta(self, hoja):
+        return os.path.join(self.directorio, f"{hoja}.parquet")
+
+    def _ruta_meta(self):
+        return os.path.join(self.directorio, "meta.json")
+
+    def _leer_meta(self):
+        if not os.path.exists(self._ruta_meta()):
+            return {}
+        with open(self._ruta_meta(), encoding="utf-8") as f:
+            return json.load(f)
+
+    def _guardar_meta(self, hoja, valor):
+        with self._lock_meta:
+            self._meta[hoja] = valor
+            with open(self._ruta_meta(), "w", encoding="utf-8") as f:
+                json.dump(self._meta, f)
+
+    def _lock(self, hoja):
+        with self._lock_meta:
+            return self._locks.setdefault(hoja, threading.RLock())
+
+    def _tabla(self, hoja):
+        if hoja not in self._tablas:
+            ruta = self._ruta(hoja)
+            self._tablas[hoja] = pd.read_parquet(ruta) if os.path.exists(ruta) else pd.DataFrame()
+        return self._tablas[hoja]
+
+    def filas_cacheadas(self, hoja):
+        return self._meta.get(hoja, {}).get("filas", 0)
+
+    def version(self, hoja):
+        # Sube cada vez que la copia local se rehace desde cero: los agregados que se alimentan
+        # de las filas nuevas tienen que reconstruirse (ver agregados.filas_nuevas)
+        return self._meta.get(hoja, {}).get("version", 0)
+
+    def versiones(self, hojas):
+        return {hoja: self.version(hoja) for hoja in hojas}
+
+    def _coincide(self, hoja, fila):
+        tabla = self._tabla(hoja)
+        if tabla.empty:
+            return False
+        remota = fila.to_frame().T.fillna("").astype(str).reindex(columns=tabla.columns, fill_value="").iloc[0]
+        return (remota == tabla.iloc[-1]).all()
+
+    def sincronizar(self, hoja):
+        # Devuelve solo las filas nuevas para que los agregados puedan actualizarse sin releer todo
+        with self._lock(hoja):
+            desde = self.filas_cacheadas(hoja)
+            # Se vuelve a pedir la ultima fila que ya tenemos: si no coincide, alguien borro o edito
+            # filas a mano y las posiciones se corrieron; la hoja se baja completa
+            nuevas = self.backend.leer_desde(hoja, max(desde - 1, 0))
+            if desde:
+                if nuevas.empty or not self._coincide(hoja, nuevas.iloc[0]):
+                    return self.recargar(hoja)
+                nuevas = nuevas.iloc[1:]
+            self._ultima_sincronizacion[hoja] = time.monotonic()
+            if nuevas.empty:
+                return nuevas
+            nuevas = nuevas.fillna("").astype(str)
+            df = pd.concat([self._tabla(hoja), nuevas], ignore_index=True).fillna("")
+            df.to_parquet(self._ruta(hoja), index=False)
+            self._tablas[hoja] = df
+            self._guardar_meta(hoja, {"filas": desde + len(nuevas), "version": self.version(hoja)})
+            return nuevas
+
+    def recargar(self, hoja):
+        # Para hojas que se editan a mano (Directorio) o que cambiaron por encima de la ultima fila
+        # sincronizada: se baja completa y reemplaza la copia local
+        with self._lock(hoja):
+            df = self.backend.leer_desde(hoja, 0).fillna("").astype(str)
+            self._ultima_sincronizacion[hoja] = time.monotonic()
+            df.to_parquet(self._ruta(hoja), index=False)
+            self._tablas[hoja] = df
+            self._guardar_meta(hoja, {"filas": len(df), "version": self.version(hoja) + 1})
+            return df
+
+    def leer(self, hoja, incremental=True):
+        with self._lock(hoja):
+            # Si otra sesion (o la precarga) la estaba sincronizando, al entrar ya esta al dia
+            ultima = self._ultima_sincronizacion.get(hoja)
+            if ultima is None or time.monotonic() - ultima > self.ttl:
+                if incremental:
+                    self.sincronizar(hoja)
+                else:
+                    self.recargar(hoja)
+            return self._tabla(hoja)
+
+    def precargar(self, hojas, completas=()):
+        # Pide todas las hojas a la vez y devuelve {hoja: Future} sin esperar a la red.
+        # Las de `completas` no son de solo agregar filas y se releen enteras al vencer el TTL.
+        return {hoja: self._pool.submit(self.leer, hoja, hoja not in completas) for hoja in hojas}
+
+    def hojas(self):
+        # Nombres de las hojas (y particiones por sucursal/mes) que existen, con el mismo TTL
+        if self._listado is None or time.monotonic() - self._listado[0] > self.ttl:
+            self._listado = (time.monotonic(), self.backend.listar_hojas())
+        return self._listado[1]
+
+    def marcar_desactualizada(self, hoja):
+        self._ultima_sincronizacion.pop(hoja, None)
+        self._listado = None
+
+    def invalidar(self, hoja):
+        # Descarta la copia local de una sola hoja; la proxima lectura la trae completa
+        with self._lock(hoja):
+            if os.path.exists(self._ruta(hoja)):
+                os.remove(self._ruta(hoja))
+            self._tablas.pop(hoja, None)
+            self._ultima_sincronizacion.pop(hoja, None)
+            self._listado = None
+            self._guardar_meta(hoja, {"filas": 0, "version": self.version(hoja) + 1})
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+# --- FÓRMULA DE CAJA ---
+# Diferencia = Balanza - (Digital + Efectivo + Transferencias + Salidas + Proveedores en efectivo
+#                         + Vales + Mercaderia con ticket + Errores + Descuentos)
+# Todo opera sobre columnas completas: un cierre es solo un DataFrame de una fila.
+COLUMNAS_JUSTIFICADAS = [
+    "Digital", "Efectivo", "Transferencias", "Salidas", "Proveedores",
+    "Vales", "Empleados", "Errores", "Descuentos",
+]
+
+
+def a_numero(valores):
+    return pd.to_numeric(pd.Series(valores), errors="coerce").fillna(0).to_numpy(dtype=float)
+
+
+# Renglones que justifican dinero en la caja: de los proveedores, solo los pagados en efectivo;
+# de la mercaderia de empleados, solo la "Con Ticket". En las demas tablas cuenta todo.
+CONDICIONES_CAJA = {
+    "proveedores": ("Forma Pago", "Efectivo"),
+    "empleados": ("Ticket", "Con Ticket"),
+}
+
+
+def total_componente(componente, montos, textos):
+    # `textos` es {columna: valores}: un DataFrame o las listas de LineasCierre (estado_caja.py)
+    montos = a_numero(montos)
+    condicion = CONDICIONES_CAJA.get(componente)
+    if condicion is None or condicion[0] not in textos:
+        return float(montos.sum())
+    columna, valor = condicion
+    cumplen = np.asarray(textos[columna], dtype=object) == valor
+    return float(montos[cumplen].sum())
+
+
+def estado_caja(diferencias):
+    diferencias = np.asarray(diferencias, dtype=float)
+    estados = np.select([diferencias > 0, diferencias < 0], ["FALTANTE", "SOBRANTE"], default="OK")
+    return estados if estados.ndim else str(estados)
+
+
+def mix_ingresos(efectivo, digital):
+    efectivo = np.asarray(efectivo, dtype=float)
+    digital = np.asarray(digital, dtype=float)
+    total = efectivo + digital
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct_efectivo = np.where(total > 0, efectivo / total * 100, 0.0)
+        pct_digital = np.where(total > 0, digital / total * 100, 0.0)
+    return pct_efectivo, pct_digital
+
+
+def total_justificado(montos):
+    # Suma en el orden de COLUMNAS_JUSTIFICADAS: un cierre suelto y N cierres dan el mismo total
+    total = 0.0
+    for monto in montos:
+        total = total + monto
+    return total
+
+
+def diferencia_caja(balanza, justificado):
+    # Se redondea al centavo para que el error de punto flotante no marque faltantes de $0.00;
+    # sumar 0.0 convierte el -0.0 del redondeo en 0.0 (si no se muestra "$-0.00")
+    return np.round(np.asarray(balanza, dtype=float) - justificado, 2) + 0.0
+
+
+def calcular_cierres(df):
+    # Recibe N cierres (columnas faltantes cuentan como 0) y devuelve diferencias, estados y mix
+    justificados = [a_numero(df[col]) if col in df.columns else np.zeros(len(df)) for col in COLUMNAS_JUSTIFICADAS]
+    balanza = a_numero(df["Balanza"]) if "Balanza" in df.columns else np.zeros(len(df))
+    total = total_justificado(justificados)
+    diferencia = diferencia_caja(balanza, total)
+    pct_efectivo, pct_digital = mix_ingresos(
+        justificados[COLUMNAS_JUSTIFICADAS.index("Efectivo")],
+        justificados[COLUMNAS_JUSTIFICADAS.index("Digital")],
+    )
+    return pd.DataFrame({
+        "Total Justificado": total,
+        "Diferencia": diferencia,
+        "Estado": estado_caja(diferencia),
+        "% Efectivo": pct_efectivo,
+        "% Digital": pct_digital,
+    }, index=df.index)
+
+
+def _texto(df, columna):
+    if columna not in df.columns:
+        return pd.Series("", index=df.index)
+    return df[columna].fillna("").astype(str).str.strip()
+
+
+def diferencias_registradas(df_historial):
+    # Diferencia y Estado con los que se cerro cada caja; se recalculan solo donde estan vacios
+    # (los cierres viejos no tienen "Empleados" y recalcularlos daria faltantes que no existieron)
+    guardada = _texto(df_historial, "Diferencia")
+    estado = _texto(df_historial, "Estado")
+    diferencia = a_numero(guardada)
+    if (guardada == "").any() or (estado == "").any():
+        recalculada = calcular_cierres(df_historial)["Diferencia"].to_numpy()
+        diferencia = np.where(guardada == "", recalculada, diferencia)
+    estado = np.where(estado == "", estado_caja(diferencia), estado)
+    return pd.DataFrame({"Diferencia": diferencia, "Estado": estado}, index=df_historial.index)
+
+
+def auditar_historial(df_historial):
+    # Compara la diferencia guardada en cada cierre contra la que resulta de recalcularla.
+    # Los cierres anteriores a la columna "Empleados" no se pueden recalcular (la mercaderia con
+    # ticket ya estaba descontada de otra forma): quedan como no auditables y sin Desvio.
+    resultado = calcular_cierres(df_historial)
+    resultado.insert(0, "Fecha", df_historial.get("Fecha"))
+    resultado.insert(1, "Cajero", df_historial.get("Cajero"))
+    if "Empleados" in df_historial.columns:
+        auditable = (df_historial["Empleados"].fillna("").astype(str).str.strip() != "").to_numpy()
+    else:
+        auditable = np.zeros(len(df_historial), dtype=bool)
+    resultado["Auditable"] = auditable
+    resultado["Diferencia Registrada"] = a_numero(df_historial["Diferencia"]) if "Diferencia" in df_historial.columns else np.nan
+    resultado["Desvio"] = (resultado["Diferencia Registrada"] - resultado["Diferencia"]).where(auditable)
+    return resultado
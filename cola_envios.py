@@ -0,0 +1,163 @@
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+import pandas as pd
+
+from almacenamiento import clave_cierre, confirmar_cierre
+
+# --- COLA LOCAL DE CIERRES ---
+# Guardar un cierre es escribirlo en un SQLite local: vuelve en lo que tarda el disco.
+# Un hilo en segundo plano los envia a Google Sheets en el orden en que se guardaron
+# y reintenta con espera creciente si no hay conexion. Como la cola vive en disco,
+# un cierre pendiente sobrevive a un reinicio de la app. Un cierre que falla MAX_INTENTOS
+# veces queda apartado como fallido (no frena a los demas) hasta que se lo reintenta a mano.
+MAX_INTENTOS = 10
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS cierres (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    clave TEXT UNIQUE NOT NULL,
+    datos TEXT NOT NULL,
+    proveedores TEXT NOT NULL,
+    empleados TEXT NOT NULL,
+    creado REAL NOT NULL,
+    intentos INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    enviado REAL,
+    nota TEXT,
+    fallido REAL
+)
+"""
+
+
+def _valor_json(valor):
+    return valor.item() if hasattr(valor, "item") else str(valor)
+
+
+def _df_a_json(df):
+    return df.to_json(orient="split", index=False)
+
+
+def _df_desde_json(texto):
+    return pd.read_json(io.StringIO(texto), orient="split", dtype=False)
+
+
+class ColaCierres:
+    def __init__(self, ruta=os.path.join(".cache_cierres", "cola.sqlite"), espera_maxima=60, max_intentos=MAX_INTENTOS):
+        self.ruta = ruta
+        self.espera_maxima = espera_maxima
+        self.max_intentos = max_intentos
+        self.backend = None
+        self.al_enviar = None
+        self.ultimo_error = None
+        self._hay_trabajo = threading.Event()
+        self._hilo = None
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        with self._conectar() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(ESQUEMA)
+            # Colas creadas antes de la columna "fallido"
+            if "fallido" not in [columna[1] for columna in db.execute("PRAGMA table_info(cierres)")]:
+                db.execute("ALTER TABLE cierres ADD COLUMN fallido REAL")
+
+    def _conectar(self):
+        return closing(sqlite3.connect(self.ruta, timeout=10, isolation_level=None))
+
+    def encolar(self, datos_cierre, df_provs, df_empls):
+        # Devuelve False si ese cierre (Fecha + Cajero) ya estaba en la cola
+        try:
+            with self._conectar() as db:
+                db.execute(
+                    "INSERT INTO cierres (clave, datos, proveedores, empleados, creado) VALUES (?, ?, ?, ?, ?)",
+                    (clave_cierre(datos_cierre), json.dumps(datos_cierre, default=_valor_json),
+                     _df_a_json(df_provs), _df_a_json(df_empls), time.time()),
+                )
+        except sqlite3.IntegrityError:
+            return False
+        self._hay_trabajo.set()
+        return True
+
+    def estado(self):
+        with self._conectar() as db:
+            pendientes, intentos = db.execute(
+                "SELECT COUNT(*), COALESCE(MAX(intentos), 0) FROM cierres WHERE enviado IS NULL AND fallido IS NULL"
+            ).fetchone()
+            enviados = db.execute("SELECT COUNT(*) FROM cierres WHERE enviado IS NOT NULL").fetchone()[0]
+            fallidos = db.execute(
+                "SELECT clave, intentos, error FROM cierres WHERE enviado IS NULL AND fallido IS NOT NULL ORDER BY id"
+            ).fetchall()
+        return {
+            "pendientes": pendientes,
+            "enviados": enviados,
+            "intentos": intentos,
+            "error": self.ultimo_error if pendientes else None,
+            "conectado": self.backend is not None,
+            "fallidos": pd.DataFrame(fallidos, columns=["Cierre", "Intentos", "Error"]),
+        }
+
+    def reintentar_fallidos(self):
+        # Vuelven a la cola con los intentos en cero (por ejemplo, despues de corregir la planilla)
+        with self._conectar() as db:
+            db.execute("UPDATE cierres SET fallido = NULL, intentos = 0 WHERE enviado IS NULL AND fallido IS NOT NULL")
+        self._hay_trabajo.set()
+
+    # --- ENVÍO EN SEGUNDO PLANO ---
+    def iniciar(self, backend, al_enviar=None):
+        self.backend = backend
+        self.al_enviar = al_enviar
+        if self._hilo is None or not self._hilo.is_alive():
+            self._hilo = threading.Thread(target=self._trabajar, name="cola-cierres", daemon=True)
+            self._hilo.start()
+        self._hay_trabajo.set()
+
+    def _siguiente(self):
+        with self._conectar() as db:
+            return db.execute(
+                "SELECT id, datos, proveedores, empleados FROM cierres WHERE enviado IS NULL AND fallido IS NULL ORDER BY id LIMIT 1"
+            ).fetchone()
+
+    def _esperar(self, segundos=None):
+        self._hay_trabajo.wait(segundos)
+        self._hay_trabajo.clear()
+
+    def _trabajar(self):
+        espera = 1
+        while True:
+            pendiente = self._siguiente()
+            if pendiente is None:
+                self._esperar()
+                continue
+            id_cierre, datos, proveedores, empleados = pendiente
+            try:
+                # Se respeta el orden: mientras el primero no se envie, los demas esperan
+                guardado = confirmar_cierre(
+                    self.backend, json.loads(datos), _df_desde_json(proveedores), _df_desde_json(empleados)
+                )
+            except Exception as e:
+                self.ultimo_error = str(e)
+                with self._conectar() as db:
+                    db.execute(
+                        "UPDATE cierres SET intentos = intentos + 1, error = ?, "
+                        "fallido = CASE WHEN intentos + 1 >= ? THEN ? END WHERE id = ?",
+                        (str(e), self.max_intentos, time.time(), id_cierre),
+                    )
+                self._esperar(espera)
+                espera = min(espera * 2, self.espera_maxima)
+                continue
+            espera = 1
+            self.ultimo_error = None
+            with self._conectar() as db:
+                db.execute(
+                    "UPDATE cierres SET enviado = ?, error = NULL, nota = ? WHERE id = ?",
+                    (time.time(), "" if guardado else "ya estaba guardado", id_cierre),
+                )
+            if self.al_enviar:
+                try:
+                    self.al_enviar(json.loads(datos))
+                except Exception:
+                    # El cierre ya quedo enviado: un error al avisar no puede detener el hilo de la cola
+                    pass
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+import calculos
+
+# --- ESTADO REACTIVO DEL CIERRE ---
+# Cada bloque de carga publica su total aca y el fragmento de "Caja Real" solo lee estos valores,
+# asi un cambio en un bloque no obliga a recalcular los demas.
+COMPONENTES_JUSTIFICADOS = [
+    "digital", "efectivo", "transferencias", "salidas", "proveedores",
+    "vales", "empleados", "errores", "descuentos",
+]
+
+# Tablas del cierre: columnas y componente al que suman (que renglones cuentan lo decide calculos.py)
+TABLAS = {
+    "df_salidas": (["Descripción", "Monto"], "salidas"),
+    "df_transferencias": (["Monto"], "transferencias"),
+    "df_vales": (["Descripción", "Monto"], "vales"),
+    "df_errores": (["Monto"], "errores"),
+    "df_descuentos": (["Monto"], "descuentos"),
+    "df_proveedores": (["Proveedor", "Forma Pago", "Nro Factura", "Monto"], "proveedores"),
+    "df_empleados": (["Empleado", "Ticket", "Monto"], "empleados"),
+}
+
+# Base vacia de cada editor, compartida por todas las sesiones (st.data_editor trabaja sobre una copia)
+PLANTILLAS = {tabla: pd.DataFrame(columns=columnas) for tabla, (columnas, _) in TABLAS.items()}
+
+
+def _a_float(valor):
+    try:
+        numero = float(valor)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if numero != numero else numero
+
+
+def filas_del_editor(edicion, base=()):
+    # Renglones actuales a partir del estado de st.data_editor (ediciones, borrados y agregados)
+    filas = [dict(fila) for fila in base]
+    for posicion, cambios in edicion.get("edited_rows", {}).items():
+        filas[int(posicion)].update(cambios)
+    borrados = set(edicion.get("deleted_rows", []))
+    filas = [fila for i, fila in enumerate(filas) if i not in borrados]
+    return filas + [dict(fila) for fila in edicion.get("added_rows", [])]
+
+
+class LineasCierre:
+    # Renglones de una tabla como columnas compactas: un array de montos y listas de textos
+    __slots__ = ("columnas", "montos", "textos")
+
+    def __init__(self, columnas):
+        self.columnas = columnas
+        self.montos = np.zeros(0)
+        self.textos = {c: [] for c in columnas if c != "Monto"}
+
+    def __len__(self):
+        return self.montos.size
+
+    def cargar(self, filas):
+        self.montos = np.fromiter((_a_float(f.get("Monto")) for f in filas), dtype=float, count=len(filas))
+        self.textos = {c: ["" if f.get(c) is None else str(f.get(c)) for f in filas] for c in self.textos}
+
+    def total(self, componente=None):
+        # Lo que justifica este componente en la caja, con las mismas reglas que el historial
+        return calculos.total_componente(componente, self.montos, self.textos)
+
+    def a_dataframe(self):
+        return pd.DataFrame({**self.textos, "Monto": self.montos}, columns=self.columnas)
+
+
+class EstadoCaja:
+    __slots__ = ("totales", "tablas", "tickets_descuento", "desglose_digital", "sucursal", "caja", "fecha", "cajero")
+
+    def __init__(self):
+        self.totales = dict.fromkeys(["balanza", "registradora"] + COMPONENTES_JUSTIFICADOS, 0.0)
+        self.tablas = {tabla: LineasCierre(columnas) for tabla, (columnas, _) in TABLAS.items()}
+        # Tickets de Somos Avellaneda cargados en bloque (aparte del editor)
+        self.tickets_descuento = np.zeros(0)
+        self.desglose_digital = {}
+        self.sucursal = None
+        self.caja = None
+        self.fecha = None
+        self.cajero = None
+
+    def fijar(self, componente, monto):
+        self.totales[componente] = float(monto)
+
+    def cargar_tabla(self, tabla, edicion):
+        # Se llama desde el on_change del editor: solo se recalcula el total de esa tabla
+        _, componente = TABLAS[tabla]
+        self.tablas[tabla].cargar(filas_del_editor(edicion))
+        total = self.tablas[tabla].total(componente)
+        if tabla == "df_descuentos":
+            total += float(self.tickets_descuento.sum())
+        self.fijar(componente, total)
+
+    def agregar_tickets(self, montos):
+        self.tickets_descuento = np.concatenate([self.tickets_descuento, montos])
+        self.fijar("descuentos", self.totales["descuentos"] + float(np.sum(montos)))
+
+    def quitar_tickets(self):
+        self.fijar("descuentos", self.totales["descuentos"] - float(self.tickets_descuento.sum()))
+        self.tickets_descuento = np.zeros(0)
+
+    def descuentos(self):
+        # Tickets del editor e importados juntos, como los imprime el PDF
+        return np.concatenate([self.tablas["df_descuentos"].montos, self.tickets_descuento])
+
+    def total_justificado(self):
+        return calculos.total_justificado(self.totales[c] for c in COMPONENTES_JUSTIFICADOS)
+
+    def diferencia(self):
+        # Misma formula y redondeo que el historial (calculos.py): lo guardado coincide con la auditoria
+        return float(calculos.diferencia_caja(self.totales["balanza"], self.total_justificado()))
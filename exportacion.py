@@ -0,0 +1,180 @@
+# Exporta Historial, Pagos_Proveedores y Consumo_Empleados (hoja original + particiones) a CSV,
+# XLSX o Parquet para un rango de fechas, leyendo y escribiendo de a bloques: la memoria queda
+# acotada por el tamanio de bloque y no por el largo del historial.
+# Uso: python exportacion.py --origen export/ --salida contador_2025.xlsx --desde 01/01/2025 --hasta 31/12/2025
+#   --origen es una carpeta con el formato de BackendCSV. CSV y Parquet escriben un archivo por hoja
+#   en la carpeta --salida (que a su vez sirve de --origen); XLSX, una hoja por tabla en un solo archivo.
+import argparse
+import io
+import os
+import sys
+import tempfile
+import zipfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import calculos
+from almacenamiento import HOJA_CONSUMOS, HOJA_HISTORIAL, HOJA_PAGOS, BackendCSV, particiones
+from sucursales import es_columna_medio
+
+HOJAS = [HOJA_HISTORIAL, HOJA_PAGOS, HOJA_CONSUMOS]
+FORMATOS = ["csv", "xlsx", "parquet"]
+TAMANIO_BLOQUE = 5000
+COLUMNAS_NUMERICAS = {"Balanza", "Diferencia", "Monto", *calculos.COLUMNAS_JUSTIFICADAS}
+
+
+def es_numerica(columna):
+    # Ademas de las fijas, lo cobrado por cada medio digital ("Digital Mercado Pago")
+    return columna in COLUMNAS_NUMERICAS or es_columna_medio(columna)
+
+
+# --- 1. LECTURA POR BLOQUES ---
+def hojas_a_exportar(nombres, hoja, desde=None, hasta=None):
+    # Hoja original y particiones cuyo mes cae en el rango; las demas ni se leen
+    mes_desde = desde.strftime("%Y-%m") if desde is not None else "0000-00"
+    mes_hasta = hasta.strftime("%Y-%m") if hasta is not None else "9999-99"
+    en_rango = sorted(((mes, nombre) for (_, mes), nombre in particiones(nombres, hoja).items() if mes_desde <= mes <= mes_hasta))
+    return ([hoja] if hoja in nombres else []) + [nombre for _, nombre in en_rango]
+
+
+def _columnas(encabezados):
+    columnas = []
+    for encabezado in encabezados.values():
+        columnas += [c for c in encabezado if c and c not in columnas]
+    return columnas
+
+
+def _tipar(bloque):
+    for columna in bloque.columns:
+        if es_numerica(columna):
+            bloque[columna] = pd.to_numeric(bloque[columna], errors="coerce")
+        else:
+            bloque[columna] = bloque[columna].fillna("").astype(str)
+    return bloque
+
+
+def leer_bloques(backend, hojas, columnas, desde=None, hasta=None, tamanio=TAMANIO_BLOQUE):
+    for hoja in hojas:
+        for bloque in backend.leer_bloques(hoja, tamanio):
+            if desde is not None or hasta is not None:
+                fechas = pd.to_datetime(bloque["Fecha"], format="%d/%m/%Y", errors="coerce")
+                dentro = fechas.notna()
+                if desde is not None:
+                    dentro &= fechas >= desde
+                if hasta is not None:
+                    dentro &= fechas <= hasta
+                bloque = bloque[dentro]
+            if not bloque.empty:
+                yield _tipar(bloque.reindex(columns=columnas, fill_value=""))
+
+
+# --- 2. ESCRITURA POR BLOQUES ---
+def _escribir_csv(ruta, bloques, columnas):
+    filas = 0
+    with open(ruta, "w", newline="", encoding="utf-8") as f:
+        pd.DataFrame(columns=columnas).to_csv(f, index=False)
+        for bloque in bloques:
+            bloque.to_csv(f, header=False, index=False)
+            filas += len(bloque)
+    return filas
+
+
+def _escribir_parquet(ruta, bloques, columnas):
+    # Un row group por bloque, con el mismo esquema aunque una particion no tenga todas las columnas
+    esquema = pa.schema([(c, pa.float64() if es_numerica(c) else pa.string()) for c in columnas])
+    filas = 0
+    with pq.ParquetWriter(ruta, esquema) as escritor:
+        for bloque in bloques:
+            escritor.write_table(pa.Table.from_pandas(bloque, schema=esquema, preserve_index=False))
+            filas += len(bloque)
+    return filas
+
+
+def _escribir_hoja_xlsx(libro, hoja, bloques, columnas):
+    # En modo write_only openpyxl vuelca cada fila a disco, no arma la planilla en memoria
+    ws = libro.create_sheet(hoja)
+    ws.append(columnas)
+    filas = 0
+    for bloque in bloques:
+        for fila in bloque.itertuples(index=False, name=None):
+            ws.append([None if isinstance(v, float) and v != v else v for v in fila])
+        filas += len(bloque)
+    return filas
+
+
+def exportar(backend, salida, formato="csv", desde=None, hasta=None, tamanio=TAMANIO_BLOQUE):
+    # Devuelve {hoja: filas exportadas}
+    nombres = backend.listar_hojas()
+    por_hoja = {hoja: hojas_a_exportar(nombres, hoja, desde, hasta) for hoja in HOJAS}
+    encabezados = backend.encabezados([nombre for hojas in por_hoja.values() for nombre in hojas])
+    columnas = {hoja: _columnas({n: encabezados[n] for n in hojas}) for hoja, hojas in por_hoja.items()}
+
+    # Una hoja que no existe (o sin particiones en el rango) no genera archivo: un CSV sin
+    # encabezado no se puede volver a leer como --origen
+    exportables = [hoja for hoja in HOJAS if columnas[hoja]]
+    filas = dict.fromkeys(HOJAS, 0)
+
+    def bloques(hoja):
+        return leer_bloques(backend, por_hoja[hoja], columnas[hoja], desde, hasta, tamanio)
+
+    if formato == "xlsx":
+        from openpyxl import Workbook
+
+        libro = Workbook(write_only=True)
+        filas.update({hoja: _escribir_hoja_xlsx(libro, hoja, bloques(hoja), columnas[hoja]) for hoja in exportables})
+        libro.save(salida)
+        return filas
+
+    escribir = _escribir_parquet if formato == "parquet" else _escribir_csv
+    os.makedirs(salida, exist_ok=True)
+    filas.update({hoja: escribir(os.path.join(salida, f"{hoja}.{formato}"), bloques(hoja), columnas[hoja]) for hoja in exportables})
+    return filas
+
+
+def exportar_archivo(backend, formato="csv", desde=None, hasta=None):
+    # Para descargar desde la app: XLSX tal cual, CSV y Parquet en un .zip con un archivo por hoja
+    with tempfile.TemporaryDirectory() as tmp:
+        if formato == "xlsx":
+            ruta = os.path.join(tmp, "cierres.xlsx")
+            filas = exportar(backend, ruta, formato, desde, hasta)
+            with open(ruta, "rb") as f:
+                return "cierres.xlsx", f.read(), filas
+        filas = exportar(backend, tmp, formato, desde, hasta)
+        contenido = io.BytesIO()
+        with zipfile.ZipFile(contenido, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for hoja in HOJAS:
+                if os.path.exists(os.path.join(tmp, f"{hoja}.{formato}")):
+                    zf.write(os.path.join(tmp, f"{hoja}.{formato}"), f"{hoja}.{formato}")
+        return f"cierres_{formato}.zip", contenido.getvalue(), filas
+
+
+# --- 3. LÍNEA DE COMANDOS ---
+def _fecha_arg(texto):
+    return pd.to_datetime(texto, format="%d/%m/%Y")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta el historial de cierres a CSV, XLSX o Parquet.")
+    parser.add_argument("--origen", required=True, help="Carpeta con los CSV de las hojas (formato de BackendCSV)")
+    parser.add_argument("--salida", required=True, help="Archivo .xlsx o carpeta para CSV / Parquet")
+    parser.add_argument("--formato", choices=FORMATOS, help="Por defecto, xlsx si la salida termina en .xlsx y si no csv")
+    parser.add_argument("--desde", type=_fecha_arg, help="Fecha inicial dd/mm/aaaa")
+    parser.add_argument("--hasta", type=_fecha_arg, help="Fecha final dd/mm/aaaa")
+    parser.add_argument("--bloque", type=int, default=TAMANIO_BLOQUE, help="Filas por bloque de lectura y escritura")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.origen):
+        print(f"No existe la carpeta {args.origen}", file=sys.stderr)
+        return 1
+    formato = args.formato or ("xlsx" if args.salida.endswith(".xlsx") else "csv")
+    filas = exportar(BackendCSV(args.origen), args.salida, formato, args.desde, args.hasta, args.bloque)
+    for hoja, cantidad in filas.items():
+        print(f"{hoja}: {cantidad} filas")
+    print(f"-> {args.salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
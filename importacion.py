@@ -0,0 +1,250 @@
+import argparse
+import io
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+import calculos
+from almacenamiento import COLUMNA_ID, HOJA_CONSUMOS, HOJA_DIRECTORIO, HOJA_HISTORIAL, HOJA_PAGOS, BackendCSV, claves_de_filas, hoja_particion, mes_particion
+from sucursales import PROVEEDORES_POR_DEFECTO, es_columna_medio
+
+# --- CARGA MASIVA DE MONTOS ---
+# Acepta montos pegados desde una planilla o un CSV, en formato local ("$ 1.234,56")
+# o con punto decimal ("1234.56"). Todo se interpreta de una vez con operaciones vectorizadas.
+_FORMATO_LOCAL = r"\d{1,3}(?:\.\d{3})+(?:,\d+)?|[\d.]*,\d+"
+
+
+def _separar(texto):
+    return [t for t in re.split(r"[\n\r\t;]+|\s{2,}", texto) if t.strip()]
+
+
+def parsear_montos(valores):
+    # Devuelve (montos validos como array, textos que no se pudieron interpretar)
+    if isinstance(valores, str):
+        valores = _separar(valores)
+    crudos = pd.Series(list(valores), dtype=object).astype(str)
+    if crudos.empty:
+        return np.array([], dtype=float), []
+    montos = a_montos(crudos)
+    validos = montos.notna() & (montos >= 0)
+    return montos[validos].to_numpy(dtype=float), crudos[~validos].tolist()
+
+
+def a_montos(crudos):
+    # Serie de textos -> serie de montos (NaN donde no se pudo interpretar)
+    limpios = crudos.astype(str).str.replace(r"[$\s]", "", regex=True)
+    local = limpios.str.fullmatch(_FORMATO_LOCAL)
+    normalizados = limpios.where(
+        ~local, limpios.str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+    )
+    normalizados = normalizados.where(local, normalizados.str.replace(",", "", regex=False))
+    return pd.to_numeric(normalizados, errors="coerce")
+
+
+def leer_montos_csv(archivo):
+    # Con encabezado "Monto" se usa esa columna; si no, se toma un monto por linea
+    texto = archivo.read()
+    if isinstance(texto, bytes):
+        texto = texto.decode("utf-8-sig")
+    lineas = [linea for linea in texto.splitlines() if linea.strip()]
+    if not lineas:
+        return np.array([], dtype=float), []
+    separador = next((sep for sep in [";", "\t", ","] if "Monto" in lineas[0].split(sep)), None)
+    if separador is None:
+        return parsear_montos([re.split(r"[;\t]", linea)[0] for linea in lineas])
+    df = pd.read_csv(io.StringIO(texto), sep=separador, dtype=str, keep_default_na=False)
+    return parsear_montos(df["Monto"])
+
+
+# --- IMPORTACIÓN DE CIERRES ---
+# Carga cierres pasados (planillas en papel, otra sucursal) con la misma estructura que genera
+# exportacion.py: Historial, Pagos_Proveedores y Consumo_Empleados. Cada fila se valida con las
+# reglas de la app y los cierres validos se escriben de a lotes, muchos cierres por pedido.
+FORMAS_PAGO = ["Efectivo", "Digital / Banco"]
+ESTADOS = ["OK", "FALTANTE", "SOBRANTE"]
+TAMANIO_LOTE = 200
+
+# Mismas columnas (y orden) que escribe la app al guardar un cierre
+COLUMNAS_HISTORIAL = ["Fecha", "Sucursal", "Caja", "Cajero", "Balanza", *calculos.COLUMNAS_JUSTIFICADAS, "Diferencia", "Estado", COLUMNA_ID]
+COLUMNAS_PAGOS = ["Proveedor", "Forma Pago", "Nro Factura", "Monto", "Fecha", "Cajero", "Sucursal", "Caja", COLUMNA_ID]
+COLUMNAS_CONSUMOS = ["Fecha", "Sucursal", "Empleado", "Monto", COLUMNA_ID]
+
+
+def _texto(df, columna):
+    if columna not in df.columns:
+        return pd.Series("", index=df.index)
+    return df[columna].fillna("").astype(str).str.strip()
+
+
+class _Validacion:
+    # Acumula el primer motivo de rechazo de cada fila
+    def __init__(self, hoja, df):
+        self.hoja = hoja
+        self.df = df
+        self.validas = pd.Series(True, index=df.index)
+        self.errores = []
+
+    def regla(self, invalidas, motivo):
+        nuevas = self.validas & invalidas
+        if nuevas.any():
+            self.errores.append(pd.DataFrame({"Hoja": self.hoja, "Fila": self.df.index[nuevas] + 2, "Motivo": motivo}))
+        self.validas &= ~invalidas
+
+    def fechas(self):
+        fechas = pd.to_datetime(_texto(self.df, "Fecha"), format="%d/%m/%Y", errors="coerce")
+        self.regla(fechas.isna(), "Fecha invalida (dd/mm/aaaa)")
+        return fechas.dt.strftime("%d/%m/%Y")
+
+    def monto(self, columna, obligatorio=True):
+        crudos = _texto(self.df, columna)
+        montos = a_montos(crudos if obligatorio else crudos.replace("", "0"))
+        self.regla(montos.isna() | (montos < 0), f"{columna} invalido o negativo")
+        return montos
+
+
+def validar_cierres(hojas, proveedores=None):
+    # Devuelve ({hoja: filas validas listas para guardar}, DataFrame de errores Hoja/Fila/Motivo)
+    proveedores = set(proveedores or PROVEEDORES_POR_DEFECTO)
+    vacio = pd.DataFrame()
+
+    historial = _Validacion(HOJA_HISTORIAL, hojas.get(HOJA_HISTORIAL, vacio))
+    fechas = historial.fechas()
+    historial.regla(_texto(historial.df, "Cajero") == "", "Falta el Cajero")
+    montos = {c: historial.monto(c, obligatorio=False) for c in ["Balanza", *calculos.COLUMNAS_JUSTIFICADAS]}
+    # Desglose por medio digital: opcional, vacio en los cierres anteriores a esas columnas
+    medios = [c for c in historial.df.columns if es_columna_medio(c)]
+    montos.update({c: historial.monto(c, obligatorio=False).where(_texto(historial.df, c) != "") for c in medios})
+    # Diferencia y Estado guardados: opcionales (la Diferencia puede ser negativa)
+    diferencia_texto = _texto(historial.df, "Diferencia")
+    negativa = diferencia_texto.str.match(r"\$?\s*-")
+    diferencia = a_montos(diferencia_texto.str.replace(r"^(\$?\s*)-", r"\1", regex=True)).where(~negativa, lambda d: -d)
+    historial.regla((diferencia_texto != "") & diferencia.isna(), "Diferencia invalida")
+    historial.regla(~_texto(historial.df, "Estado").isin(["", *ESTADOS]), "Estado invalido")
+    claves = claves_de_filas(historial.df.assign(Fecha=fechas.fillna("")))
+    historial.regla(claves.duplicated(), "Cierre repetido en el archivo")
+    # Las columnas se agregan antes de filtrar: asignar una Serie a un DataFrame sin filas
+    # le copia el indice y volveria a agregar las filas rechazadas
+    cierres = historial.df.assign(Fecha=fechas, **montos, Diferencia=diferencia, **{COLUMNA_ID: claves})[historial.validas]
+    # Se conservan los que vienen cargados (como en el resumen y las tendencias); solo se calculan los vacios
+    registradas = calculos.diferencias_registradas(cierres)
+    cierres = cierres.assign(Diferencia=registradas["Diferencia"], Estado=registradas["Estado"])
+    cierres = cierres.reindex(columns=[*COLUMNAS_HISTORIAL[:-1], *medios, COLUMNA_ID], fill_value="").fillna("")
+    por_clave = cierres.set_index(COLUMNA_ID)
+
+    # Fecha -> clave, solo de las fechas con un unico cierre
+    fechas_cierres = por_clave["Fecha"]
+    unicas = fechas_cierres[~fechas_cierres.duplicated(keep=False)]
+    cierre_del_dia = pd.Series(unicas.index, index=unicas.to_numpy())
+
+    def del_cierre(validacion, fechas_filas, montos_filas):
+        # Las filas hijas toman Fecha, Cajero, Sucursal y Caja de su cierre
+        claves_filas = claves_de_filas(validacion.df.assign(Fecha=fechas_filas.fillna("")))
+        # Filas anteriores a "ID Cierre" sin Cajero (Consumo_Empleados): van al cierre de esa
+        # Fecha si ese dia hubo uno solo, como en reportes_lote
+        por_fecha = fechas_filas.map(cierre_del_dia)
+        sin_cierre = ~claves_filas.isin(por_clave.index) & (_texto(validacion.df, COLUMNA_ID) == "") & por_fecha.notna()
+        claves_filas = claves_filas.mask(sin_cierre, por_fecha)
+        validacion.regla(~claves_filas.isin(por_clave.index), "Sin cierre valido en Historial (falta ID Cierre, o Cajero con varios cierres en la fecha)")
+        filas = validacion.df.assign(Monto=montos_filas, **{COLUMNA_ID: claves_filas})[validacion.validas]
+        for columna in ["Fecha", "Cajero", "Sucursal", "Caja"]:
+            filas[columna] = filas[COLUMNA_ID].map(por_clave[columna])
+        return filas
+
+    pagos = _Validacion(HOJA_PAGOS, hojas.get(HOJA_PAGOS, vacio))
+    fechas_pagos = pagos.fechas()
+    monto_pagos = pagos.monto("Monto")
+    pagos.regla(~_texto(pagos.df, "Proveedor").isin(proveedores), "Proveedor desconocido")
+    pagos.regla(~_texto(pagos.df, "Forma Pago").isin(FORMAS_PAGO), "Forma Pago invalida")
+    filas_pagos = del_cierre(pagos, fechas_pagos, monto_pagos)
+
+    consumos = _Validacion(HOJA_CONSUMOS, hojas.get(HOJA_CONSUMOS, vacio))
+    fechas_consumos = consumos.fechas()
+    monto_consumos = consumos.monto("Monto")
+    consumos.regla(_texto(consumos.df, "Empleado") == "", "Falta el Empleado")
+    filas_consumos = del_cierre(consumos, fechas_consumos, monto_consumos)
+
+    validas = {
+        HOJA_HISTORIAL: cierres,
+        HOJA_PAGOS: filas_pagos.reindex(columns=COLUMNAS_PAGOS, fill_value="").fillna(""),
+        HOJA_CONSUMOS: filas_consumos.reindex(columns=COLUMNAS_CONSUMOS, fill_value="").fillna(""),
+    }
+    errores = [e for v in (historial, pagos, consumos) for e in v.errores]
+    errores = pd.concat(errores, ignore_index=True) if errores else pd.DataFrame(columns=["Hoja", "Fila", "Motivo"])
+    return validas, errores
+
+
+def _destinos(df, hoja):
+    # Hoja (o particion sucursal/mes) de cada fila, como hojas_del_cierre
+    return pd.Series([hoja_particion(hoja, sucursal, mes_particion(fecha) if sucursal else None)
+                      for sucursal, fecha in zip(df["Sucursal"], df["Fecha"])], index=df.index)
+
+
+def _para_hoja(df, hoja, destino):
+    # Las hojas originales no tienen columnas de sucursal; los montos en cero no se guardan (igual que la app)
+    if destino == hoja:
+        df = df.drop(columns=[c for c in ["Sucursal", "Caja"] if c in df.columns])
+    if hoja != HOJA_HISTORIAL:
+        df = df[df["Monto"] > 0]
+    return df
+
+
+def importar_cierres(backend, validas, tamanio_lote=TAMANIO_LOTE, progreso=None):
+    # Omite los cierres que ya estaban guardados y escribe el resto de a `tamanio_lote` cierres por pedido
+    cierres = validas[HOJA_HISTORIAL]
+    destinos = _destinos(cierres, HOJA_HISTORIAL)
+    guardadas = set()
+    for destino in destinos.unique():
+        guardadas |= backend.claves_guardadas(destino)
+    claves = cierres.loc[~cierres[COLUMNA_ID].isin(guardadas), COLUMNA_ID]
+    # Numero de lote de cada cierre; las filas de las tres hojas se reparten una sola vez
+    numero_lote = pd.Series(np.arange(len(claves)) // tamanio_lote, index=claves.to_numpy())
+    por_lote = {}
+    for hoja, df in validas.items():
+        numeros = df[COLUMNA_ID].map(numero_lote)
+        filas = df[numeros.notna()]
+        for (numero, destino), grupo in filas.groupby([numeros[numeros.notna()], _destinos(filas, hoja)]):
+            grupo = _para_hoja(grupo, hoja, destino)
+            if not grupo.empty:
+                por_lote.setdefault(int(numero), {})[destino] = grupo
+
+    lotes = -(-len(claves) // tamanio_lote)
+    for numero in range(lotes):
+        backend.agregar_lote(por_lote.get(numero, {}))
+        if progreso:
+            progreso(numero + 1, lotes)
+    hojas_escritas = sorted({destino for lote in por_lote.values() for destino in lote})
+    return {"importados": len(claves), "existentes": len(cierres) - len(claves), "hojas": hojas_escritas}
+
+
+# --- LÍNEA DE COMANDOS ---
+# Uso: python importacion.py --origen cierres_papel.xlsx --destino export/ [--solo-validar]
+#   --origen es un .xlsx o una carpeta con las tres hojas (el formato de exportacion.py);
+#   --destino es una carpeta con el formato de BackendCSV. Para Google Sheets, usar la app.
+def main(argv=None):
+    from reportes_lote import leer_origen
+
+    parser = argparse.ArgumentParser(description="Valida e importa cierres desde CSV / XLSX.")
+    parser.add_argument("--origen", required=True, help="Archivo .xlsx o carpeta con los CSV de las hojas")
+    parser.add_argument("--destino", required=True, help="Carpeta destino (formato de BackendCSV)")
+    parser.add_argument("--lote", type=int, default=TAMANIO_LOTE, help="Cierres por escritura")
+    parser.add_argument("--solo-validar", action="store_true", help="Informa los errores sin escribir nada")
+    args = parser.parse_args(argv)
+
+    destino = BackendCSV(args.destino)
+    directorio = destino.leer(HOJA_DIRECTORIO)
+    proveedores = directorio["Proveedor"].tolist() + ["Otro"] if "Proveedor" in directorio.columns else None
+    validas, errores = validar_cierres(leer_origen(args.origen), proveedores)
+    if not errores.empty:
+        print(errores.to_string(index=False), file=sys.stderr)
+    print(f"{len(validas[HOJA_HISTORIAL])} cierres validos, {len(errores)} filas con errores")
+    if args.solo_validar:
+        return 0
+    resultado = importar_cierres(destino, validas, args.lote)
+    print(f"{resultado['importados']} cierres importados, {resultado['existentes']} ya estaban guardados -> {args.destino}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+import pandas as pd
+
+from almacenamiento import BackendHojas
+
+# --- 1. CONFIGURACIÓN ---
+# Los tiempos por bloque siempre se miden (son baratos). Cada sesion con ?diagnostico=1 escribe
+# sus propios tiempos en el archivo JSONL compartido; las operaciones contra Sheets no son de
+# ninguna sesion y sus bytes y tiempos solo van al archivo con CIERRE_DIAGNOSTICO=1.
+ARCHIVO_DIAGNOSTICO = os.environ.get("CIERRE_DIAGNOSTICO_ARCHIVO", os.path.join(".diagnostico", "tiempos.jsonl"))
+# Al superar este tamanio el archivo pasa a ser tiempos.jsonl.1 (se pisa el anterior)
+MAX_BYTES_DIAGNOSTICO = int(os.environ.get("CIERRE_DIAGNOSTICO_MAX_BYTES", 5 * 1024 * 1024))
+
+_activo = os.environ.get("CIERRE_DIAGNOSTICO") == "1"
+_lock = threading.Lock()
+_eventos_sheets = deque(maxlen=200)
+
+
+def activo():
+    return _activo
+
+
+def tamanio_df(df):
+    return int(df.memory_usage(deep=True).sum()) if _activo else None
+
+
+def _evento(sesion, fase, segundos, filas=None, bytes_=None):
+    return {
+        "ts": round(time.time(), 3), "sesion": sesion, "fase": fase,
+        "ms": round(segundos * 1000, 3), "filas": filas, "bytes": bytes_,
+    }
+
+
+def _escribir(evento):
+    with _lock:
+        os.makedirs(os.path.dirname(ARCHIVO_DIAGNOSTICO) or ".", exist_ok=True)
+        if os.path.exists(ARCHIVO_DIAGNOSTICO) and os.path.getsize(ARCHIVO_DIAGNOSTICO) > MAX_BYTES_DIAGNOSTICO:
+            os.replace(ARCHIVO_DIAGNOSTICO, ARCHIVO_DIAGNOSTICO + ".1")
+        with open(ARCHIVO_DIAGNOSTICO, "a", encoding="utf-8") as f:
+            f.write(json.dumps(evento) + "\n")
+
+
+# --- 2. TIEMPOS POR SESIÓN ---
+# Guarda las ultimas corridas de cada fase (bloque, fragmento o corrida completa) de una sesion.
+class RegistroTiempos:
+    def __init__(self, maximo=50, diagnostico=False):
+        self.maximo = maximo
+        # Solo de esta sesion: otra sesion sin ?diagnostico=1 no escribe nada
+        self.diagnostico = diagnostico
+        self.sesion = uuid.uuid4().hex[:8]
+        self.fases = {}
+        self.eventos = deque(maxlen=500)
+
+    def registrar(self, fase, segundos, filas=None, bytes_=None):
+        evento = _evento(self.sesion, fase, segundos, filas, bytes_)
+        self.fases.setdefault(fase, deque(maxlen=self.maximo)).append(evento)
+        self.eventos.append(evento)
+        if self.diagnostico or _activo:
+            _escribir(evento)
+
+    @contextmanager
+    def medir(self, fase):
+        # El bloque medido puede completar medida["filas"] y medida["bytes"]
+        medida = {}
+        inicio = time.perf_counter()
+        try:
+            yield medida
+        finally:
+            self.registrar(fase, time.perf_counter() - inicio, medida.get("filas"), medida.get("bytes"))
+
+    def resumen(self):
+        filas = []
+        for fase, eventos in self.fases.items():
+            if not eventos:
+                continue
+            ms = [e["ms"] for e in eventos]
+            filas.append({
+                "Fase": fase, "Ultima (ms)": ms[-1], "Promedio (ms)": sum(ms) / len(ms),
+                "Corridas": len(ms), "Filas": eventos[-1]["filas"], "Bytes": eventos[-1]["bytes"],
+            })
+        return pd.DataFrame(filas, columns=["Fase", "Ultima (ms)", "Promedio (ms)", "Corridas", "Filas", "Bytes"])
+
+    def exportar_jsonl(self):
+        return "".join(json.dumps(e) + "\n" for e in self.eventos)
+
+
+# --- 3. OPERACIONES CONTRA LAS HOJAS ---
+# El backend es compartido por todas las sesiones (vive en st.cache_resource),
+# asi que sus mediciones van a un registro del proceso y no a una sesion en particular.
+def registrar_sheets(fase, segundos, filas=None, bytes_=None):
+    evento = _evento("compartida", fase, segundos, filas, bytes_)
+    _eventos_sheets.append(evento)
+    if _activo:
+        _escribir(evento)
+
+
+def eventos_sheets():
+    return pd.DataFrame(list(_eventos_sheets), columns=["ts", "fase", "ms", "filas", "bytes"])
+
+
+class BackendMedido(BackendHojas):
+    def __init__(self, backend):
+        self.backend = backend
+
+    def __getattr__(self, nombre):
+        return getattr(self.backend, nombre)
+
+    def _medir(self, fase, funcion, *args):
+        inicio = time.perf_counter()
+        resultado = funcion(*args)
+        segundos = time.perf_counter() - inicio
+        if isinstance(resultado, pd.DataFrame):
+            registrar_sheets(fase, segundos, len(resultado), tamanio_df(resultado))
+        elif isinstance(resultado, set):
+            registrar_sheets(fase, segundos, len(resultado))
+        else:
+            registrar_sheets(fase, segundos)
+        return resultado
+
+    def leer(self, hoja):
+        return self._medir(f"Sheets leer {hoja}", self.backend.leer, hoja)
+
+    def leer_desde(self, hoja, desde):
+        return self._medir(f"Sheets leer_desde {hoja}", self.backend.leer_desde, hoja, desde)
+
+    def claves_guardadas(self, hoja):
+        return self._medir(f"Sheets claves {hoja}", self.backend.claves_guardadas, hoja)
+
+    def listar_hojas(self):
+        return self._medir("Sheets listar hojas", self.backend.listar_hojas)
+
+    def encabezados(self, hojas):
+        return self._medir("Sheets encabezados", self.backend.encabezados, hojas)
+
+    def leer_bloques(self, hoja, tamanio):
+        # Cada bloque se registra como una lectura aparte
+        bloques = self.backend.leer_bloques(hoja, tamanio)
+        while True:
+            bloque = self._medir(f"Sheets bloque {hoja}", next, bloques, None)
+            if bloque is None:
+                return
+            yield bloque
+
+    def agregar_filas(self, hoja, df):
+        self.agregar_lote({hoja: df})
+
+    def agregar_lote(self, lote):
+        inicio = time.perf_counter()
+        self.backend.agregar_lote(lote)
+        bytes_ = sum(tamanio_df(df) for df in lote.values()) if _activo else None
+        registrar_sheets("Sheets agregar_lote", time.perf_counter() - inicio, sum(len(df) for df in lote.values()), bytes_)
+
+
+# --- 4. PERCENTILES DE LAS ÚLTIMAS SESIONES ---
+def percentiles(archivo=None, ultimos=5000):
+    # Toma las ultimas lineas del archivo actual y, si no alcanzan, del rotado
+    archivo = archivo or ARCHIVO_DIAGNOSTICO
+    existentes = [ruta for ruta in (archivo + ".1", archivo) if os.path.exists(ruta)]
+    if not existentes:
+        return pd.DataFrame(columns=["Fase", "p50 (ms)", "p95 (ms)", "Muestras"])
+    lineas = deque(maxlen=ultimos)
+    for ruta in existentes:
+        with open(ruta, encoding="utf-8") as f:
+            lineas.extend(f)
+    eventos = pd.DataFrame([json.loads(linea) for linea in lineas if linea.strip()])
+    agrupado = eventos.groupby("fase")["ms"]
+    return pd.DataFrame({
+        "p50 (ms)": agrupado.quantile(0.5),
+        "p95 (ms)": agrupado.quantile(0.95),
+        "Muestras": agrupado.size(),
+    }).reset_index().rename(columns={"fase": "Fase"})
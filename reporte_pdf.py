@@ -0,0 +1,207 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from fpdf import FPDF
+
+import calculos
+
+RUTA_LOGO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logo.png")
+DIAS_SEMANA = ["Lunes", "Martes", "Miercoles", "Jueves", "Viernes", "Sabado", "Domingo"]
+MAX_PDFS_CACHEADOS = 32
+
+# Lo comparten todas las sesiones (cada una corre en su propio hilo)
+_pdfs_cacheados = OrderedDict()
+_lock_pdfs = threading.Lock()
+
+
+# --- 1. ENCABEZADO DEL REPORTE ---
+@lru_cache(maxsize=1)
+def _logo_decodificado():
+    # El PNG se decodifica una sola vez por proceso y se reutiliza en cada documento. En fpdf 1.7
+    # image() solo acepta una ruta, de ahi _parsepng y pdf.images: la version queda fijada en
+    # requirements.txt (fpdf2 cambia ambos, y tambien output(), que aca devuelve str)
+    if not os.path.exists(RUTA_LOGO):
+        return None
+    try:
+        return FPDF()._parsepng(RUTA_LOGO)
+    except Exception:
+        return None
+
+
+def _nuevo_documento(fecha, cajero):
+    # El encabezado se dibuja en cada documento; lo unico que se reutiliza es el logo decodificado
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_margins(15, 15, 15)
+
+    logo = _logo_decodificado()
+    if logo is not None:
+        pdf.images[RUTA_LOGO] = dict(logo, i=1)
+        pdf.image(RUTA_LOGO, 15, 10, 30)
+
+    fecha_texto = f"{DIAS_SEMANA[fecha.weekday()]} {fecha.strftime('%d/%m/%Y')}"
+
+    pdf.set_xy(50, 12); pdf.set_font("Arial", 'B', 18); pdf.cell(0, 10, "ESTANCIA SAN FRANCISCO", ln=1)
+    pdf.set_xy(50, 20); pdf.set_font("Arial", '', 12); pdf.cell(0, 8, "Reporte de Cierre de Caja", ln=1)
+    pdf.set_xy(130, 12); pdf.set_font("Arial", 'B', 10); pdf.cell(60, 6, f"FECHA: {fecha_texto}", ln=1, align='R')
+    pdf.set_x(130); pdf.cell(60, 6, f"CAJERO: {cajero}", ln=1, align='R')
+    pdf.ln(15); pdf.line(15, pdf.get_y(), 195, pdf.get_y()); pdf.ln(3)
+    return pdf
+
+
+def _columnas(tabla):
+    # Cada tabla puede llegar como DataFrame, como LineasCierre (estado_caja.py), como array
+    # de montos o como un total suelto; se reduce a un array de montos y columnas de texto
+    if isinstance(tabla, pd.DataFrame):
+        if tabla.empty or "Monto" not in tabla.columns:
+            return np.array([]), {}
+        return calculos.a_numero(tabla["Monto"]), {c: tabla[c].astype(str).to_numpy() for c in tabla.columns if c != "Monto"}
+    if hasattr(tabla, "textos"):
+        return tabla.montos, {c: np.asarray(v, dtype=object) for c, v in tabla.textos.items()}
+    return np.atleast_1d(np.asarray(tabla, dtype=float)), {}
+
+
+def _lineas_tabla(tabla, label_fijo=None):
+    # Etiquetas y montos positivos como listas planas, mas el total de la tabla
+    montos, textos = _columnas(tabla)
+    if "Proveedor" in textos:
+        etiquetas = textos["Proveedor"] + " (" + textos["Forma Pago"] + ")"
+    elif "Descripción" in textos:
+        etiquetas = textos["Descripción"]
+    elif "Empleado" in textos:
+        etiquetas = textos["Empleado"]
+    else:
+        etiquetas = np.array([str(label_fijo)] * montos.size, dtype=object)
+    positivos = montos > 0
+    return etiquetas[positivos].tolist(), montos[positivos].tolist(), float(montos.sum())
+
+
+def _clave_pdf(*args):
+    h = hashlib.sha256()
+    for arg in args:
+        if isinstance(arg, pd.DataFrame):
+            h.update(repr(list(arg.columns)).encode())
+            h.update(pd.util.hash_pandas_object(arg, index=False).to_numpy().tobytes())
+        elif hasattr(arg, "textos"):
+            h.update(arg.montos.tobytes())
+            h.update(repr(arg.textos).encode())
+        elif isinstance(arg, np.ndarray):
+            h.update(arg.tobytes())
+        else:
+            h.update(repr(arg).encode())
+        h.update(b"|")
+    return h.hexdigest()
+
+
+# --- 2. REPORTE PDF DE UN CIERRE ---
+# Sin dependencias de Streamlit: lo usan tanto la app como el modo por lotes (reportes_lote.py).
+# `registradora` en None omite la linea del Ticket Fiscal (el historial no la guarda).
+# El resultado se cachea por hash de los datos: volver a pedir el mismo cierre no lo redibuja.
+def generar_pdf_profesional(fecha, cajero, balanza, registradora, total_digital, efectivo_neto,
+                            df_salidas, df_transferencias, df_errores, df_vales, df_descuentos,
+                            df_proveedores, df_empleados, diferencia, desglose_digital):
+    clave = _clave_pdf(fecha, cajero, balanza, registradora, total_digital, efectivo_neto,
+                       df_salidas, df_transferencias, df_errores, df_vales, df_descuentos,
+                       df_proveedores, df_empleados, diferencia, sorted((desglose_digital or {}).items()))
+    with _lock_pdfs:
+        if clave in _pdfs_cacheados:
+            _pdfs_cacheados.move_to_end(clave)
+            return _pdfs_cacheados[clave]
+
+    pdf = _nuevo_documento(fecha, cajero)
+
+    def dibujar_kpi(titulo, monto):
+        pdf.set_fill_color(240, 240, 240); pdf.set_font("Arial", 'B', 12)
+        pdf.cell(0, 10, f"{titulo}: $ {monto:,.2f}", ln=1, align='C', fill=True, border=1)
+        pdf.ln(2)
+
+    dibujar_kpi("1. BALANZA", balanza)
+    dibujar_kpi("2. EFECTIVO", efectivo_neto)
+    dibujar_kpi("3. DIGITAL", total_digital)
+
+    # --- PROPORCION VS DIGITAL Y EFECTIVO (Ahora arriba) ---
+    if efectivo_neto + total_digital > 0:
+        pct_efec, pct_dig = calculos.mix_ingresos(efectivo_neto, total_digital)
+        pdf.set_font("Arial", 'B', 10)
+        pdf.set_text_color(100, 100, 100) # Gris oscuro
+        pdf.cell(0, 6, f"PROPORCION: Efectivo {pct_efec:.1f}% vs Digital {pct_dig:.1f}%", ln=1, align='C')
+        pdf.set_text_color(0, 0, 0) # Volver al color negro normal
+        pdf.ln(2)
+
+    # --- DESGLOSE DIGITAL (Ahora abajo) ---
+    if desglose_digital:
+        pdf.set_font("Arial", '', 9)
+        for pos_nombre, pos_monto in desglose_digital.items():
+            if pos_monto > 0:
+                pdf.cell(130, 5, f"      - {pos_nombre}"); pdf.cell(40, 5, f"$ {pos_monto:,.2f}", align='R', ln=1)
+        pdf.ln(2)
+
+    pdf.ln(2); pdf.set_font("Arial", '', 10)
+    if registradora is not None:
+        pdf.cell(0, 6, f"Ticket Fiscal (Z): $ {registradora:,.2f}", border=0, align='C', ln=1)
+    pdf.ln(5)
+
+    def dibujar_tabla(titulo, etiquetas, montos, total=None):
+        total = sum(montos) if total is None else total
+        if total == 0: return
+        pdf.set_font("Arial", 'B', 10); pdf.set_fill_color(240, 240, 240)
+        pdf.cell(180, 6, f"  {titulo} (Total: $ {total:,.2f})", ln=1, fill=True); pdf.set_font("Arial", '', 9)
+        for txt, monto in zip(etiquetas, montos):
+            pdf.cell(130, 5, f"      - {txt}"); pdf.cell(40, 5, f"$ {monto:,.2f}", align='R', ln=1)
+        pdf.ln(2)
+
+    def dibujar_matriz(titulo, tabla, columnas=6):
+        # Grilla compacta de tickets: se dibuja fila por fila y el encabezado se repite en cada pagina nueva
+        tickets = _columnas(tabla)[0]
+        tickets = tickets[tickets > 0]
+        if tickets.size == 0: return
+        ancho = 180 / columnas
+
+        def encabezado(sufijo=""):
+            pdf.set_font("Arial", 'B', 10); pdf.set_fill_color(240, 240, 240)
+            pdf.cell(180, 6, f"  {titulo}{sufijo} ({tickets.size} tickets - Total: $ {tickets.sum():,.2f})", ln=1, fill=True)
+            pdf.set_font("Arial", '', 8)
+
+        encabezado()
+        for inicio in range(0, tickets.size, columnas):
+            if pdf.get_y() + 5 > pdf.page_break_trigger:
+                pdf.add_page(); encabezado(" (cont.)")
+            for monto in tickets[inicio:inicio + columnas].tolist():
+                pdf.cell(ancho, 5, f"$ {monto:,.2f}", border=1, align='R')
+            pdf.ln(5)
+        pdf.ln(2)
+
+    def dibujar_total(titulo, descripcion, tabla):
+        total = _lineas_tabla(tabla)[2]
+        if total > 0:
+            dibujar_tabla(titulo, [descripcion], [total])
+
+    dibujar_tabla("PAGO A PROVEEDORES", *_lineas_tabla(df_proveedores))
+    dibujar_tabla("MERCADERIA EMPLEADOS", *_lineas_tabla(df_empleados))
+    dibujar_total("TRANSFERENCIAS", "Total transferencias entrantes", df_transferencias)
+    dibujar_tabla("SALIDA DE CAJA", *_lineas_tabla(df_salidas, "Total salidas"))
+    dibujar_tabla("VALES", *_lineas_tabla(df_vales, "Total vales"))
+    dibujar_total("ERRORES", "Total errores registrados", df_errores)
+    if np.isscalar(df_descuentos):
+        # El modo por lotes solo tiene el total del dia: el historial no guarda cada ticket
+        dibujar_total("SOMOS AVELLANEDA", "Total descuentos", df_descuentos)
+    else:
+        dibujar_matriz("SOMOS AVELLANEDA", df_descuentos)
+
+    pdf.ln(5)
+    estado = calculos.estado_caja(diferencia)
+    color_texto = {"FALTANTE": (200, 0, 0), "SOBRANTE": (0, 100, 0), "OK": (0, 0, 0)}[estado]
+    pdf.set_font("Arial", 'B', 16); pdf.set_text_color(*color_texto)
+    pdf.cell(0, 14, f"CAJA REAL: $ {diferencia:,.2f} ({estado})", ln=1, align='C', border=1)
+
+    pdf_bytes = pdf.output(dest="S").encode("latin-1")
+    with _lock_pdfs:
+        _pdfs_cacheados[clave] = pdf_bytes
+        if len(_pdfs_cacheados) > MAX_PDFS_CACHEADOS:
+            _pdfs_cacheados.popitem(last=False)
+    return pdf_bytes
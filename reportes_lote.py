@@ -0,0 +1,200 @@
+# Genera los PDF de todos los cierres de un rango de fechas sin abrir la app.
+# Uso: python reportes_lote.py --origen export/ --salida cierres_marzo.zip --desde 01/03/2025 --hasta 31/03/2025
+#   --origen es una carpeta con Historial.csv, Pagos_Proveedores.csv y Consumo_Empleados.csv
+#   (el formato de BackendCSV) o un .xlsx exportado de Google Sheets con esas tres hojas.
+#   Las particiones por sucursal y mes ("Historial_ESF_2025-03") se suman a la hoja original.
+import argparse
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import calculos
+from almacenamiento import COLUMNA_ID, HOJA_CONSUMOS, HOJA_HISTORIAL, HOJA_PAGOS, BackendCSV, particiones
+from reporte_pdf import generar_pdf_profesional
+
+HOJAS = [HOJA_HISTORIAL, HOJA_PAGOS, HOJA_CONSUMOS]
+
+
+# --- 1. LECTURA DEL ORIGEN ---
+def _unir_particiones(nombres, leer):
+    return {
+        hoja: pd.concat([leer(nombre) for nombre in [hoja, *particiones(nombres, hoja).values()]], ignore_index=True).fillna("")
+        for hoja in HOJAS
+    }
+
+
+def leer_origen(ruta):
+    # `ruta` tambien puede ser un archivo .xlsx ya abierto (subido desde la app)
+    if isinstance(ruta, str) and os.path.isdir(ruta):
+        backend = BackendCSV(ruta)
+        return _unir_particiones(backend.listar_hojas(), backend.leer)
+    hojas = pd.read_excel(ruta, sheet_name=None, dtype=str)
+    return _unir_particiones(list(hojas), lambda hoja: hojas.get(hoja, pd.DataFrame()))
+
+
+def _fechas(df):
+    # Sin columna Fecha (un origen sin Historial) no hay cierres en el rango
+    if "Fecha" not in df.columns:
+        return pd.Series(pd.NaT, index=df.index)
+    return pd.to_datetime(df["Fecha"], format="%d/%m/%Y", errors="coerce")
+
+
+def _claves(df, con_cajero):
+    # Filas nuevas: "ID Cierre". Filas anteriores a esa columna: Fecha (+ Cajero si la hoja lo tiene)
+    if con_cajero and "Cajero" in df.columns:
+        clave = df["Fecha"].astype(str) + "|" + df["Cajero"].astype(str)
+    else:
+        clave = df["Fecha"].astype(str)
+    if COLUMNA_ID in df.columns:
+        clave = df[COLUMNA_ID].where(df[COLUMNA_ID].astype(str) != "", clave)
+    return clave
+
+
+def _agrupar(df, con_cajero):
+    if df.empty or "Fecha" not in df.columns:
+        return {}
+    return {clave: grupo for clave, grupo in df.groupby(_claves(df, con_cajero))}
+
+
+def armar_trabajos(hojas, desde=None, hasta=None):
+    historial = hojas[HOJA_HISTORIAL]
+    fechas = _fechas(historial)
+    en_rango = fechas.notna()
+    if desde is not None:
+        en_rango &= fechas >= desde
+    if hasta is not None:
+        en_rango &= fechas <= hasta
+    historial = historial[en_rango]
+    fechas = fechas[en_rango]
+
+    pagos = _agrupar(hojas[HOJA_PAGOS], con_cajero=True)
+    consumos = _agrupar(hojas[HOJA_CONSUMOS], con_cajero=False)
+    resumen = armar_resumen(historial)
+
+    trabajos, usados = [], set()
+    for (indice, cierre), fecha in zip(historial.iterrows(), fechas):
+        clave_pagos = cierre.get(COLUMNA_ID) or f"{cierre['Fecha']}|{cierre['Cajero']}"
+        clave_consumos = cierre.get(COLUMNA_ID) or cierre["Fecha"]
+        df_proveedores = pagos.get(clave_pagos, pd.DataFrame(columns=["Proveedor", "Forma Pago", "Monto"]))
+        df_empleados = consumos.get(clave_consumos, pd.DataFrame(columns=["Empleado", "Monto"]))
+
+        sucursal = "_".join(str(cierre[col]) for col in ["Sucursal", "Caja"] if cierre.get(col))
+        archivo = f"Cierre_{fecha:%Y-%m-%d}_{sucursal + '_' if sucursal else ''}{cierre['Cajero']}.pdf"
+        if archivo in usados:
+            archivo = archivo.replace(".pdf", f"_{indice}.pdf")
+        usados.add(archivo)
+
+        numeros = {col: float(calculos.a_numero([cierre.get(col, 0)])[0]) for col in
+                   ["Balanza", "Digital", "Efectivo", "Transferencias", "Salidas", "Vales", "Errores", "Descuentos"]}
+        # Se imprime la diferencia con la que se cerro la caja; si falta, la recalculada
+        diferencia = float(resumen.at[indice, "Diferencia"])
+        trabajos.append({
+            "archivo": archivo,
+            "fecha": fecha.date(),
+            "cajero": cierre["Cajero"],
+            "numeros": numeros,
+            "diferencia": diferencia,
+            "df_proveedores": df_proveedores.assign(Monto=calculos.a_numero(df_proveedores["Monto"])),
+            "df_empleados": df_empleados.assign(Monto=calculos.a_numero(df_empleados["Monto"])),
+        })
+    return trabajos, resumen
+
+
+def armar_resumen(historial):
+    # Diferencia y Estado son los guardados (los mismos que imprime cada PDF); la auditoria va aparte
+    registradas = calculos.diferencias_registradas(historial)
+    auditoria = calculos.auditar_historial(historial)
+    return pd.DataFrame({
+        "Fecha": historial.get("Fecha"),
+        "Sucursal": historial.get("Sucursal", ""),
+        "Caja": historial.get("Caja", ""),
+        "Cajero": historial.get("Cajero"),
+        "Diferencia": registradas["Diferencia"],
+        "Estado": registradas["Estado"],
+        "Diferencia Recalculada": auditoria["Diferencia"],
+        "Auditable": auditoria["Auditable"],
+        "Desvio": auditoria["Desvio"],
+    }, index=historial.index)
+
+
+# --- 2. RENDERIZADO EN PARALELO ---
+def renderizar(trabajo):
+    n = trabajo["numeros"]
+    pdf_bytes = generar_pdf_profesional(
+        trabajo["fecha"], trabajo["cajero"], n["Balanza"], None, n["Digital"], n["Efectivo"],
+        # El historial solo guarda totales: cada tabla va como un renglon con el monto del dia
+        n["Salidas"], n["Transferencias"], n["Errores"], n["Vales"], n["Descuentos"],
+        trabajo["df_proveedores"], trabajo["df_empleados"],
+        trabajo["diferencia"], {},
+    )
+    return trabajo["archivo"], pdf_bytes
+
+
+def renderizar_todos(trabajos, procesos=None, progreso=None):
+    # Generador: devuelve (archivo, bytes) en el mismo orden que `trabajos`
+    if procesos == 1:
+        resultados = map(renderizar, trabajos)
+        yield from _con_progreso(resultados, len(trabajos), progreso)
+        return
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        resultados = pool.map(renderizar, trabajos, chunksize=8)
+        yield from _con_progreso(resultados, len(trabajos), progreso)
+
+
+def _con_progreso(resultados, total, progreso):
+    for hechos, resultado in enumerate(resultados, start=1):
+        if progreso:
+            progreso(hechos, total)
+        yield resultado
+
+
+def escribir_zip(ruta, resultados, resumen):
+    with zipfile.ZipFile(ruta, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for archivo, pdf_bytes in resultados:
+            zf.writestr(archivo, pdf_bytes)
+        zf.writestr("resumen.csv", resumen.to_csv(index=False))
+
+
+# --- 3. LÍNEA DE COMANDOS ---
+def _fecha_arg(texto):
+    return pd.to_datetime(texto, format="%d/%m/%Y")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera los reportes PDF de todos los cierres de un rango de fechas.")
+    parser.add_argument("--origen", required=True, help="Carpeta con los CSV de las hojas o archivo .xlsx exportado")
+    parser.add_argument("--salida", required=True, help="Archivo .zip a generar")
+    parser.add_argument("--desde", type=_fecha_arg, help="Fecha inicial dd/mm/aaaa")
+    parser.add_argument("--hasta", type=_fecha_arg, help="Fecha final dd/mm/aaaa")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos en paralelo (por defecto, uno por CPU)")
+    args = parser.parse_args(argv)
+
+    trabajos, resumen = armar_trabajos(leer_origen(args.origen), args.desde, args.hasta)
+    if not trabajos:
+        print("No hay cierres en el rango indicado.", file=sys.stderr)
+        return 1
+
+    inicio = time.perf_counter()
+
+    def progreso(hechos, total):
+        velocidad = hechos / (time.perf_counter() - inicio)
+        print(f"\r[{hechos:>5}/{total}] {velocidad:6.1f} reportes/s", end="", file=sys.stderr, flush=True)
+
+    escribir_zip(args.salida, renderizar_todos(trabajos, args.procesos, progreso), resumen)
+    duracion = time.perf_counter() - inicio
+    print(file=sys.stderr)
+
+    estados = resumen["Estado"].value_counts().to_dict()
+    print(f"{len(trabajos)} reportes en {duracion:.1f}s ({len(trabajos) / duracion:.1f} reportes/s) -> {args.salida}")
+    print(f"Estados: {estados} | Diferencia acumulada: $ {resumen['Diferencia'].sum():,.2f}")
+    desvios = int((resumen["Desvio"].abs() > 0.005).sum())
+    print(f"Auditoria: {desvios} cierres con desvio | {int((~resumen['Auditable']).sum())} no auditables (sin columna Empleados)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+# --- SUCURSALES Y CAJAS ---
+# Cada sucursal define sus cajas, cajeros, empleados y medios de cobro digitales.
+# Se configuran en .streamlit/secrets.toml, por ejemplo:
+#   [sucursales.CENTRO]
+#   nombre = "Sucursal Centro"
+#   cajas = ["Caja 1", "Caja 2"]
+#   cajeros = ["Ana", "Pablo"]
+# Sin configuracion queda solo la sucursal original.
+SUCURSAL_ORIGINAL = "ESF"
+
+MEDIOS_DIGITALES = ["Mercado Pago", "Nave", "Clover", "BBVA"]
+# Cada cierre guarda en el Historial lo cobrado por cada medio: "Digital Mercado Pago", ...
+PREFIJO_MEDIO = "Digital "
+# Proveedores cuando el Directorio no se puede leer o no tiene la columna "Proveedor"
+PROVEEDORES_POR_DEFECTO = ["Pan Rustico", "Pan Fresh", "Dharma", "ValMaira", "Aprea", "CocaCola", "Grenn&Co", "Basile Walter", "Otro"]
+
+
+def columna_medio(medio):
+    return PREFIJO_MEDIO + medio
+
+
+def es_columna_medio(columna):
+    return columna.startswith(PREFIJO_MEDIO)
+
+
+SUCURSALES_POR_DEFECTO = {
+    SUCURSAL_ORIGINAL: {
+        "nombre": "Estancia San Francisco",
+        "cajas": ["Caja 1"],
+        "cajeros": ["Leandro", "Natalia", "Santiago"],
+        "empleados": ["Leandro", "Natalia", "Santiago", "Julieta", "Mariela", "Fernanda", "Brian", "Erika", "Oriana"],
+        "medios_digitales": MEDIOS_DIGITALES,
+    }
+}
+
+
+def cargar_sucursales(config=None):
+    if not config:
+        return SUCURSALES_POR_DEFECTO
+    sucursales = {}
+    for id_sucursal, datos in config.items():
+        base = SUCURSALES_POR_DEFECTO.get(id_sucursal, {
+            "nombre": id_sucursal, "cajas": ["Caja 1"], "cajeros": [], "empleados": [], "medios_digitales": MEDIOS_DIGITALES,
+        })
+        sucursales[id_sucursal] = {**base, **dict(datos)}
+    return sucursales
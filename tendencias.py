@@ -0,0 +1,200 @@
+import json
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import pandas as pd
+import plotly.graph_objects as go
+
+import calculos
+from agregados import filas_nuevas, leer_con_particiones
+from almacenamiento import HOJA_HISTORIAL
+from sucursales import PREFIJO_MEDIO, SUCURSAL_ORIGINAL, SUCURSALES_POR_DEFECTO, es_columna_medio
+
+# --- TENDENCIAS DE LARGO PLAZO ---
+# Los cierres se resumen por (dia, sucursal, caja, cajero) a medida que llegan, igual que los
+# agregados mensuales, junto con lo cobrado por cada medio digital. Cada grafico sale de esa
+# tabla chica re-muestreada a la granularidad pedida y se guarda ya serializado por
+# (grafico, rango, granularidad, sucursal).
+RANGOS = {"Ultimos 3 meses": 3, "Ultimos 6 meses": 6, "Ultimo año": 12, "Ultimos 3 años": 36, "Todo": None}
+GRANULARIDADES = {"Diaria": ("D", 1), "Semanal": ("W", 7), "Mensual": ("MS", 30)}
+# Mas puntos no se distinguen en la pantalla de la tablet y solo hacen mas pesado el grafico
+MAX_PUNTOS = 400
+MAX_FIGURAS_CACHEADAS = 64
+CAJA_ORIGINAL = SUCURSALES_POR_DEFECTO[SUCURSAL_ORIGINAL]["cajas"][0]
+
+CLAVES = ["Fecha", "Sucursal", "Caja", "Cajero"]
+COLUMNAS = ["Balanza", "Efectivo", "Digital", "Diferencia", "Faltantes", "Sobrantes", "Cierres"]
+
+
+def _layout(fig, alto=260):
+    fig.update_layout(margin=dict(t=10, b=10, l=10, r=10), height=alto,
+                      legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5))
+    return fig
+
+
+def _remuestrear(tabla, granularidad, por=None):
+    frecuencia = GRANULARIDADES[granularidad][0]
+    claves = [pd.Grouper(key="Fecha", freq=frecuencia)] + ([por] if por else [])
+    return tabla.groupby(claves)[COLUMNAS].sum().reset_index()
+
+
+# --- GRAFICOS ---
+def grafico_diferencia(tabla, granularidad):
+    serie = _remuestrear(tabla, granularidad)
+    colores = ["#c0392b" if d > 0 else "#27ae60" for d in serie["Diferencia"]]
+    return _layout(go.Figure(go.Bar(x=serie["Fecha"], y=serie["Diferencia"], marker_color=colores, name="Diferencia")))
+
+
+def grafico_mix(tabla, granularidad):
+    serie = _remuestrear(tabla, granularidad)
+    pct_efectivo, pct_digital = calculos.mix_ingresos(serie["Efectivo"].to_numpy(), serie["Digital"].to_numpy())
+    fig = go.Figure([
+        go.Scatter(x=serie["Fecha"], y=pct_efectivo, name="Efectivo", stackgroup="mix"),
+        go.Scatter(x=serie["Fecha"], y=pct_digital, name="Digital", stackgroup="mix"),
+    ])
+    return _layout(fig.update_yaxes(ticksuffix="%"))
+
+
+def grafico_cajeros(tabla, granularidad):
+    # Frecuencia en el rango completo: no depende de la granularidad
+    por_cajero = tabla.groupby("Cajero")[["Faltantes", "Sobrantes"]].sum().reset_index()
+    fig = go.Figure([
+        go.Bar(x=por_cajero["Cajero"], y=por_cajero["Faltantes"], name="FALTANTE", marker_color="#c0392b"),
+        go.Bar(x=por_cajero["Cajero"], y=por_cajero["Sobrantes"], name="SOBRANTE", marker_color="#2980b9"),
+    ])
+    return _layout(fig.update_layout(barmode="group"))
+
+
+def grafico_medios(tabla, granularidad):
+    # Lo cobrado por cada medio digital (Mercado Pago, Nave, ...); los cierres guardados antes
+    # del desglose no tienen estas columnas y esos periodos quedan sin punto, no en cero
+    medios = [c for c in tabla.columns if es_columna_medio(c)]
+    frecuencia = GRANULARIDADES[granularidad][0]
+    serie = tabla.groupby(pd.Grouper(key="Fecha", freq=frecuencia))[medios].sum(min_count=1).reset_index()
+    return _layout(go.Figure([
+        go.Bar(x=serie["Fecha"], y=serie[medio], name=medio[len(PREFIJO_MEDIO):]) for medio in medios
+    ]).update_layout(barmode="stack"))
+
+
+GRAFICOS = {
+    "diferencia": grafico_diferencia,
+    "mix": grafico_mix,
+    "cajeros": grafico_cajeros,
+    "medios": grafico_medios,
+}
+
+
+@lru_cache(maxsize=64)
+def torta_medios(efectivo, digital):
+    # Torta Efectivo vs Digital del sidebar: el JSON se reutiliza mientras los totales no cambien
+    fig = go.Figure(go.Pie(labels=["Efectivo", "Digital"], values=[efectivo, digital], hole=0.3,
+                           textinfo="percent", textposition="inside", hoverinfo="label+percent"))
+    fig.update_layout(showlegend=True, margin=dict(t=10, b=10, l=10, r=10), height=300,
+                      legend=dict(orientation="h", yanchor="bottom", y=-0.2, xanchor="center", x=0.5))
+    return fig.to_json(validate=False)
+
+
+# --- SERIES DIARIAS PRECALCULADAS ---
+class TendenciasHistorial:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._procesadas = {}
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self.dias = {}
+        # {clave del dia: {"Digital Mercado Pago": monto, ...}}, solo de los cierres con desglose
+        self.medios = {}
+        self._tabla = None
+        self._figuras = OrderedDict()
+
+    def agregar_historial(self, df):
+        if df.empty or "Fecha" not in df.columns:
+            return
+        # Diferencia y Estado guardados en cada cierre; solo los vacios se recalculan
+        registradas = calculos.diferencias_registradas(df)
+        estados = registradas["Estado"].to_numpy()
+        resumen = pd.DataFrame({
+            "Fecha": pd.to_datetime(df["Fecha"], format="%d/%m/%Y", errors="coerce").to_numpy(),
+            "Sucursal": df["Sucursal"].replace("", SUCURSAL_ORIGINAL).to_numpy() if "Sucursal" in df.columns else SUCURSAL_ORIGINAL,
+            "Caja": df["Caja"].replace("", CAJA_ORIGINAL).to_numpy() if "Caja" in df.columns else CAJA_ORIGINAL,
+            "Cajero": df["Cajero"].to_numpy(),
+            "Balanza": calculos.a_numero(df["Balanza"]),
+            "Efectivo": calculos.a_numero(df["Efectivo"]),
+            "Digital": calculos.a_numero(df["Digital"]),
+            "Diferencia": registradas["Diferencia"].to_numpy(),
+            "Faltantes": (estados == "FALTANTE").astype(int),
+            "Sobrantes": (estados == "SOBRANTE").astype(int),
+            "Cierres": 1,
+        })
+        medios = [c for c in df.columns if es_columna_medio(c)]
+        for medio in medios:
+            resumen[medio] = pd.to_numeric(df[medio], errors="coerce").to_numpy()
+        resumen = resumen.dropna(subset=["Fecha"])
+        agrupado = resumen.groupby(CLAVES)
+        por_dia = agrupado[COLUMNAS].sum()
+        for clave, valores in zip(por_dia.index, por_dia.to_numpy(dtype=float)):
+            acumulado = self.dias.get(clave)
+            self.dias[clave] = valores if acumulado is None else acumulado + valores
+        if medios:
+            por_medio_dia = agrupado[medios].sum(min_count=1)
+            for clave, montos in zip(por_medio_dia.index, por_medio_dia.to_numpy(dtype=float)):
+                por_medio = self.medios.setdefault(clave, {})
+                for medio, monto in zip(medios, montos):
+                    if monto == monto:
+                        por_medio[medio] = por_medio.get(medio, 0.0) + monto
+        # Datos nuevos: los graficos serializados ya no valen
+        self._tabla = None
+        self._figuras.clear()
+
+    def actualizar(self, cache_local):
+        with self._lock:
+            tablas = leer_con_particiones(cache_local, HOJA_HISTORIAL)
+            nuevas, reiniciar = filas_nuevas(tablas, self._procesadas, cache_local.versiones(tablas))
+            if reiniciar:
+                self._reiniciar()
+            for tabla in nuevas.values():
+                if not tabla.empty:
+                    self.agregar_historial(tabla)
+
+    def tabla(self):
+        if self._tabla is None:
+            if self.dias:
+                indice = pd.MultiIndex.from_tuples(list(self.dias), names=CLAVES)
+                tabla = pd.DataFrame(list(self.dias.values()), index=indice, columns=COLUMNAS)
+                if self.medios:
+                    medios = pd.DataFrame([self.medios.get(clave, {}) for clave in self.dias], index=indice)
+                    tabla = tabla.join(medios[sorted(medios.columns)])
+                self._tabla = tabla.reset_index()
+            else:
+                self._tabla = pd.DataFrame(columns=CLAVES + COLUMNAS)
+        return self._tabla
+
+    def _seleccion(self, rango, sucursal=None):
+        tabla = self.tabla()
+        if sucursal is not None:
+            tabla = tabla[tabla["Sucursal"] == sucursal]
+        meses = RANGOS[rango]
+        if meses and not tabla.empty:
+            tabla = tabla[tabla["Fecha"] > tabla["Fecha"].max() - pd.DateOffset(months=meses)]
+        return tabla
+
+    def granularidades(self, rango, sucursal=None):
+        # Solo las que entran en MAX_PUNTOS; siempre queda al menos la mensual
+        tabla = self._seleccion(rango, sucursal)
+        dias = (tabla["Fecha"].max() - tabla["Fecha"].min()).days + 1 if not tabla.empty else 0
+        posibles = [nombre for nombre, (_, largo) in GRANULARIDADES.items() if dias / largo <= MAX_PUNTOS]
+        return posibles or ["Mensual"]
+
+    def figura(self, grafico, rango, granularidad, sucursal=None):
+        clave = (grafico, rango, granularidad, sucursal)
+        with self._lock:
+            if clave in self._figuras:
+                self._figuras.move_to_end(clave)
+            else:
+                fig = GRAFICOS[grafico](self._seleccion(rango, sucursal), granularidad)
+                self._figuras[clave] = fig.to_json(validate=False)
+                if len(self._figuras) > MAX_FIGURAS_CACHEADAS:
+                    self._figuras.popitem(last=False)
+            return json.loads(self._figuras[clave])
@@ -0,0 +1,108 @@
+import pandas as pd
+
+from agregados import AgregadosSucursales, IndicePagos, filas_nuevas
+from almacenamiento import HOJA_HISTORIAL, BackendCSV
+from cache_local import CacheLocal
+
+
+def _tabla(filas):
+    return pd.DataFrame({"Monto": range(filas)})
+
+
+def test_devuelve_solo_las_filas_nuevas():
+    procesadas = {}
+    nuevas, reiniciar = filas_nuevas({"A": _tabla(3), "B": _tabla(1)}, procesadas)
+    assert not reiniciar and procesadas == {"A": (0, 3), "B": (0, 1)}
+    nuevas, reiniciar = filas_nuevas({"A": _tabla(5), "B": _tabla(1)}, procesadas)
+    assert not reiniciar
+    assert nuevas["A"]["Monto"].tolist() == [3, 4]
+    assert nuevas["B"].empty
+
+
+def test_hoja_que_se_achica_reconstruye_todo():
+    procesadas = {"A": (0, 5), "B": (0, 2)}
+    nuevas, reiniciar = filas_nuevas({"A": _tabla(2), "B": _tabla(2)}, procesadas)
+    assert reiniciar
+    assert len(nuevas["A"]) == 2 and len(nuevas["B"]) == 2
+    assert procesadas == {"A": (0, 2), "B": (0, 2)}
+
+
+def test_hoja_que_el_cache_volvio_a_bajar_reconstruye_todo():
+    procesadas = {}
+    filas_nuevas({"A": _tabla(3)}, procesadas, {"A": 0})
+    # Se borro una fila a mano y se agregaron dos: mas filas que antes, pero otra version
+    nuevas, reiniciar = filas_nuevas({"A": _tabla(4)}, procesadas, {"A": 1})
+    assert reiniciar
+    assert len(nuevas["A"]) == 4
+    assert procesadas == {"A": (1, 4)}
+
+
+def _pagos():
+    return pd.DataFrame({
+        "Proveedor": ["Dharma", "Dharma", "Aprea", "Dharma", "Aprea"],
+        "Forma Pago": ["Efectivo", "Digital / Banco", "Efectivo", "Efectivo", "Cheque"],
+        "Nro Factura": ["1", " a-2", "1", "1", ""],
+        "Monto": ["1000", "500", "300", "1000", "abc"],
+        "Fecha": ["01/03/2025", "02/03/2025", "02/03/2025", "05/03/2025", "01/04/2025"],
+        "Cajero": ["Ana", "Ana", "Luis", "Luis", "Ana"],
+    })
+
+
+def test_indice_pagos_totales_por_proveedor_y_mes():
+    indice = IndicePagos()
+    indice.agregar_pagos(_pagos())
+    assert indice.meses_disponibles() == ["04/2025", "03/2025"]
+    gasto = indice.gasto_del_mes("03/2025")
+    assert gasto["Proveedor"].tolist() == ["Dharma", "Aprea"]
+    assert gasto[["Efectivo", "Digital / Banco", "Pagos", "Total"]].to_numpy().tolist() == [[2000.0, 500.0, 3, 2500.0], [300.0, 0.0, 1, 300.0]]
+    # Forma Pago desconocida cuenta como digital; monto invalido, como cero
+    assert indice.gasto_mensual("Aprea")[["Mes", "Digital / Banco", "Pagos"]].to_numpy().tolist() == [["03/2025", 0.0, 1], ["04/2025", 0.0, 1]]
+
+
+def test_buscar_factura_normaliza_el_numero():
+    indice = IndicePagos()
+    indice.agregar_pagos(_pagos())
+    assert indice.buscar_factura("A-2")["Proveedor"].tolist() == ["Dharma"]
+    assert len(indice.buscar_factura("1")) == 3
+    assert indice.buscar_factura("99").empty
+
+
+def test_facturas_duplicadas_solo_del_mismo_proveedor():
+    indice = IndicePagos()
+    indice.agregar_pagos(_pagos())
+    duplicadas = indice.facturas_duplicadas()
+    # La factura "1" de Aprea es otra factura, aunque tenga el mismo numero
+    assert duplicadas[["Factura", "Proveedor", "Fecha"]].to_numpy().tolist() == [["1", "Dharma", "01/03/2025"], ["1", "Dharma", "05/03/2025"]]
+
+
+def _cierres(fechas, efectivo):
+    return pd.DataFrame({"Fecha": fechas, "Cajero": "Ana", "Efectivo": efectivo, "Digital": "0"})
+
+
+def test_agregados_por_sucursal_leen_solo_las_particiones_del_mes(tmp_path):
+    backend = BackendCSV(str(tmp_path / "planilla"))
+    # Hojas originales (sucursal original, ESF) y particiones por sucursal y mes
+    backend.agregar_filas(HOJA_HISTORIAL, _cierres(["01/03/2025", "01/02/2025"], ["100", "200"]))
+    backend.agregar_filas("Historial_ESF_2025-03", _cierres(["02/03/2025"], ["1000"]))
+    backend.agregar_filas("Historial_CEN_2025-03", _cierres(["02/03/2025", "03/03/2025"], ["5000", "5000"]))
+    backend.agregar_filas("Historial_CEN_2025-04", _cierres(["01/04/2025"], ["7000"]))
+    backend.agregar_filas("Consumo_Empleados_CEN_2025-03", pd.DataFrame({"Fecha": ["02/03/2025"], "Empleado": ["Luis"], "Monto": ["80"]}))
+    cache = CacheLocal(backend, str(tmp_path / "cache"))
+    agregados = AgregadosSucursales()
+    agregados.actualizar_indice(cache)
+
+    assert agregados.meses_disponibles() == ["04/2025", "03/2025", "02/2025"]
+    assert agregados.meses_disponibles("CEN") == ["04/2025", "03/2025"]
+    assert agregados.meses_disponibles("ESF") == ["03/2025", "02/2025"]
+
+    agregados.actualizar(cache, "03/2025", "CEN")
+    assert agregados.resumen("03/2025", "CEN") == {"Efectivo": 10000.0, "Digital": 0.0, "Cierres": 2}
+    assert agregados.consumo_por_empleado("03/2025", "CEN") == [("Luis", 80.0)]
+    # Las particiones de otras sucursales y otros meses no se leyeron
+    assert cache.filas_cacheadas("Historial_ESF_2025-03") == 0
+    assert cache.filas_cacheadas("Historial_CEN_2025-04") == 0
+
+    agregados.actualizar(cache, "03/2025")
+    assert agregados.resumen("03/2025", "ESF") == {"Efectivo": 1100.0, "Digital": 0.0, "Cierres": 2}
+    assert agregados.resumen("03/2025") == {"Efectivo": 11100.0, "Digital": 0.0, "Cierres": 4}
+    assert agregados.consumo_por_empleado("03/2025", "ESF") == []
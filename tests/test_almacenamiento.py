@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+
+from almacenamiento import COLUMNA_ID, BackendCSV, confirmar_cierre
+
+
+def _cierre(**cambios):
+    datos = {"Fecha": "01/03/2025", "Sucursal": "ESF", "Caja": "Caja 1", "Cajero": "Ana",
+             "Balanza": 1000.0, "Efectivo": 1000.0, "Diferencia": 0.0, "Estado": "OK"}
+    datos.update(cambios)
+    return datos
+
+
+def _tablas():
+    provs = pd.DataFrame({"Proveedor": ["Dharma", "Aprea"], "Forma Pago": ["Efectivo", "Efectivo"],
+                          "Nro Factura": ["1", "2"], "Monto": [500.0, 0.0]})
+    empls = pd.DataFrame({"Empleado": ["Luis"], "Ticket": ["Con Ticket"], "Monto": [200.0]})
+    return provs, empls
+
+
+def test_guarda_las_tres_hojas_en_la_particion(tmp_path):
+    backend = BackendCSV(str(tmp_path))
+    assert confirmar_cierre(backend, _cierre(), *_tablas(), espera=0)
+    assert backend.listar_hojas() == [
+        "Consumo_Empleados_ESF_2025-03", "Historial_ESF_2025-03", "Pagos_Proveedores_ESF_2025-03",
+    ]
+    pagos = backend.leer("Pagos_Proveedores_ESF_2025-03")
+    # Los montos en cero no se guardan
+    assert pagos["Proveedor"].tolist() == ["Dharma"]
+    assert set(pagos[COLUMNA_ID]) == {"ESF|Caja 1|01/03/2025|Ana"}
+
+
+def test_segundo_guardado_del_mismo_cierre_no_duplica(tmp_path):
+    backend = BackendCSV(str(tmp_path))
+    assert confirmar_cierre(backend, _cierre(), *_tablas(), espera=0)
+    assert not confirmar_cierre(backend, _cierre(Balanza=2000.0), *_tablas(), espera=0)
+    assert len(backend.leer("Historial_ESF_2025-03")) == 1
+
+
+class _BackendQueFalla(BackendCSV):
+    # Aplica la escritura pero la primera respuesta se pierde (timeout de red)
+    def __init__(self, directorio):
+        super().__init__(directorio)
+        self.envios = 0
+
+    def agregar_lote(self, lote):
+        self.envios += 1
+        super().agregar_lote(lote)
+        if self.envios == 1:
+            raise TimeoutError
+
+
+def test_reintento_tras_envio_aplicado_no_duplica(tmp_path):
+    backend = _BackendQueFalla(str(tmp_path))
+    assert confirmar_cierre(backend, _cierre(), *_tablas(), espera=0)
+    assert backend.envios == 1
+    assert len(backend.leer("Historial_ESF_2025-03")) == 1
+
+
+def test_agota_los_intentos(tmp_path):
+    class SinConexion(BackendCSV):
+        def agregar_lote(self, lote):
+            raise ConnectionError
+
+    with pytest.raises(ConnectionError):
+        confirmar_cierre(SinConexion(str(tmp_path)), _cierre(), *_tablas(), intentos=2, espera=0)
@@ -0,0 +1,32 @@
+import pandas as pd
+
+from almacenamiento import BackendGSheets
+from benchmarks.sheets_falso import ConexionFalsa
+
+
+def test_particion_nueva_se_crea_del_ancho_del_encabezado():
+    conn = ConexionFalsa()
+    backend = BackendGSheets(conn)
+    lote = {"Historial_ESF_2025-03": pd.DataFrame({"Fecha": ["01/03/2025"], "Cajero": ["Ana"], "Balanza": [850000.5]})}
+    backend.agregar_lote(lote)
+    hoja = conn.planilla.hojas["Historial_ESF_2025-03"]
+    assert hoja.col_count == 3
+    # Una columna nueva agranda la grilla antes de escribir el encabezado
+    backend.agregar_lote({"Historial_ESF_2025-03": pd.DataFrame({"Fecha": ["02/03/2025"], "Cajero": ["Luis"], "Balanza": [1500.0], "Digital": [0.5]})})
+    assert hoja.col_count == 4
+    assert backend.leer_desde("Historial_ESF_2025-03", 0)["Balanza"].tolist() == ["850000.5", "1500"]
+
+
+def test_lee_numeros_sin_formato_regional():
+    conn = ConexionFalsa({"Historial": pd.DataFrame({"Fecha": ["01/03/2025"], "Balanza": [850000.5]})})
+    respuesta = conn.planilla.values_batch_get(["'Historial'!A2:ZZ"])
+    assert respuesta["valueRanges"][0]["values"] == [["01/03/2025", "850000,5"]]
+    assert BackendGSheets(conn).leer_desde("Historial", 0)["Balanza"].tolist() == ["850000.5"]
+
+
+def test_claves_guardadas_incluye_filas_sin_id_cierre():
+    historial = pd.DataFrame({"Fecha": ["01/03/2025", "02/03/2025"], "Cajero": ["Ana", "Luis"], "ID Cierre": ["", "02/03/2025|Luis"]})
+    conn = ConexionFalsa({"Historial": historial, "Viejo": historial.drop(columns="ID Cierre")})
+    backend = BackendGSheets(conn)
+    assert backend.claves_guardadas("Historial") == {"01/03/2025|Ana", "02/03/2025|Luis"}
+    assert backend.claves_guardadas("Viejo") == {"01/03/2025|Ana", "02/03/2025|Luis"}
@@ -0,0 +1,59 @@
+import pandas as pd
+
+from agregados import AgregadosMensuales
+from almacenamiento import HOJA_HISTORIAL, BackendCSV
+from cache_local import CacheLocal
+
+
+def _cierres(cajeros):
+    return pd.DataFrame({"Fecha": [f"0{i + 1}/03/2025" for i in range(len(cajeros))], "Cajero": cajeros,
+                         "Efectivo": "100", "Digital": "0"})
+
+
+def _reescribir(backend, df):
+    df.to_csv(backend._ruta(HOJA_HISTORIAL), index=False)
+
+
+def test_sincroniza_solo_las_filas_nuevas(tmp_path):
+    backend = BackendCSV(str(tmp_path / "planilla"))
+    backend.agregar_filas(HOJA_HISTORIAL, _cierres(["Ana", "Luis"]))
+    cache = CacheLocal(backend, str(tmp_path / "cache"))
+    assert len(cache.sincronizar(HOJA_HISTORIAL)) == 2
+    backend.agregar_filas(HOJA_HISTORIAL, pd.DataFrame({"Fecha": ["05/03/2025"], "Cajero": ["Eva"]}))
+    assert cache.sincronizar(HOJA_HISTORIAL)["Cajero"].tolist() == ["Eva"]
+    assert cache.filas_cacheadas(HOJA_HISTORIAL) == 3
+    assert cache.version(HOJA_HISTORIAL) == 0
+
+
+def test_fila_borrada_a_mano_vuelve_a_bajar_la_hoja(tmp_path):
+    backend = BackendCSV(str(tmp_path / "planilla"))
+    backend.agregar_filas(HOJA_HISTORIAL, _cierres(["Ana", "Luis", "Eva"]))
+    cache = CacheLocal(backend, str(tmp_path / "cache"))
+    cache.sincronizar(HOJA_HISTORIAL)
+    # Se borra la primera fila y despues se guardan dos cierres: las posiciones se corren
+    _reescribir(backend, pd.concat([_cierres(["Ana", "Luis", "Eva"]).iloc[1:], _cierres(["Juan", "Sol"])]))
+    cache.sincronizar(HOJA_HISTORIAL)
+    assert cache.leer(HOJA_HISTORIAL)["Cajero"].tolist() == ["Luis", "Eva", "Juan", "Sol"]
+    assert cache.version(HOJA_HISTORIAL) == 1
+
+
+def test_invalidar_fuerza_bajar_filas_editadas(tmp_path):
+    backend = BackendCSV(str(tmp_path / "planilla"))
+    backend.agregar_filas(HOJA_HISTORIAL, _cierres(["Ana", "Luis"]))
+    cache = CacheLocal(backend, str(tmp_path / "cache"))
+    cache.leer(HOJA_HISTORIAL)
+    _reescribir(backend, _cierres(["Ana corregida", "Luis"]))
+    cache.invalidar(HOJA_HISTORIAL)
+    assert cache.leer(HOJA_HISTORIAL)["Cajero"].tolist() == ["Ana corregida", "Luis"]
+    assert cache.version(HOJA_HISTORIAL) == 1
+
+
+def test_agregados_se_reconstruyen_cuando_la_hoja_se_vuelve_a_bajar(tmp_path):
+    backend = BackendCSV(str(tmp_path / "planilla"))
+    backend.agregar_filas(HOJA_HISTORIAL, _cierres(["Ana", "Luis", "Eva"]))
+    cache = CacheLocal(backend, str(tmp_path / "cache"), ttl=0)
+    agregados = AgregadosMensuales()
+    agregados.actualizar(cache)
+    _reescribir(backend, pd.concat([_cierres(["Ana", "Luis", "Eva"]).iloc[1:], _cierres(["Juan", "Sol"])]))
+    agregados.actualizar(cache)
+    assert agregados.resumen("03/2025") == {"Efectivo": 400.0, "Digital": 0.0, "Cierres": 4}
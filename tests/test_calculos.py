@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+import calculos
+from estado_caja import EstadoCaja
+
+
+def test_diferencia_y_estado_de_varios_cierres():
+    df = pd.DataFrame({
+        "Balanza": ["1000", "1000", "1000"],
+        "Efectivo": ["600", "500", "700"],
+        "Digital": ["400", "400", "400"],
+    })
+    resultado = calculos.calcular_cierres(df)
+    assert resultado["Diferencia"].tolist() == [0.0, 100.0, -100.0]
+    assert resultado["Estado"].tolist() == ["OK", "FALTANTE", "SOBRANTE"]
+
+
+def test_columnas_faltantes_y_textos_cuentan_como_cero():
+    df = pd.DataFrame({"Balanza": ["500"], "Efectivo": ["abc"]})
+    assert calculos.calcular_cierres(df)["Diferencia"].tolist() == [500.0]
+
+
+def test_redondeo_al_centavo_sin_cero_negativo():
+    df = pd.DataFrame({"Balanza": [0.3], "Digital": [0.1], "Efectivo": [0.2]})
+    resultado = calculos.calcular_cierres(df)
+    assert resultado["Estado"].tolist() == ["OK"]
+    assert f"{resultado['Diferencia'].iloc[0]:.2f}" == "0.00"
+
+
+def test_total_componente_filtra_proveedores_y_empleados():
+    proveedores = pd.DataFrame({"Forma Pago": ["Efectivo", "Digital / Banco"], "Monto": ["100", "50"]})
+    empleados = pd.DataFrame({"Ticket": ["Con Ticket", "Sin Ticket"], "Monto": [30.0, 20.0]})
+    assert calculos.total_componente("proveedores", proveedores["Monto"], proveedores) == 100.0
+    assert calculos.total_componente("empleados", empleados["Monto"], empleados) == 30.0
+    # Sin columna Ticket (planillas viejas) cuenta todo; las demas tablas suman todo
+    assert calculos.total_componente("empleados", empleados["Monto"], empleados.drop(columns="Ticket")) == 50.0
+    assert calculos.total_componente("vales", [10, "abc", 5], {}) == 15.0
+
+
+def test_caja_real_usa_la_misma_formula_que_el_historial():
+    estado = EstadoCaja()
+    estado.fijar("balanza", 0.3)
+    estado.fijar("digital", 0.1)
+    estado.fijar("efectivo", 0.2)
+    diferencia = estado.diferencia()
+    assert f"${diferencia:,.2f}" == "$0.00"
+    assert calculos.estado_caja(diferencia) == "OK"
+
+
+def test_caja_real_coincide_con_la_auditoria():
+    rng = np.random.default_rng(7)
+    montos = rng.uniform(0, 1000, (200, len(calculos.COLUMNAS_JUSTIFICADAS) + 1)).round(2)
+    df = pd.DataFrame(montos, columns=["Balanza", *calculos.COLUMNAS_JUSTIFICADAS])
+    esperadas = calculos.calcular_cierres(df)["Diferencia"].tolist()
+    for fila, esperada in zip(df.itertuples(index=False), esperadas):
+        estado = EstadoCaja()
+        estado.fijar("balanza", fila.Balanza)
+        for columna in calculos.COLUMNAS_JUSTIFICADAS:
+            estado.fijar(columna.lower(), getattr(fila, columna))
+        assert estado.diferencia() == esperada
+
+
+def test_auditoria_detecta_desvios():
+    df = pd.DataFrame({
+        "Fecha": ["01/03/2025", "02/03/2025"], "Cajero": ["Ana", "Luis"],
+        "Balanza": ["1000", "1000"], "Efectivo": ["1000", "900"], "Empleados": ["0", "0"],
+        "Diferencia": ["0", "0"],
+    })
+    auditoria = calculos.auditar_historial(df)
+    assert auditoria["Auditable"].tolist() == [True, True]
+    assert auditoria["Desvio"].tolist() == [0.0, -100.0]
+
+
+def test_cierres_sin_empleados_no_son_auditables():
+    df = pd.DataFrame({
+        "Fecha": ["01/03/2024", "01/03/2025"], "Cajero": ["Ana", "Ana"],
+        "Balanza": ["1000", "1000"], "Efectivo": ["900", "900"], "Empleados": ["", "100"],
+        "Diferencia": ["0", "0"],
+    })
+    auditoria = calculos.auditar_historial(df)
+    assert auditoria["Auditable"].tolist() == [False, True]
+    assert np.isnan(auditoria["Desvio"].iloc[0])
+    assert auditoria["Desvio"].iloc[1] == 0.0
+    legacy = calculos.auditar_historial(df.drop(columns="Empleados"))
+    assert not legacy["Auditable"].any()
+    assert legacy["Desvio"].isna().all()
+
+
+def test_diferencias_registradas_solo_recalcula_las_vacias():
+    df = pd.DataFrame({
+        "Balanza": ["1000", "1000"], "Efectivo": ["900", "990"],
+        "Diferencia": ["0", ""], "Estado": ["OK", ""],
+    })
+    registradas = calculos.diferencias_registradas(df)
+    assert registradas["Diferencia"].tolist() == [0.0, 10.0]
+    assert registradas["Estado"].tolist() == ["OK", "FALTANTE"]
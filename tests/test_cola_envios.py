@@ -0,0 +1,58 @@
+import time
+
+import pandas as pd
+
+from almacenamiento import BackendCSV
+from cola_envios import ColaCierres
+
+
+def _cierre(cajero):
+    return {"Fecha": "01/03/2025", "Cajero": cajero, "Balanza": 1000.0, "Diferencia": 0.0, "Estado": "OK"}
+
+
+def _vacias():
+    return (pd.DataFrame(columns=["Proveedor", "Forma Pago", "Nro Factura", "Monto"]),
+            pd.DataFrame(columns=["Empleado", "Ticket", "Monto"]))
+
+
+def _esperar(condicion, limite=15):
+    fin = time.monotonic() + limite
+    while not condicion() and time.monotonic() < fin:
+        time.sleep(0.05)
+    return condicion()
+
+
+class _RechazaA(BackendCSV):
+    # Un cierre que la planilla nunca acepta (por ejemplo, una hoja protegida)
+    def agregar_lote(self, lote):
+        if any("Ana" in df["ID Cierre"].iloc[0] for df in lote.values() if not df.empty):
+            raise PermissionError("hoja protegida")
+        super().agregar_lote(lote)
+
+
+def test_cierre_que_siempre_falla_queda_apartado(tmp_path):
+    cola = ColaCierres(str(tmp_path / "cola.sqlite"), max_intentos=2)
+    cola.encolar(_cierre("Ana"), *_vacias())
+    cola.encolar(_cierre("Luis"), *_vacias())
+    backend = _RechazaA(str(tmp_path / "hojas"))
+    cola.iniciar(backend)
+    assert _esperar(lambda: cola.estado()["enviados"] == 1)
+    estado = cola.estado()
+    assert estado["pendientes"] == 0
+    assert estado["fallidos"]["Cierre"].tolist() == ["01/03/2025|Ana"]
+    assert "hoja protegida" in estado["fallidos"]["Error"].iloc[0]
+
+    cola.reintentar_fallidos()
+    assert cola.estado()["fallidos"].empty
+
+
+def test_error_al_avisar_no_detiene_la_cola(tmp_path):
+    def al_enviar(datos):
+        raise RuntimeError("cache no disponible")
+
+    cola = ColaCierres(str(tmp_path / "cola.sqlite"))
+    cola.iniciar(BackendCSV(str(tmp_path / "hojas")), al_enviar=al_enviar)
+    cola.encolar(_cierre("Ana"), *_vacias())
+    assert _esperar(lambda: cola.estado()["enviados"] == 1)
+    cola.encolar(_cierre("Luis"), *_vacias())
+    assert _esperar(lambda: cola.estado()["enviados"] == 2)
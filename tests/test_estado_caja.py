@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+import calculos
+from estado_caja import EstadoCaja, filas_del_editor
+
+
+def test_filas_del_editor_aplica_ediciones_borrados_y_agregados():
+    base = [{"Monto": 100}, {"Monto": 200}, {"Monto": 300}]
+    edicion = {"edited_rows": {"0": {"Monto": 150}}, "deleted_rows": [1], "added_rows": [{"Monto": 50}]}
+    assert filas_del_editor(edicion, base) == [{"Monto": 150}, {"Monto": 300}, {"Monto": 50}]
+    assert base[0] == {"Monto": 100}
+    assert filas_del_editor({}) == []
+
+
+def test_proveedores_solo_suman_los_pagos_en_efectivo():
+    estado = EstadoCaja()
+    estado.cargar_tabla("df_proveedores", {"added_rows": [
+        {"Proveedor": "Dharma", "Forma Pago": "Efectivo", "Monto": 1000},
+        {"Proveedor": "Aprea", "Forma Pago": "Digital / Banco", "Monto": 500},
+        {"Proveedor": "Otro", "Forma Pago": "Efectivo", "Monto": None},
+    ]})
+    assert estado.totales["proveedores"] == 1000.0
+    assert len(estado.tablas["df_proveedores"]) == 3
+    assert estado.tablas["df_proveedores"].a_dataframe()["Monto"].tolist() == [1000.0, 500.0, 0.0]
+
+
+def test_empleados_solo_suman_la_mercaderia_con_ticket():
+    estado = EstadoCaja()
+    edicion = {"added_rows": [{"Empleado": "Ana", "Ticket": "Con Ticket", "Monto": 300},
+                              {"Empleado": "Luis", "Ticket": "Sin Ticket", "Monto": 200}]}
+    estado.cargar_tabla("df_empleados", edicion)
+    assert estado.totales["empleados"] == 300.0
+    # Mismo total que con el DataFrame que se guarda en el historial
+    df = estado.tablas["df_empleados"].a_dataframe()
+    assert calculos.total_componente("empleados", df["Monto"], df) == 300.0
+    filas = filas_del_editor({"edited_rows": {"1": {"Ticket": "Con Ticket"}}}, edicion["added_rows"])
+    estado.cargar_tabla("df_empleados", {"added_rows": filas})
+    assert estado.totales["empleados"] == 500.0
+
+
+def test_tickets_importados_se_suman_a_los_descuentos_del_editor():
+    estado = EstadoCaja()
+    estado.cargar_tabla("df_descuentos", {"added_rows": [{"Monto": 100}]})
+    estado.agregar_tickets(np.array([50.0, 25.0]))
+    assert estado.totales["descuentos"] == 175.0
+    # Editar la tabla no pierde los tickets importados
+    estado.cargar_tabla("df_descuentos", {"added_rows": [{"Monto": 10}]})
+    assert estado.totales["descuentos"] == 85.0
+    assert estado.descuentos().tolist() == [10.0, 50.0, 25.0]
+    estado.quitar_tickets()
+    assert estado.totales["descuentos"] == 10.0
+
+
+def test_diferencia_de_la_caja_real():
+    estado = EstadoCaja()
+    estado.fijar("balanza", 2000)
+    estado.fijar("efectivo", 1200)
+    estado.cargar_tabla("df_proveedores", {"added_rows": [{"Proveedor": "Dharma", "Forma Pago": "Efectivo", "Monto": 500}]})
+    assert estado.diferencia() == 300.0
+    df = pd.DataFrame({"Balanza": [2000], "Efectivo": [1200], "Proveedores": [500]})
+    assert calculos.calcular_cierres(df)["Diferencia"].tolist() == [estado.diferencia()]
@@ -0,0 +1,46 @@
+import os
+
+import pandas as pd
+
+from almacenamiento import HOJA_CONSUMOS, HOJA_HISTORIAL, HOJA_PAGOS, BackendCSV
+from exportacion import exportar
+from reportes_lote import armar_trabajos, leer_origen
+
+
+def _backend(tmp_path):
+    backend = BackendCSV(str(tmp_path / "planilla"))
+    backend.agregar_filas(HOJA_HISTORIAL, pd.DataFrame({"Fecha": ["01/03/2025"], "Cajero": ["Ana"], "Balanza": ["1000"], "Efectivo": ["1000"]}))
+    backend.agregar_filas("Historial_ESF_2025-04", pd.DataFrame({"Fecha": ["02/04/2025"], "Sucursal": ["ESF"], "Caja": ["1"], "Cajero": ["Luis"], "Balanza": ["850000.5"]}))
+    return backend
+
+
+def test_exporta_hoja_original_y_particiones_en_rango(tmp_path):
+    backend = _backend(tmp_path)
+    filas = exportar(backend, str(tmp_path / "export"), desde=pd.Timestamp(2025, 3, 1), hasta=pd.Timestamp(2025, 3, 31))
+    assert filas == {HOJA_HISTORIAL: 1, HOJA_PAGOS: 0, HOJA_CONSUMOS: 0}
+    filas = exportar(backend, str(tmp_path / "todo"))
+    historial = BackendCSV(str(tmp_path / "todo")).leer(HOJA_HISTORIAL)
+    assert filas[HOJA_HISTORIAL] == 2
+    assert historial["Balanza"].tolist() == ["1000", "850000.5"]
+    assert historial["Sucursal"].tolist() == ["", "ESF"]
+
+
+def test_hojas_sin_columnas_no_generan_archivo_y_la_exportacion_se_vuelve_a_leer(tmp_path):
+    salida = str(tmp_path / "export")
+    exportar(_backend(tmp_path), salida)
+    assert os.listdir(salida) == [f"{HOJA_HISTORIAL}.csv"]
+    trabajos, resumen = armar_trabajos(leer_origen(salida))
+    assert len(trabajos) == 2
+    assert resumen["Estado"].tolist() == ["OK", "FALTANTE"]
+    # Exportacion de una planilla vacia: ningun archivo, y se lee como un origen sin cierres
+    exportar(BackendCSV(str(tmp_path / "vacia")), str(tmp_path / "export_vacia"), formato="parquet")
+    assert os.listdir(tmp_path / "export_vacia") == []
+    assert armar_trabajos(leer_origen(str(tmp_path / "export_vacia")))[0] == []
+
+
+def test_archivo_csv_de_cero_bytes_se_lee_como_hoja_vacia(tmp_path):
+    open(tmp_path / f"{HOJA_PAGOS}.csv", "w").close()
+    backend = BackendCSV(str(tmp_path))
+    assert backend.leer(HOJA_PAGOS).empty
+    assert backend.leer_desde(HOJA_PAGOS, 0).empty
+    assert list(backend.leer_bloques(HOJA_PAGOS, 10)) == []
@@ -0,0 +1,109 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from almacenamiento import COLUMNA_ID, HOJA_CONSUMOS, HOJA_HISTORIAL, HOJA_PAGOS, BackendCSV
+from exportacion import exportar
+from importacion import importar_cierres, leer_montos_csv, parsear_montos, validar_cierres
+from reportes_lote import leer_origen
+
+
+def test_parsea_formato_local_y_punto_decimal():
+    montos, invalidos = parsear_montos("$ 1.234,56\n1234.56\n850000,5\t12")
+    assert np.allclose(montos, [1234.56, 1234.56, 850000.5, 12])
+    assert invalidos == []
+
+
+def test_separa_invalidos_y_negativos():
+    montos, invalidos = parsear_montos(["100", "abc", "-5"])
+    assert montos.tolist() == [100.0]
+    assert invalidos == ["abc", "-5"]
+
+
+def test_csv_con_columna_monto():
+    archivo = io.BytesIO("Fecha;Monto\n01/03/2025;1.500,25\n02/03/2025;300\n".encode("utf-8-sig"))
+    montos, invalidos = leer_montos_csv(archivo)
+    assert montos.tolist() == [1500.25, 300.0]
+    assert invalidos == []
+
+
+def _historial():
+    return pd.DataFrame({
+        "Fecha": ["01/03/2025", "02/03/2025"], "Cajero": ["Ana", "Luis"],
+        "Balanza": ["1000", "2000"], "Efectivo": ["1000", "1900"],
+    })
+
+
+def test_valida_cierres_y_filas_hijas():
+    pagos = pd.DataFrame({"Proveedor": ["Dharma"], "Forma Pago": ["Efectivo"], "Monto": ["$ 1.500,50"],
+                          "Fecha": ["01/03/2025"], "Cajero": ["Ana"]})
+    validas, errores = validar_cierres({HOJA_HISTORIAL: _historial(), HOJA_PAGOS: pagos})
+    assert errores.empty
+    assert validas[HOJA_HISTORIAL]["Estado"].tolist() == ["OK", "FALTANTE"]
+    assert validas[HOJA_PAGOS]["Monto"].tolist() == [1500.5]
+    assert validas[HOJA_PAGOS][COLUMNA_ID].tolist() == ["01/03/2025|Ana"]
+
+
+def test_conserva_diferencia_y_estado_guardados():
+    # Cierre viejo: recalcularlo daria 50 de faltante, pero se cerro en 0 / OK
+    historial = pd.DataFrame({"Fecha": ["01/03/2025", "02/03/2025", "03/03/2025"], "Cajero": ["Ana", "Ana", "Ana"],
+                              "Balanza": ["1050", "1000", "1000"], "Digital": ["400", "", ""], "Efectivo": ["600", "900", "900"],
+                              "Diferencia": ["0", "", "-1.500,50"], "Estado": ["OK", "", "SOBRANTE"]})
+    validas, errores = validar_cierres({HOJA_HISTORIAL: historial})
+    assert errores.empty
+    assert validas[HOJA_HISTORIAL]["Diferencia"].tolist() == [0.0, 100.0, -1500.5]
+    assert validas[HOJA_HISTORIAL]["Estado"].tolist() == ["OK", "FALTANTE", "SOBRANTE"]
+
+
+def test_rechaza_diferencia_y_estado_invalidos():
+    historial = _historial().assign(Diferencia=["abc", "100"], Estado=["OK", "PENDIENTE"])
+    validas, errores = validar_cierres({HOJA_HISTORIAL: historial})
+    assert validas[HOJA_HISTORIAL].empty
+    assert errores["Motivo"].tolist() == ["Diferencia invalida", "Estado invalido"]
+
+
+def test_hoja_con_todas_las_filas_invalidas_no_devuelve_filas():
+    pagos = pd.DataFrame({"Proveedor": ["Desconocido", "Dharma"], "Forma Pago": ["Efectivo", "Cheque"],
+                          "Monto": ["100", "200"], "Fecha": ["01/03/2025", "01/03/2025"], "Cajero": ["Ana", "Ana"]})
+    consumos = pd.DataFrame({"Fecha": ["01/03/2025", "99/99/2025"], "Empleado": ["", "Luis"], "Monto": ["50", "60"]})
+    validas, errores = validar_cierres({HOJA_HISTORIAL: _historial(), HOJA_PAGOS: pagos, HOJA_CONSUMOS: consumos})
+    assert validas[HOJA_PAGOS].empty
+    assert validas[HOJA_CONSUMOS].empty
+    assert len(errores) == 4
+
+
+def test_historial_con_todas_las_filas_invalidas_no_devuelve_cierres():
+    historial = pd.DataFrame({"Fecha": ["2025-03-01", "01/03/2025"], "Cajero": ["Ana", ""], "Balanza": ["1000", "1000"]})
+    validas, errores = validar_cierres({HOJA_HISTORIAL: historial})
+    assert validas[HOJA_HISTORIAL].empty
+    assert errores["Motivo"].tolist() == ["Fecha invalida (dd/mm/aaaa)", "Falta el Cajero"]
+
+
+def test_consumos_sin_id_van_al_unico_cierre_de_la_fecha():
+    historial = pd.concat([_historial(), pd.DataFrame({"Fecha": ["02/03/2025"], "Cajero": ["Ana"], "Balanza": ["0"]})])
+    historial = historial.reset_index(drop=True).fillna("")
+    consumos = pd.DataFrame({"Fecha": ["01/03/2025", "02/03/2025"], "Empleado": ["Luis", "Ana"], "Monto": ["50", "60"]})
+    validas, errores = validar_cierres({HOJA_HISTORIAL: historial, HOJA_CONSUMOS: consumos})
+    # El 01/03 tiene un solo cierre; el 02/03 tiene dos y no se puede saber a cual va
+    assert validas[HOJA_CONSUMOS][COLUMNA_ID].tolist() == ["01/03/2025|Ana"]
+    assert errores["Fila"].tolist() == [3]
+
+
+def test_reimportar_una_exportacion_no_duplica_cierres_viejos(tmp_path):
+    # Cierres anteriores a "ID Cierre": la clave guardada sale de Fecha + Cajero
+    backend = BackendCSV(str(tmp_path / "planilla"))
+    backend.agregar_filas(HOJA_HISTORIAL, _historial())
+    backend.agregar_filas(HOJA_PAGOS, pd.DataFrame({"Proveedor": ["Dharma"], "Forma Pago": ["Efectivo"], "Monto": ["150"],
+                                                    "Fecha": ["01/03/2025"], "Cajero": ["Ana"]}))
+    backend.agregar_filas(HOJA_CONSUMOS, pd.DataFrame({"Fecha": ["02/03/2025"], "Empleado": ["Ana"], "Monto": ["60"]}))
+    exportar(backend, str(tmp_path / "export"))
+    validas, errores = validar_cierres(leer_origen(str(tmp_path / "export")))
+    assert errores.empty
+    resultado = importar_cierres(BackendCSV(str(tmp_path / "planilla")), validas)
+    assert (resultado["importados"], resultado["existentes"]) == (0, 2)
+    assert len(backend.leer(HOJA_HISTORIAL)) == 2
+    assert len(backend.leer(HOJA_PAGOS)) == 1
+    assert len(backend.leer(HOJA_CONSUMOS)) == 1
+    assert len(os.listdir(tmp_path / "planilla")) == 3
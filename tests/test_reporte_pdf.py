@@ -0,0 +1,52 @@
+import datetime
+import re
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from reporte_pdf import _logo_decodificado, _nuevo_documento, generar_pdf_profesional
+
+
+def _texto_pdf(pdf_bytes):
+    # Textos dibujados en las paginas (fpdf comprime cada pagina con zlib)
+    lineas = []
+    for flujo in re.findall(rb"stream\r?\n(.*?)\r?\nendstream", pdf_bytes, re.S):
+        try:
+            contenido = zlib.decompress(flujo).decode("latin-1")
+        except zlib.error:
+            continue
+        lineas += [t.replace("\\(", "(").replace("\\)", ")") for t in re.findall(r"\((.*?)(?<!\\)\) Tj", contenido)]
+    return "\n".join(lineas)
+
+
+def _pdf(descuentos):
+    vacia = pd.DataFrame(columns=["Monto"])
+    return _texto_pdf(generar_pdf_profesional(
+        datetime.date(2025, 3, 1), "Ana", 1000.0, None, 400.0, 450.0,
+        vacia, vacia, vacia, vacia, descuentos,
+        pd.DataFrame(columns=["Proveedor", "Forma Pago", "Monto"]), pd.DataFrame(columns=["Empleado", "Monto"]),
+        0.0, {},
+    ))
+
+
+def test_tickets_del_cierre_se_dibujan_como_grilla():
+    texto = _pdf(np.array([100.0, 50.0]))
+    assert "SOMOS AVELLANEDA (2 tickets - Total: $ 150.00)" in texto
+    assert "$ 100.00" in texto and "$ 50.00" in texto
+
+
+def test_total_del_historial_no_se_dibuja_como_ticket():
+    # reportes_lote pasa el total guardado en el historial
+    texto = _pdf(150.0)
+    assert "tickets" not in texto
+    assert "SOMOS AVELLANEDA (Total: $ 150.00)" in texto
+    assert "Total descuentos" in texto
+
+
+def test_logo_se_decodifica_una_vez_y_se_dibuja_en_cada_documento():
+    _logo_decodificado.cache_clear()
+    for cajero in ["Ana", "Luis"]:
+        pdf_bytes = _nuevo_documento(datetime.date(2025, 3, 1), cajero).output(dest="S").encode("latin-1")
+        assert b"/Subtype /Image" in pdf_bytes
+    assert _logo_decodificado.cache_info().misses == 1
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from tendencias import TendenciasHistorial, grafico_medios
+
+
+def test_tendencias_usan_el_estado_guardado():
+    # Cierre anterior a la columna "Empleados": recalcularlo daria un FALTANTE que no existio
+    df = pd.DataFrame({
+        "Fecha": ["01/03/2024", "02/03/2024"], "Cajero": ["Ana", "Ana"],
+        "Balanza": ["1000", "1000"], "Efectivo": ["900", "900"], "Digital": ["0", "0"],
+        "Diferencia": ["0", ""], "Estado": ["OK", ""],
+    })
+    series = TendenciasHistorial()
+    series.agregar_historial(df)
+    tabla = series.tabla()
+    assert tabla["Faltantes"].sum() == 1
+    assert tabla["Diferencia"].sum() == 100.0
+
+
+def test_cobros_por_medio_solo_de_los_cierres_con_desglose():
+    df = pd.DataFrame({
+        "Fecha": ["01/03/2025", "02/03/2025", "02/03/2025"], "Sucursal": ["ESF", "ESF", "ESF"],
+        "Caja": ["Caja 1", "Caja 1", "Caja 2"], "Cajero": ["Ana", "Ana", "Luis"],
+        "Balanza": ["1000", "1000", "500"], "Efectivo": ["500", "400", "500"], "Digital": ["500", "600", "0"],
+        "Digital Mercado Pago": ["", "450", "0"], "Digital Nave": ["", "150", "0"],
+        "Diferencia": ["0", "0", "0"], "Estado": ["OK", "OK", "OK"],
+    })
+    series = TendenciasHistorial()
+    series.agregar_historial(df)
+    figura = grafico_medios(series.tabla(), "Diaria")
+    barras = {traza.name: list(traza.y) for traza in figura.data}
+    assert set(barras) == {"Mercado Pago", "Nave"}
+    # El 01/03 no tenia desglose: sin valor, no cero
+    assert np.isnan(barras["Mercado Pago"][0])
+    assert barras["Mercado Pago"][1] == 450.0
+    assert series.figura("medios", "Todo", "Diaria")["data"]